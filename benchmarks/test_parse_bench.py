@@ -0,0 +1,132 @@
+"""
+Benchmark tests for parallel event parsing with threads versus processes.
+
+The thread pool only speeds up parsing on free-threaded Python builds,
+while the process pool pays for pickling the event blocks and the parsed events.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import xml.etree.ElementTree as ET
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import pytest
+
+import pylhe
+
+NUM_EVENTS = int(os.environ.get("PYLHE_BENCH_NUM_EVENTS", "20000"))
+NUM_WORKERS = int(os.environ.get("PYLHE_BENCH_NUM_WORKERS", "4"))
+BATCH_SIZE = 256
+RNG_SEED = 1337
+
+HEADER = """<LesHouchesEvents version="3.0">
+<header>
+<initrwgt>
+<weight id="1001">muR=1 muF=1</weight>
+<weight id="1002">muR=2 muF=1</weight>
+</initrwgt>
+</header>
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+"""
+
+PARTICLE = " {id:8d} {status:2d} {mother1:4d} {mother2:4d} {color1:4d} {color2:4d} {px:+.8e} {py:+.8e} {pz:+.8e} {e:+.8e} {m:+.8e} 0.0000e+00 9.0000e+00\n"
+
+
+def _event_block(rng: random.Random) -> str:
+    particles = [
+        PARTICLE.format(
+            id=rng.choice((1, -1, 2, -2, 21)),
+            status=-1 if i < 2 else 1,
+            mother1=0 if i < 2 else 1,
+            mother2=0 if i < 2 else 2,
+            color1=501,
+            color2=502,
+            px=rng.uniform(-500.0, 500.0),
+            py=rng.uniform(-500.0, 500.0),
+            pz=rng.uniform(-3000.0, 3000.0),
+            e=rng.uniform(0.0, 3000.0),
+            m=rng.uniform(0.0, 50.0),
+        )
+        for i in range(6)
+    ]
+    weight = rng.uniform(0.1, 10.0)
+    return (
+        f"<event>\n{len(particles)} 1 {weight:+.7e} 9.11884000e+01 -1.0e+00 -1.0e+00\n"
+        + "".join(particles)
+        + f"<rwgt>\n<wgt id='1001'> {weight:.5e}</wgt>\n<wgt id='1002'> {weight / 2:.5e}</wgt>\n</rwgt>\n"
+        + "</event>\n"
+    )
+
+
+@pytest.fixture(scope="module")
+def lhe_path(tmp_path_factory) -> Path:
+    path = tmp_path_factory.mktemp("parse") / "random-events.lhe"
+    rng = random.Random(RNG_SEED)
+    with path.open("w") as f:
+        f.write(HEADER)
+        for _ in range(NUM_EVENTS):
+            f.write(_event_block(rng))
+        f.write("</LesHouchesEvents>")
+    return path
+
+
+def _read_threads(path: Path, parse_workers: int) -> int:
+    events = pylhe.LesHouchesEvents.fromfile(path, parse_workers=parse_workers).events
+    return sum(1 for _ in events)
+
+
+def _parse_serialized(
+    blocks: list[bytes], index_map: dict[int, str]
+) -> list[pylhe.LHEEvent]:
+    return [
+        pylhe.LHEEvent._fromelement(ET.fromstring(block), index_map) for block in blocks
+    ]
+
+
+def _serialized_batches(path: Path) -> Iterator[list[bytes]]:
+    context = ET.iterparse(path, events=["start", "end"])
+    _, root = next(context)
+    blocks = (
+        ET.tostring(element) for element in pylhe._event_elements(root, iter(context))
+    )
+    while batch := list(islice(blocks, BATCH_SIZE)):
+        yield batch
+
+
+def _read_processes(path: Path, pool: ProcessPoolExecutor) -> int:
+    lhef = pylhe.LesHouchesEvents.fromfile(path)
+    assert lhef.header is not None
+    index_map = lhef.header.initrwgt.index_to_id()
+    futures = [
+        pool.submit(_parse_serialized, batch, index_map)
+        for batch in _serialized_batches(path)
+    ]
+    return sum(len(future.result()) for future in futures)
+
+
+@pytest.mark.parametrize("parse_workers", [0, NUM_WORKERS])
+def test_parse_threads_benchmark(benchmark, lhe_path, parse_workers) -> None:
+    """Benchmark reading NUM_EVENTS events sequentially and with a thread pool."""
+    benchmark.extra_info["num_events"] = NUM_EVENTS
+    benchmark.extra_info["free_threading"] = not getattr(
+        sys, "_is_gil_enabled", lambda: True
+    )()
+
+    assert benchmark(_read_threads, lhe_path, parse_workers) == NUM_EVENTS
+
+
+def test_parse_processes_benchmark(benchmark, lhe_path) -> None:
+    """Benchmark reading NUM_EVENTS events with a process pool, for comparison with the thread pool."""
+    benchmark.extra_info["num_events"] = NUM_EVENTS
+
+    with ProcessPoolExecutor(NUM_WORKERS) as pool:
+        assert benchmark(_read_processes, lhe_path, pool) == NUM_EVENTS
@@ -5,17 +5,28 @@ Python interface to read Les Houches Event (LHE) files.
 from __future__ import annotations
 
 import enum
+import functools
 import gzip
 import io
 import os
+import queue
+import re
+import string
+import threading
 import warnings
 import xml.etree.ElementTree as ET
-from collections.abc import Iterable, Iterator
+from collections import deque
+from collections.abc import Callable, Generator, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from copy import deepcopy
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, is_dataclass
+from itertools import islice
+from operator import attrgetter
 from typing import (
+    IO,
     Any,
     BinaryIO,
+    Literal,
     Protocol,
     TextIO,
     TypeVar,
@@ -32,6 +43,9 @@ from pylhe import lheh5
 from pylhe._version import version as __version__
 
 from .awkward import to_awkward
+from .columnar import LHEEventColumns
+from .tools import add_weights, demux, slim, split
+from .writer import LHEWriter, write_columns
 
 __all__ = [
     "DEFAULT_FORMAT",
@@ -43,7 +57,9 @@ __all__ = [
     "WEIGHTS_FORMAT",
     "WEIGHTS_GZ_FORMAT",
     "LHEEvent",
+    "LHEEventColumns",
     "LHEEventInfo",
+    "LHEEventSequence",
     "LHEFile",
     "LHEGenerator",
     "LHEHDF5Format",
@@ -56,9 +72,15 @@ __all__ = [
     "LHEParticle",
     "LHEProcInfo",
     "LHEWeightFormat",
+    "LHEWriter",
     "LHEXMLFormat",
     "__version__",
+    "add_weights",
+    "demux",
+    "slim",
+    "split",
     "to_awkward",
+    "write_columns",
 ]
 
 
@@ -66,10 +88,38 @@ def __dir__() -> list[str]:
     return __all__
 
 
-# retrieve mapping of PDG ID to particle name as LaTeX string
-_PDGID2LaTeXNameMap, _ = DirectionalMaps("PDGID", "LATEXNAME", converters=(str, str))
+_PDGID2LaTeXNameMapLock = threading.Lock()
+_PDGID2LaTeXNameMap: Any = None
+
+
+def _load_pdgid2latexname_map() -> Any:
+    global _PDGID2LaTeXNameMap
+    with _PDGID2LaTeXNameMapLock:
+        if _PDGID2LaTeXNameMap is None:
+            _PDGID2LaTeXNameMap, _ = DirectionalMaps(
+                "PDGID", "LATEXNAME", converters=(str, str)
+            )
+    return _PDGID2LaTeXNameMap
+
+
+def _pdgid2latexname(sid: str) -> str:
+    """
+    Retrieve the particle name of a PDG ID as LaTeX string.
+
+    The mapping is loaded on first use, guarded by a lock so that concurrent callers load it only once.
+    Once loaded, it is read without taking the lock.
+    """
+    pdgid2latexname_map = _PDGID2LaTeXNameMap
+    if pdgid2latexname_map is None:
+        pdgid2latexname_map = _load_pdgid2latexname_map()
+    return str(pdgid2latexname_map[sid])
+
 
 PathLike = str | bytes | os.PathLike[str] | os.PathLike[bytes]
+EventStorage = Literal["list", "columnar"]
+
+_PARSE_BATCH_SIZE = 256
+_WRITE_BLOCK_SIZE = 256
 
 
 class LHEWeightFormat(enum.Enum):
@@ -109,6 +159,9 @@ class LHEXMLFormat:
     particle: str = "{id:5d} {status:3d} {mother1:3d} {mother2:3d} {color1:3d} {color2:3d} {px: 15.8e} {py: 15.8e} {pz: 15.8e} {e: 15.8e} {m: 15.8e} {lifetime: 10.4e} {spin: 10.4e}"
     initinfo: str = " {beamA: 6d} {beamB: 6d} {energyA: 14.7e} {energyB: 14.7e} {PDFgroupA: 5d} {PDFgroupB: 5d} {PDFsetA: 5d} {PDFsetB: 5d} {weightingStrategy: 5d} {numProcesses: 5d}"
     procinfo: str = "{xSection: 14.7e} {error: 14.7e} {unitWeight: 14.7e} {procId: 5d}"
+    passthrough: bool = True
+    """write events read with ``keep_raw=True`` as they are in the source, unless they have been modified
+    or the format differs from the source: a different weights block, version 1 or non-default templates"""
 
 
 @dataclass(slots=True, frozen=True)
@@ -151,6 +204,10 @@ HDF5_GZ_FORMAT = LHEHDF5Format(compression="gzip", compression_opts=4, shuffle=T
 """Output format for HDF5-based LHEH5 files with gzip-compressed datasets."""
 
 
+_EPILOGUE = "</LesHouchesEvents>"
+"""Closing tag of an LHE XML file, written without a trailing newline"""
+
+
 class Writeable(Protocol):
     """
     A protocol for writeable objects.
@@ -179,6 +236,279 @@ def _copy_xml_element(element: ET.Element) -> ET.Element:
     return copied
 
 
+_TOLHE_CACHE_SIZE = 64
+# Serialized header and init blocks with their fingerprints, by object identity and format
+_tolhe_cache: dict[tuple[int, LHEXMLFormat], tuple[object, str]] = {}
+_tolhe_cache_lock = threading.Lock()
+
+
+def _cached_tolhe(block: LHEHeader | LHEInit, lheformat: LHEXMLFormat) -> str:
+    """
+    Return ``block.tolhe(lheformat)``, cached per object and format for writing many files.
+
+    A cached serialization is only returned while the `_fingerprint` of the block is unchanged,
+    so that mutating the block or one of its XML elements invalidates it.
+    """
+    key = (id(block), lheformat)
+    fingerprint = _fingerprint(block)
+    with _tolhe_cache_lock:
+        cached = _tolhe_cache.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+    text = block.tolhe(lheformat=lheformat)
+    with _tolhe_cache_lock:
+        if key not in _tolhe_cache and len(_tolhe_cache) >= _TOLHE_CACHE_SIZE:
+            del _tolhe_cache[next(iter(_tolhe_cache))]
+        _tolhe_cache[key] = (fingerprint, text)
+    return text
+
+
+_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+@functools.cache
+def _field_names(cls: type) -> tuple[str, ...] | None:
+    return tuple(f.name for f in fields(cls)) if is_dataclass(cls) else None
+
+
+def _fingerprint(value: Any) -> object:
+    """
+    Return a comparable snapshot of the content of dataclasses, XML elements and containers.
+
+    Walking the values is much cheaper than serializing them, in particular for XML elements.
+    """
+    cls: type = type(value)
+    if cls in _SCALAR_TYPES:
+        return value
+    if cls is list:
+        return tuple([_fingerprint(item) for item in value])
+    if cls is dict:
+        return tuple([(key, _fingerprint(item)) for key, item in value.items()])
+    if isinstance(value, ET.Element):
+        # The number of children of each element in document order fixes the tree structure
+        return tuple(
+            [
+                (e.tag, tuple(e.attrib.items()), e.text, e.tail, len(e))
+                for e in value.iter()
+            ]
+        )
+    names = _field_names(cls)
+    if names is None:
+        return value
+    return (cls, tuple([_fingerprint(getattr(value, name)) for name in names]))
+
+
+# printf-style equivalents of the format specs used by the `LHEXMLFormat` templates
+_PRINTF_SPEC = re.compile(
+    r"(?P<sign>[+ -]?)(?P<zero>0?)(?P<width>\d*)(?P<precision>\.\d+)?(?P<type>[deEfFgG])"
+)
+
+
+class _Template:
+    """
+    A named-field format template of `LHEXMLFormat`, compiled to positional formatting.
+
+    Where all format specs have a printf-style equivalent, rows are rendered with the
+    ``%`` operator and several rows at once with a single joined template; otherwise with
+    positional `str.format`. Both produce the same output as the named-field template.
+
+    The compiled templates take the values of the fields ``names`` in order, ``printf``
+    is None if a format spec has no printf-style equivalent.
+    """
+
+    __slots__ = ("_blocks", "_getter", "names", "positional", "printf")
+
+    def __init__(self, template: str) -> None:
+        names: list[str] = []
+        positional = ""
+        printf: str | None = ""
+        for literal, name, spec, conversion in string.Formatter().parse(template):
+            positional += literal.replace("{", "{{").replace("}", "}}")
+            if printf is not None:
+                printf += literal.replace("%", "%%")
+            if name is None:
+                continue
+            positional += f"{{{len(names)}{'!' + conversion if conversion else ''}{':' + spec if spec else ''}}}"
+            names.append(name)
+            match = _PRINTF_SPEC.fullmatch(spec or "")
+            if printf is None or conversion or match is None:
+                printf = None
+                continue
+            # "-" is the default sign in format specs, but left-alignment in printf
+            sign = match["sign"].replace("-", "")
+            printf += f"%{sign}{match['zero']}{match['width']}{match['precision'] or ''}{match['type']}"
+        self._getter = (
+            attrgetter(*names) if len(names) > 1 else _single_attrgetter(names)
+        )
+        self.names = tuple(names)
+        self.positional = positional
+        self.printf = printf
+        self._blocks: dict[int, str] = {}
+
+    def render(self, obj: Any) -> str:
+        """Render the template with the attributes of ``obj``."""
+        values = self._getter(obj)
+        if self.printf is not None:
+            return self.printf % values
+        return self.positional.format(*values)
+
+    def render_block(self, objs: list[Any]) -> str:
+        """Render the template for each of ``objs``, joined by newlines."""
+        if self.printf is None:
+            return "\n".join([self.positional.format(*self._getter(o)) for o in objs])
+        block = self._blocks.get(len(objs))
+        if block is None:
+            block = self._blocks.setdefault(
+                len(objs), "\n".join([self.printf] * len(objs))
+            )
+        getter = self._getter
+        return block % tuple([value for obj in objs for value in getter(obj)])
+
+
+def _single_attrgetter(names: list[str]) -> Callable[[Any], tuple[Any, ...]]:
+    """`operator.attrgetter` returning a tuple also for less than two attributes."""
+    return lambda obj: tuple(getattr(obj, name) for name in names)
+
+
+_WEIGHTS_BLOCKS_CACHE_SIZE = 64
+
+
+class _EventSerializer:
+    """Serializes events in LHE XML, compiled once per `LHEXMLFormat`, see `_event_serializer`."""
+
+    __slots__ = (
+        "_weights_blocks",
+        "eventinfo",
+        "particle",
+        "passthrough",
+        "scales",
+        "weights",
+    )
+
+    def __init__(self, lheformat: LHEXMLFormat) -> None:
+        v3 = lheformat.version is LHEVersion.V3
+        # Source blocks are only written as they are in formats they can be in
+        self.passthrough = (
+            lheformat.passthrough
+            and v3
+            and lheformat.eventinfo == DEFAULT_FORMAT.eventinfo
+            and lheformat.particle == DEFAULT_FORMAT.particle
+        )
+        self.eventinfo = _Template(lheformat.eventinfo)
+        self.particle = _Template(lheformat.particle)
+        self.weights = lheformat.weights if v3 else LHEWeightFormat.NONE
+        self.scales = v3
+        # printf templates of the weights block, by the weight ids of an event
+        self._weights_blocks: dict[tuple[str, ...], str] = {}
+
+    def _weights_block(
+        self, weights: dict[str, float], weight_ids: tuple[str, ...] | None
+    ) -> str:
+        ids = tuple(weights)
+        order = self.weight_order(ids, weight_ids)
+        if order is ids:
+            return self.weights_template(ids) % tuple(weights.values())
+        return self.weights_template(order) % tuple(weights[k] for k in order)
+
+    def weight_order(
+        self, ids: tuple[str, ...], weight_ids: tuple[str, ...] | None
+    ) -> tuple[str, ...]:
+        """
+        Return the weight ``ids`` of an event in the order they are written.
+
+        ``<weights>`` blocks are read by position, so their values follow the order of the
+        weights ``weight_ids`` declared in the ``<initrwgt>`` block of the output, if known.
+        Weights that are not declared follow in their own order.
+        """
+        if (
+            self.weights is not LHEWeightFormat.WEIGHTS
+            or not weight_ids
+            or ids == weight_ids[: len(ids)]
+        ):
+            return ids
+        present = set(ids)
+        declared = [k for k in weight_ids if k in present]
+        known = set(declared)
+        return (*declared, *(k for k in ids if k not in known))
+
+    def weights_template(self, ids: tuple[str, ...]) -> str:
+        """Return the printf template of the weights block for the weight ``ids``."""
+        block = self._weights_blocks.get(ids)
+        if block is None:
+            if self.weights is LHEWeightFormat.RWGT:
+                block = (
+                    "<rwgt>\n"
+                    + "".join(
+                        f" <wgt id='{k.replace('%', '%%')}'>%11.4e</wgt>\n" for k in ids
+                    )
+                    + "</rwgt>\n"
+                )
+            else:
+                block = "<weights>\n" + "%11.4e\n" * len(ids) + "</weights>\n"
+            if len(self._weights_blocks) < _WEIGHTS_BLOCKS_CACHE_SIZE:
+                self._weights_blocks[ids] = block
+        return block
+
+    def event(self, event: LHEEvent, weight_ids: tuple[str, ...] | None = None) -> str:
+        """
+        Serialize a single event, see `LHEEvent.tolhe`.
+
+        ``weight_ids`` are the weight IDs declared in the ``<initrwgt>`` block of the output, see `weight_order`.
+        """
+        if self.passthrough and event._raw is not None:
+            raw = event.raw
+            _, _, weights_format, source_ids = event._raw
+            if (
+                raw is not None
+                and weights_format in (None, self.weights)
+                # The values of <weights> blocks belong to the weights declared at their position
+                and (
+                    weights_format is not LHEWeightFormat.WEIGHTS
+                    or source_ids == weight_ids
+                )
+            ):
+                return raw.decode()
+        parts = [
+            _open_xml_tag("event", event.attributes) if event.attributes else "<event>",
+            "\n",
+            self.eventinfo.render(event.eventinfo),
+            "\n",
+            self.particle.render_block(event.particles),
+            "\n",
+        ]
+        if event.optional:
+            parts.append("\n".join(event.optional) + "\n")
+        if event.weights and self.weights is not LHEWeightFormat.NONE:
+            parts.append(self._weights_block(event.weights, weight_ids))
+        if self.scales and event.scales:
+            parts.append(
+                "<scales "
+                + " ".join(f"{k}='{v}'" for k, v in event.scales.items())
+                + "/>\n"
+            )
+        parts.append("</event>")
+        return "".join(parts)
+
+    def events(
+        self, events: Iterable[LHEEvent], weight_ids: tuple[str, ...] | None = None
+    ) -> str:
+        """Serialize a block of events, each followed by a newline, see `event`."""
+        return "".join([self.event(event, weight_ids) + "\n" for event in events])
+
+
+def _weight_ids(header: LHEHeader | None) -> tuple[str, ...] | None:
+    """Return the weight IDs declared in a header in order, None without header."""
+    if header is None:
+        return None
+    return tuple(w.id for w in header.initrwgt.iter_weights())
+
+
+@functools.lru_cache(maxsize=32)
+def _event_serializer(lheformat: LHEXMLFormat) -> _EventSerializer:
+    """Return the event serializer of an `LHEXMLFormat`, compiled on first use."""
+    return _EventSerializer(lheformat)
+
+
 @dataclass(slots=True)
 class LHEEventInfo:
     """
@@ -205,14 +535,7 @@ class LHEEventInfo:
         Returns:
             str: The event info as a string in LHE XML format.
         """
-        return lheformat.eventinfo.format(
-            nparticles=self.nparticles,
-            pid=self.pid,
-            weight=self.weight,
-            scale=self.scale,
-            aqed=self.aqed,
-            aqcd=self.aqcd,
-        )
+        return _event_serializer(lheformat).eventinfo.render(self)
 
     @classmethod
     def fromstring(cls, string: str) -> LHEEventInfo:
@@ -292,21 +615,7 @@ class LHEParticle:
         Returns:
             str: The particle as a string in LHE XML format.
         """
-        return lheformat.particle.format(
-            id=self.id,
-            status=self.status,
-            mother1=self.mother1,
-            mother2=self.mother2,
-            color1=self.color1,
-            color2=self.color2,
-            px=self.px,
-            py=self.py,
-            pz=self.pz,
-            e=self.e,
-            m=self.m,
-            lifetime=self.lifetime,
-            spin=self.spin,
-        )
+        return _event_serializer(lheformat).particle.render(self)
 
 
 def _indent(root: ET.Element, lheformat: LHEXMLFormat = DEFAULT_FORMAT) -> None:
@@ -788,6 +1097,34 @@ class LHEEvent:
     """Optional '#' comments stored in the event"""
     _graph: graphviz.Digraph | None = field(default=None, repr=False, compare=False)
     """Stores the graph representation of the event generated after first access of the property `lheevent.graph`"""
+    _raw: (
+        tuple[bytes, tuple[Any, ...], LHEWeightFormat | None, tuple[str, ...]] | None
+    ) = field(default=None, repr=False, compare=False)
+    """Source ``<event>`` block of an event read with ``keep_raw=True``, the state of the event when it was read,
+    the format of its weights block and the weight IDs declared in the source file"""
+
+    @property
+    def raw(self) -> bytes | None:
+        """
+        The ``<event>`` block as it is in the source file, for events read with ``keep_raw=True``.
+
+        None if the event has been modified since it was read, or if it was not read with ``keep_raw=True``.
+        """
+        if self._raw is None:
+            return None
+        raw, state, _, _ = self._raw
+        return raw if self._state() == state else None
+
+    def _state(self) -> tuple[Any, ...]:
+        """Return the values of the event, for detecting modifications."""
+        return (
+            _EVENTINFO_STATE(self.eventinfo),
+            [_PARTICLE_STATE(p) for p in self.particles],
+            tuple(self.weights.items()),
+            tuple(self.scales.items()),
+            tuple(self.attributes.items()),
+            tuple(self.optional),
+        )
 
     def tolhe(self, lheformat: LHEXMLFormat = DEFAULT_FORMAT) -> str:
         """
@@ -799,47 +1136,7 @@ class LHEEvent:
         Returns:
             str: The event as a string in LHE XML format.
         """
-        sweights = ""
-        sscales = ""
-        match lheformat.version:
-            case LHEVersion.V3:
-                if lheformat.weights is LHEWeightFormat.RWGT and self.weights:
-                    sweights = "<rwgt>\n"
-                    for k, v in self.weights.items():
-                        sweights += f" <wgt id='{k}'>{v:11.4e}</wgt>\n"
-                    sweights += "</rwgt>\n"
-                elif lheformat.weights is LHEWeightFormat.WEIGHTS and self.weights:
-                    sweights = "<weights>\n"
-                    for v in self.weights.values():
-                        sweights += f"{v:11.4e}\n"
-                    sweights += "</weights>\n"
-
-                if self.scales:
-                    sscales = (
-                        "<scales "
-                        + " ".join(f"{k}='{v}'" for k, v in self.scales.items())
-                        + "/>\n"
-                    )
-            case LHEVersion.V1:
-                sweights = ""
-                sscales = ""
-
-        soptional = ""
-        if self.optional:
-            soptional = "\n".join(self.optional) + "\n"
-
-        return (
-            _open_xml_tag("event", self.attributes)
-            + "\n"
-            + self.eventinfo.tolhe(lheformat=lheformat)
-            + "\n"
-            + "\n".join([p.tolhe(lheformat=lheformat) for p in self.particles])
-            + "\n"
-            + soptional
-            + sweights
-            + sscales
-            + "</event>"
-        )
+        return _event_serializer(lheformat).event(self)
 
     @classmethod
     def _fromcontext(
@@ -848,79 +1145,158 @@ class LHEEvent:
         context: Iterator[tuple[str, ET.Element]],
         lheheader: LHEHeader | None = None,
         with_attributes: bool = True,
+        parse_workers: int = 0,
     ) -> Iterator[LHEEvent]:
         index_map = (
             lheheader.initrwgt.index_to_id() if with_attributes and lheheader else {}
         )
-        for event, element in context:
-            if event == "end" and element.tag == "event":
-                if element.text is None:
-                    err = "<event> block has no text."
-                    raise ValueError(err)
+        elements = _event_elements(root, context)
+        if parse_workers:
+            yield from _parse_parallel(
+                elements,
+                functools.partial(
+                    cls._fromelements,
+                    index_map=index_map,
+                    with_attributes=with_attributes,
+                ),
+                parse_workers,
+            )
+            return
+        for element in elements:
+            yield cls._fromelement(element, index_map, with_attributes)
+            # Clear memory
+            element.clear()
 
-                data = element.text.strip().split("\n")
-                eventdata_str, particles_str = data[0], data[1:]
-
-                eventinfo = LHEEventInfo.fromstring(eventdata_str)
-                particles = [
-                    LHEParticle.fromstring(p)
-                    for p in particles_str
-                    if not p.strip().startswith("#")
-                ]
-
-                if with_attributes:
-                    weights = {}
-                    scales = {}
-                    attrib = element.attrib.copy()
-                    optional = [
-                        p.strip() for p in particles_str if p.strip().startswith("#")
-                    ]
-
-                    for sub in element:
-                        if sub.tag == "weights":
-                            if sub.text is None:
-                                err = "<weights> block has no text."
-                                raise ValueError(err)
-                            if not index_map:
-                                err = "<initrwgt> is required to parse <weights> block but not found in the header."
-                                raise ValueError(err)
-                            weight_values = sub.text.split()
-                            if len(weight_values) > len(index_map):
-                                err = (
-                                    f"event <weights> block has {len(weight_values)} entries"
-                                    f" but <initrwgt> declares only {len(index_map)}"
-                                )
-                                raise ValueError(err)
-                            for i, w in enumerate(weight_values):
-                                if index_map[i] not in weights:
-                                    weights[index_map[i]] = float(w)
-                        elif sub.tag == "rwgt":
-                            for r in sub:
-                                if r.tag == "wgt":
-                                    if r.text is None:
-                                        err = "<wgt> block has no text."
-                                        raise ValueError(err)
-                                    weights[r.attrib["id"]] = float(r.text.strip())
-                        elif sub.tag == "scales":
-                            for k, v in sub.attrib.items():
-                                scales[k] = float(v)
+    @classmethod
+    def _fromblocks(
+        cls,
+        blocks: Iterator[bytes],
+        lheheader: LHEHeader | None = None,
+        with_attributes: bool = True,
+        parse_workers: int = 0,
+    ) -> Iterator[LHEEvent]:
+        """Parse raw ``<event>`` blocks, keeping them in the events, see ``keep_raw`` of `LesHouchesEvents.frombuffer`."""
+        index_map = (
+            lheheader.initrwgt.index_to_id() if with_attributes and lheheader else {}
+        )
+        parse = functools.partial(
+            cls._fromraw, index_map=index_map, with_attributes=with_attributes
+        )
+        if parse_workers:
+            yield from _parse_parallel(blocks, parse, parse_workers)
+            return
+        for block in blocks:
+            yield from parse([block])
 
-                    yield LHEEvent(
-                        eventinfo=eventinfo,
-                        particles=particles,
-                        weights=weights,
-                        scales=scales,
-                        attributes=attrib,
-                        optional=optional,
-                    )
-                else:
-                    yield LHEEvent(eventinfo, particles)
+    @classmethod
+    def _fromraw(
+        cls,
+        blocks: list[bytes],
+        index_map: dict[int, str],
+        with_attributes: bool,
+    ) -> list[LHEEvent]:
+        events = []
+        source_ids = tuple(index_map.values())
+        for block in blocks:
+            element = ET.fromstring(block)
+            event = cls._fromelement(element, index_map, with_attributes)
+            weights_format = next(
+                (
+                    LHEWeightFormat(sub.tag)
+                    for sub in element
+                    if sub.tag in ("rwgt", "weights")
+                ),
+                None,
+            )
+            event._raw = (block, event._state(), weights_format, source_ids)
+            events.append(event)
+        return events
 
-                # Clear memory
-                element.clear()
-                root.clear()
-            if element.tag == "LesHouchesEvents" and event == "end":
-                return
+    @classmethod
+    def _fromelements(
+        cls,
+        elements: list[ET.Element],
+        index_map: dict[int, str],
+        with_attributes: bool,
+    ) -> list[LHEEvent]:
+        events = [
+            cls._fromelement(element, index_map, with_attributes)
+            for element in elements
+        ]
+        for element in elements:
+            element.clear()
+        return events
+
+    @classmethod
+    def _fromelement(
+        cls,
+        element: ET.Element,
+        index_map: dict[int, str],
+        with_attributes: bool = True,
+    ) -> LHEEvent:
+        """
+        Parse a single ``<event>`` element.
+
+        Only reads the element and ``index_map``, so it is safe to call concurrently for different elements.
+        """
+        if element.text is None:
+            err = "<event> block has no text."
+            raise ValueError(err)
+
+        data = element.text.strip().split("\n")
+        eventdata_str, particles_str = data[0], data[1:]
+
+        eventinfo = LHEEventInfo.fromstring(eventdata_str)
+        particles = [
+            LHEParticle.fromstring(p)
+            for p in particles_str
+            if not p.strip().startswith("#")
+        ]
+
+        if with_attributes:
+            weights = {}
+            scales = {}
+            attrib = element.attrib.copy()
+            optional = [p.strip() for p in particles_str if p.strip().startswith("#")]
+
+            for sub in element:
+                if sub.tag == "weights":
+                    if sub.text is None:
+                        err = "<weights> block has no text."
+                        raise ValueError(err)
+                    if not index_map:
+                        err = "<initrwgt> is required to parse <weights> block but not found in the header."
+                        raise ValueError(err)
+                    weight_values = sub.text.split()
+                    if len(weight_values) > len(index_map):
+                        err = (
+                            f"event <weights> block has {len(weight_values)} entries"
+                            f" but <initrwgt> declares only {len(index_map)}"
+                        )
+                        raise ValueError(err)
+                    for i, w in enumerate(weight_values):
+                        if index_map[i] not in weights:
+                            weights[index_map[i]] = float(w)
+                elif sub.tag == "rwgt":
+                    for r in sub:
+                        if r.tag == "wgt":
+                            if r.text is None:
+                                err = "<wgt> block has no text."
+                                raise ValueError(err)
+                            weights[r.attrib["id"]] = float(r.text.strip())
+                elif sub.tag == "scales":
+                    for k, v in sub.attrib.items():
+                        scales[k] = float(v)
+
+            return cls(
+                eventinfo=eventinfo,
+                particles=particles,
+                weights=weights,
+                scales=scales,
+                attributes=attrib,
+                optional=optional,
+            )
+        return cls(eventinfo, particles)
 
     @property
     def graph(self) -> graphviz.Digraph:
@@ -947,7 +1323,7 @@ class LHEEvent:
             iid = int(p.id)
             sid = str(iid)
             try:
-                name = _PDGID2LaTeXNameMap[sid]
+                name = _pdgid2latexname(sid)
                 texlbl = f"${name}$"
                 label = f'<<table border="0" cellspacing="0" cellborder="0"><tr><td>{latex_to_html_name(name)}</td></tr></table>>'
             except MatchingIDNotFound:
@@ -993,6 +1369,39 @@ class LHEEvent:
         return self.graph._repr_mimebundle_(include=include, exclude=exclude, **kwargs)
 
 
+_EVENTINFO_STATE = attrgetter(*[f.name for f in fields(LHEEventInfo)])
+_PARTICLE_STATE = attrgetter(*[f.name for f in fields(LHEParticle)])
+
+T = TypeVar("T")
+
+
+def _parse_parallel(
+    items: Iterator[T],
+    parse: Callable[[list[T]], list[LHEEvent]],
+    parse_workers: int,
+    batch_size: int = _PARSE_BATCH_SIZE,
+) -> Iterator[LHEEvent]:
+    """
+    Parse batches of ``<event>`` elements or blocks in a thread pool, yielding the events in file order.
+
+    For elements, the XML tokenization stays in the calling thread; only the conversion of the
+    element texts into events is distributed, which runs in parallel on free-threaded Python.
+    """
+    pending: deque[Future[list[LHEEvent]]] = deque()
+    with ThreadPoolExecutor(parse_workers, thread_name_prefix="pylhe-parse") as pool:
+        try:
+            while batch := list(islice(items, batch_size)):
+                pending.append(pool.submit(parse, batch))
+                # Bound the number of batches held in memory
+                if len(pending) > 2 * parse_workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
 @dataclass(slots=True)
 class LesHouchesEvents:
     """
@@ -1040,21 +1449,34 @@ class LesHouchesEvents:
         Returns:
             TWriteable: The output stream with the LHE file written to it.
 
+        """
+        output_stream.write(self._prologue(lheformat))
+        serializer = _event_serializer(lheformat)
+        weight_ids = _weight_ids(self.header)
+        events = iter(self.events)
+        while block := list(islice(events, _WRITE_BLOCK_SIZE)):
+            output_stream.write(serializer.events(block, weight_ids))
+        output_stream.write(_EPILOGUE)
+        return output_stream
+
+    def _prologue(self, lheformat: LHEXMLFormat, header: str | None = None) -> str:
+        """
+        Return the LHE XML up to and including the init block, i.e. everything before the events.
+
+        A serialized ``header`` replaces the one of the header block.
         """
         write_attributes = self.attributes.copy()
         # Write the LHE file as v3.0, regardless of the version attribute in the LesHouchesEvents object, since pylhe always writes LHE v3.0 files as of now.
         # Later it could be an option in LHEXMLFormat to set the version.
         write_attributes["version"] = lheformat.version.value
-        output_stream.write(_open_xml_tag("LesHouchesEvents", write_attributes) + "\n")
+        prologue = _open_xml_tag("LesHouchesEvents", write_attributes) + "\n"
         if self.comment is not None:
-            output_stream.write(f"<!-- {self.comment} -->\n")
-        if self.header is not None:
-            output_stream.write(self.header.tolhe(lheformat=lheformat) + "\n")
-        output_stream.write(self.init.tolhe(lheformat=lheformat) + "\n")
-        for e in self.events:
-            output_stream.write(e.tolhe(lheformat=lheformat) + "\n")
-        output_stream.write("</LesHouchesEvents>")
-        return output_stream
+            prologue += f"<!-- {self.comment} -->\n"
+        if header is None and self.header is not None:
+            header = _cached_tolhe(self.header, lheformat)
+        if header is not None:
+            prologue += header.rstrip("\n") + "\n"
+        return prologue + _cached_tolhe(self.init, lheformat) + "\n"
 
     def tolhe(self, lheformat: LHEXMLFormat = DEFAULT_FORMAT) -> str:
         """
@@ -1069,7 +1491,9 @@ class LesHouchesEvents:
         self,
         filepath: PathLike,
         lheformat: LHEOutputFormat
-        | None = None,  # default format is None because we do file name suffix detection in _open_write_file
+        | None = None,  # default format is None because we do file name suffix detection in LHEWriter
+        *,
+        background: bool = False,
     ) -> None:
         """
         Write the LHE file as LHE.
@@ -1077,20 +1501,29 @@ class LesHouchesEvents:
         Args:
             filepath (PathLike): Path to the output file.
             lheformat (LHEOutputFormat): How to serialize the event, see the `LHEOutputFormat` class.
+            background (bool): Serialize, compress and write the events in a worker thread of an `LHEWriter`,
+                overlapping with producing the events, e.g. reading them from another file. Default is False.
         """
-        # autodetect default format from suffix if not provided
-        if lheformat is None:
-            lheformat = _parse_lheformat_from_filepath(filepath)
-        if isinstance(lheformat, LHEHDF5Format):
-            with h5py.File(filepath, "w") as f:
-                lheh5.write(self, f, lheformat=lheformat)
-        else:
-            with _open_write_file(filepath, lheformat=lheformat) as f:
-                self.write(f, lheformat=lheformat)
+        with LHEWriter(
+            filepath,
+            self.init,
+            self.header,
+            lheformat,
+            comment=self.comment,
+            attributes=self.attributes,
+            background=background,
+        ) as writer:
+            writer.write_events(self.events)
 
     @classmethod
     def fromstring(
-        cls, string: str, with_attributes: bool = True, generator: bool = True
+        cls,
+        string: str,
+        with_attributes: bool = True,
+        generator: bool = True,
+        storage: EventStorage = "list",
+        max_memory: int | None = None,
+        keep_raw: bool = False,
     ) -> LHEFile:
         """
         Create an LHEFile instance from a string in LHE format.
@@ -1099,15 +1532,33 @@ class LesHouchesEvents:
             string (str): String containing the LHE file content.
             with_attributes (bool): Whether to parse attributes from the LHE file. Default is True.
             generator (bool): Whether to return a generator for events. Default is True.
+            storage (str): How events are materialized if ``generator`` is False, see `LesHouchesEvents.frombuffer`.
+            max_memory (int | None): Memory budget in bytes for materialized events, see `LesHouchesEvents.frombuffer`.
+            keep_raw (bool): Whether to keep the source of each event, see `LesHouchesEvents.frombuffer`. Default is False.
 
         """
         return cls.frombuffer(
-            io.StringIO(string), with_attributes=with_attributes, generator=generator
+            io.BytesIO(string.encode()) if keep_raw else io.StringIO(string),
+            with_attributes=with_attributes,
+            generator=generator,
+            storage=storage,
+            max_memory=max_memory,
+            keep_raw=keep_raw,
         )
 
     @classmethod
     def fromfile(
-        cls, filepath: PathLike, with_attributes: bool = True, generator: bool = True
+        cls,
+        filepath: PathLike,
+        with_attributes: bool = True,
+        generator: bool = True,
+        reiterable: bool = False,
+        storage: EventStorage = "list",
+        max_memory: int | None = None,
+        prefetch: int = 0,
+        parse_workers: int = 0,
+        keep_raw: bool = False,
+        rdcc_nbytes: int | None = None,
     ) -> LHEFile:
         """
         Read an LHE file and return an LHEFile object.
@@ -1116,13 +1567,50 @@ class LesHouchesEvents:
             filepath (PathLike): Path to the LHE file.
             with_attributes (bool): Whether to parse attributes from the LHE file. Default is True.
             generator (bool): Whether to return a generator for events. Default is True.
+            reiterable (bool): Whether to return the events as a file-backed `LHEEventSequence`
+                that can be iterated multiple times. Takes precedence over ``generator``. Default is False.
+            storage (str): How events are materialized if ``generator`` is False, see `LesHouchesEvents.frombuffer`.
+                Not supported with ``reiterable``.
+            max_memory (int | None): Memory budget in bytes for materialized events, see `LesHouchesEvents.frombuffer`.
+                Not supported with ``reiterable``.
+            prefetch (int): Number of event batches to decompress and parse ahead in a background thread,
+                see `LesHouchesEvents.frombuffer`. With ``reiterable``, used in every iteration.
+                Default is 0, i.e. no background thread.
+            parse_workers (int): Number of threads parsing the events, see `LesHouchesEvents.frombuffer`.
+                With ``reiterable``, used in every iteration.
+            keep_raw (bool): Whether to keep the source of each event, see `LesHouchesEvents.frombuffer`. Default is False.
+            rdcc_nbytes (int | None): Size in bytes of the HDF5 chunk cache of each dataset of LHEH5 files.
+                Default is None, i.e. the default of h5py.
 
         """
-        return cls.frombuffer(
-            _extract_fileobj(filepath),
+        if reiterable and (storage != "list" or max_memory is not None):
+            err = "storage and max_memory apply to materialized events and are not supported with reiterable=True."
+            raise ValueError(err)
+        fileobj = _extract_fileobj(filepath, rdcc_nbytes)
+        lhef = cls.frombuffer(
+            fileobj,
             with_attributes=with_attributes,
-            generator=generator,
+            generator=generator or reiterable,
+            storage=storage,
+            max_memory=max_memory,
+            prefetch=0 if reiterable else prefetch,
+            parse_workers=0 if reiterable else parse_workers,
+            keep_raw=keep_raw and not reiterable,
         )
+        if reiterable:
+            # Only the header and init are needed from this pass, the sequence reopens the file on iteration
+            if isinstance(lhef.events, Generator):
+                lhef.events.close()
+            fileobj.close()
+            lhef.events = LHEEventSequence(
+                filepath,
+                with_attributes=with_attributes,
+                keep_raw=keep_raw,
+                rdcc_nbytes=rdcc_nbytes,
+                prefetch=prefetch,
+                parse_workers=parse_workers,
+            )
+        return lhef
 
     @classmethod
     def frombuffer(
@@ -1135,10 +1623,62 @@ class LesHouchesEvents:
         | BinaryIO,
         with_attributes: bool = True,
         generator: bool = True,
+        storage: EventStorage = "list",
+        max_memory: int | None = None,
+        prefetch: int = 0,
+        parse_workers: int = 0,
+        keep_raw: bool = False,
     ) -> LHEFile:
         """
         Read an LHE file and return an LHEFile object.
+
+        Args:
+            fileobject: File object containing LHE XML or LHEH5 data.
+                Binary streams, including non-seekable ones like ``sys.stdin.buffer``,
+                may also contain gzip or zstd compressed XML.
+            with_attributes (bool): Whether to parse attributes from the LHE file. Default is True.
+            generator (bool): Whether to return a generator for events. Default is True.
+            storage (str): How events are materialized if ``generator`` is False.
+                ``"list"`` (default) stores a list of `LHEEvent` instances,
+                ``"columnar"`` stores the events compactly in NumPy arrays as `LHEEventColumns`.
+            max_memory (int | None): Memory budget in bytes for materialized events.
+                Beyond the budget, the event columns are spilled to temporary files and
+                memory-mapped, which implies ``storage="columnar"``. Default is None, i.e. no limit.
+            prefetch (int): Number of event batches to decompress and parse ahead in a background thread.
+                Decompression then overlaps with the work done on the events by the caller.
+                Exceptions raised while parsing are re-raised when the affected event is reached.
+                Default is 0, i.e. the events are parsed on demand in the calling thread.
+            parse_workers (int): Number of threads in a pool converting the XML event blocks into events.
+                The XML tokenization remains sequential, so this only speeds up reading on free-threaded Python.
+                Ignored for LHEH5 files. Default is 0, i.e. no thread pool.
+                With ``keep_raw``, the XML tokenization of the events is distributed as well.
+            keep_raw (bool): Whether to keep the source of each LHE XML event, see `LHEEvent.raw`.
+                Events that are not modified after reading are then written as they are in the source,
+                if the output format matches theirs, see `LHEXMLFormat.passthrough`. This also keeps sub-blocks of the events
+                that pylhe does not parse, such as ``<mgrwt>``, at the cost of keeping the source in memory.
+                Requires a binary stream and ``storage="list"``. Ignored for LHEH5 files. Default is False.
         """
+        if storage not in ("list", "columnar"):
+            err = f"Unknown event storage {storage!r}, expected 'list' or 'columnar'."
+            raise ValueError(err)
+        if prefetch < 0:
+            err = f"prefetch must be non-negative, got {prefetch}."
+            raise ValueError(err)
+        if parse_workers < 0:
+            err = f"parse_workers must be non-negative, got {parse_workers}."
+            raise ValueError(err)
+        if keep_raw and (storage != "list" or max_memory is not None):
+            err = "keep_raw requires storage='list' without max_memory."
+            raise ValueError(err)
+        if keep_raw and isinstance(fileobject, io.TextIOBase):
+            err = "keep_raw requires a binary stream."
+            raise ValueError(err)
+
+        if isinstance(
+            fileobject, (io.BufferedReader, io.BufferedRandom, io.BytesIO, io.FileIO)
+        ):
+            # Binary streams such as pipes may hold compressed or HDF5 data
+            fileobject = _decompress(fileobject)
 
         if isinstance(fileobject, h5py.File):
             init = lheh5.read_init(fileobject)
@@ -1148,9 +1688,13 @@ class LesHouchesEvents:
                     yield from lheh5.read_iter_events(h5)
 
             events = _hdf5_generator()
+            if prefetch:
+                events = _prefetch(events, prefetch)
             return LesHouchesEvents(
                 init=init,
-                events=events if generator else list(events),
+                events=events
+                if generator
+                else _materialize(events, storage, max_memory),
                 version=None,  # We leave the version as None since HDF5 versioning is unrelated to LHE XML versioning.
             )
 
@@ -1158,7 +1702,14 @@ class LesHouchesEvents:
 
             try:
                 with fileobject as fileobj:
-                    context = ET.iterparse(fileobj, events=["start", "end", "comment"])
+                    source: Any = fileobj
+                    if keep_raw:
+                        # Text streams are rejected above
+                        binary: IO[bytes] = fileobj  # type: ignore[assignment]
+                        # Only the header and init are parsed from the stream, the events are read raw
+                        raw_prologue, data = _raw_prologue(binary)
+                        source = io.BytesIO(raw_prologue + _EPILOGUE.encode())
+                    context = ET.iterparse(source, events=["start", "end", "comment"])
                     _, root = next(context)  # Get the root element
 
                     if root.tag != "LesHouchesEvents":
@@ -1205,8 +1756,16 @@ class LesHouchesEvents:
                         ),
                         particles=[],
                     )
+                    if keep_raw:
+                        yield from LHEEvent._fromblocks(
+                            _raw_events(binary, data),
+                            lhef.header,
+                            with_attributes,
+                            parse_workers,
+                        )
+                        return
                     yield from LHEEvent._fromcontext(
-                        root, context, lhef.header, with_attributes
+                        root, context, lhef.header, with_attributes, parse_workers
                     )
 
             except ET.ParseError as excep:
@@ -1233,7 +1792,9 @@ class LesHouchesEvents:
             err = "No or faulty <header>/<init> block found in the LHE file."
             raise ValueError(err) from None
 
-        lhef.events = events if generator else list(events)
+        if prefetch:
+            events = _prefetch(events, prefetch)
+        lhef.events = events if generator else _materialize(events, storage, max_memory)
         return lhef
 
     @staticmethod
@@ -1272,37 +1833,398 @@ class LesHouchesEvents:
 LHEFile = LesHouchesEvents
 
 
+class LHEEventSequence:
+    """
+    Re-iterable, file-backed sequence of events.
+
+    Each iteration reopens the file and streams the events from it, so that
+    multi-pass algorithms (e.g. finding the maximum weight before unweighting)
+    cost one streaming pass each instead of keeping all events in memory.
+    The number of events is counted once and cached.
+    """
+
+    __slots__ = (
+        "_len",
+        "filepath",
+        "keep_raw",
+        "parse_workers",
+        "prefetch",
+        "rdcc_nbytes",
+        "with_attributes",
+    )
+
+    def __init__(
+        self,
+        filepath: PathLike,
+        with_attributes: bool = True,
+        keep_raw: bool = False,
+        rdcc_nbytes: int | None = None,
+        prefetch: int = 0,
+        parse_workers: int = 0,
+    ) -> None:
+        self.filepath = filepath
+        """Path to the LHE file backing the sequence"""
+        self.with_attributes = with_attributes
+        """Whether to parse attributes of the events"""
+        self.keep_raw = keep_raw
+        """Whether to keep the source of the events, see `LHEEvent.raw`"""
+        self.rdcc_nbytes = rdcc_nbytes
+        """Size in bytes of the HDF5 chunk cache of LHEH5 files, see `LesHouchesEvents.fromfile`"""
+        self.prefetch = prefetch
+        """Number of event batches parsed ahead in a background thread, see `LesHouchesEvents.frombuffer`"""
+        self.parse_workers = parse_workers
+        """Number of threads parsing the events, see `LesHouchesEvents.frombuffer`"""
+        self._len: int | None = None
+
+    def __iter__(self) -> Iterator[LHEEvent]:
+        count = 0
+        for event in LesHouchesEvents.fromfile(
+            self.filepath,
+            with_attributes=self.with_attributes,
+            keep_raw=self.keep_raw,
+            rdcc_nbytes=self.rdcc_nbytes,
+            prefetch=self.prefetch,
+            parse_workers=self.parse_workers,
+        ).events:
+            count += 1
+            yield event
+        # A complete pass counts the events for free
+        self._len = count
+
+    def __len__(self) -> int:
+        if self._len is None:
+            count = LesHouchesEvents.count_events(self.filepath)
+            if count < 0:
+                err = f"Could not count the events in {os.fsdecode(os.fspath(self.filepath))!r}."
+                raise ValueError(err)
+            self._len = count
+        return self._len
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.filepath!r}, with_attributes={self.with_attributes!r}, keep_raw={self.keep_raw!r})"
+
+
+def _materialize(
+    events: Iterable[LHEEvent], storage: EventStorage, max_memory: int | None = None
+) -> list[LHEEvent] | LHEEventColumns:
+    """Consume the events into the requested storage, only columns can be spilled to disk."""
+    if storage == "columnar" or max_memory is not None:
+        return LHEEventColumns.fromevents(events, max_memory=max_memory)
+    return list(events)
+
+
+_PREFETCH_BATCH_SIZE = 256
+
+
+def _prefetch(
+    events: Iterator[LHEEvent],
+    depth: int,
+    batch_size: int = _PREFETCH_BATCH_SIZE,
+) -> Iterator[LHEEvent]:
+    """
+    Consume ``events`` in a background thread, at most ``depth`` batches ahead of the caller.
+
+    Exceptions raised by ``events`` are re-raised in the caller after the events preceding them.
+    Closing the returned generator stops the background thread and closes ``events``.
+    """
+    batches: queue.Queue[tuple[list[LHEEvent], BaseException | None, bool]] = (
+        queue.Queue(maxsize=depth)
+    )
+    stop = threading.Event()
+
+    def _put(
+        batch: list[LHEEvent], exc: BaseException | None = None, last: bool = False
+    ) -> bool:
+        # Poll so that the worker notices when the consumer has gone away
+        while not stop.is_set():
+            try:
+                batches.put((batch, exc, last), timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def _worker() -> None:
+        batch: list[LHEEvent] = []
+        error: BaseException | None = None
+        try:
+            for event in events:
+                batch.append(event)
+                if len(batch) >= batch_size:
+                    if not _put(batch):
+                        return
+                    batch = []
+        except BaseException as exc:  # noqa: BLE001  # re-raised in the consuming thread
+            error = exc
+        finally:
+            # The last batch is always queued, so that the consumer never waits forever
+            try:
+                _put(batch, error, last=True)
+            finally:
+                if isinstance(events, Generator):
+                    events.close()
+
+    thread = threading.Thread(target=_worker, name="pylhe-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            batch, exc, last = batches.get()
+            yield from batch
+            if exc is not None:
+                raise exc
+            if last:
+                return
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _event_elements(
+    root: ET.Element, context: Iterator[tuple[str, ET.Element]]
+) -> Iterator[ET.Element]:
+    """
+    Yield the ``<event>`` elements of an iterparse context, detached from the root element.
+    """
+    for event, element in context:
+        if event == "end" and element.tag == "event":
+            # Detach the event so that the tree does not grow while reading
+            root.clear()
+            yield element
+        if element.tag == "LesHouchesEvents" and event == "end":
+            return
+
+
+_RAW_READ_SIZE = 1 << 20
+_RAW_INIT_END = b"</init>"
+_RAW_EVENT_START = b"<event"
+_RAW_EVENT_END = b"</event>"
+_RAW_ROOT_END = b"</LesHouchesEvents"
+
+
+def _raw_prologue(stream: IO[bytes] | gzip.GzipFile) -> tuple[bytes, bytes]:
+    """
+    Read LHE XML up to and including the init block, without parsing it.
+
+    Returns:
+        tuple[bytes, bytes]: The prologue followed by a newline, and the data read after it.
+    """
+    data = b""
+    search = 0
+    while (end := data.find(_RAW_INIT_END, search)) < 0:
+        chunk = stream.read(_RAW_READ_SIZE)
+        if not chunk:
+            err = "No <init> block found in the LHE file."
+            raise ValueError(err)
+        search = max(0, len(data) - len(_RAW_INIT_END) + 1)
+        data += chunk
+    end += len(_RAW_INIT_END)
+    return data[:end] + b"\n", data[end:]
+
+
+def _raw_events(
+    stream: IO[bytes] | gzip.GzipFile, data: bytes = b""
+) -> Iterator[bytes]:
+    """
+    Yield the ``<event>`` blocks of LHE XML as they are in the source, without parsing them.
+
+    Args:
+        stream: Binary stream positioned after the init block.
+        data: Data already read from ``stream``, see `_raw_prologue`.
+    """
+    position = 0
+    while True:
+        start = data.find(_RAW_EVENT_START, position)
+        if data.find(_RAW_ROOT_END, position, start if start >= 0 else len(data)) >= 0:
+            return
+        if start >= 0 and (stop := data.find(_RAW_EVENT_END, start)) >= 0:
+            # Skip other tags that start with "<event"
+            if data[start + len(_RAW_EVENT_START)] in b" \t\r\n>":
+                stop += len(_RAW_EVENT_END)
+                yield data[start:stop]
+                position = stop
+            else:
+                position = start + len(_RAW_EVENT_START)
+            continue
+        chunk = stream.read(_RAW_READ_SIZE)
+        if not chunk:
+            warnings.warn(
+                "Parse Error: the LHE file ends before the closing </LesHouchesEvents> tag.",
+                RuntimeWarning,
+                stacklevel=1,
+            )
+            return
+        data = data[position:] + chunk
+        position = 0
+
+
+def _raw_eventinfo(block: bytes) -> LHEEventInfo:
+    """Parse only the event information line of a raw ``<event>`` block."""
+    text = block[block.index(b">") + 1 :].lstrip()
+    return LHEEventInfo.fromstring(text.split(b"\n", 1)[0].decode())
+
+
+# GZIP magic number per RFC 1952 section 2.3.1
+_GZIP_MAGIC = b"\x1f\x8b"
+# Zstandard frame magic number per RFC 8878 section 3.1.1
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# HDF magic number per The HDF5 Field Guide II.A.
+_HDF5_MAGIC = b"\x89HDF\r\n\x1a\n"
+
+
+class _ChainedStream(io.RawIOBase):
+    """
+    Raw binary stream returning ``prefix`` followed by the data of ``reader``.
+
+    Closing it closes ``reader`` and then ``source``, the stream that ``reader`` decompresses, if any.
+    """
+
+    def __init__(
+        self, reader: IO[bytes], prefix: bytes = b"", source: IO[bytes] | None = None
+    ) -> None:
+        super().__init__()
+        self._reader = reader
+        self._prefix = prefix
+        self._source = source
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        if self._prefix:
+            data, self._prefix = (
+                self._prefix[: len(buffer)],
+                self._prefix[len(buffer) :],
+            )
+        else:
+            data = self._reader.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            try:
+                self._reader.close()
+            finally:
+                if self._source is not None:
+                    self._source.close()
+        super().close()
+
+
+class _ClosingGzipFile(gzip.GzipFile):
+    """`gzip.GzipFile` that also closes the stream it decompresses."""
+
+    def __init__(self, stream: IO[bytes]) -> None:
+        super().__init__(fileobj=stream, mode="rb")
+        self._stream = stream
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._stream.close()
+
+
+def _sniff(stream: IO[bytes]) -> tuple[bytes, IO[bytes]]:
+    """
+    Read the magic bytes at the start of a binary stream without consuming them.
+
+    Seekable streams are rewound, buffered streams are peeked, and for other
+    non-seekable streams such as pipes the magic bytes are replayed by a wrapper stream.
+
+    Returns:
+        tuple[bytes, IO[bytes]]: The magic bytes and the stream to continue reading from.
+    """
+    size = len(_HDF5_MAGIC)
+    if stream.seekable():
+        position = stream.tell()
+        magic = stream.read(size)
+        stream.seek(position)
+        return magic, stream
+    if isinstance(stream, io.BufferedReader):
+        magic = stream.peek(size)[:size]
+        if len(magic) == size:
+            return magic, stream
+    magic = b""
+    while len(magic) < size and (chunk := stream.read(size - len(magic))):
+        magic += chunk
+    return magic, io.BufferedReader(_ChainedStream(stream, prefix=magic))
+
+
+def _zstd_reader(stream: IO[bytes]) -> IO[bytes]:
+    """Decompress a zstd stream with `compression.zstd` (Python 3.14+) or the `zstandard` package."""
+    try:
+        from compression import zstd  # type: ignore[import-not-found,unused-ignore]  # noqa: PLC0415
+    except ImportError:
+        try:
+            import zstandard  # type: ignore[import-not-found,unused-ignore]  # noqa: PLC0415
+        except ImportError:
+            err = "Reading zstd-compressed LHE files requires Python 3.14 or the 'zstandard' package."
+            raise ValueError(err) from None
+        reader: IO[bytes] = zstandard.ZstdDecompressor().stream_reader(
+            stream, read_across_frames=True
+        )
+    else:
+        reader = zstd.ZstdFile(stream)
+    return io.BufferedReader(_ChainedStream(reader, source=stream))
+
+
+def _decompress(
+    stream: IO[bytes],
+) -> IO[bytes] | gzip.GzipFile | h5py.File:
+    """
+    Detect the content of a binary stream from its magic bytes.
+
+    Args:
+        stream: A binary stream, which may be non-seekable such as a pipe or ``sys.stdin.buffer``.
+
+    Returns:
+        IO[bytes] or gzip.GzipFile or h5py.File: A file object containing XML or HDF5 data.
+            Closing it closes ``stream``.
+    """
+    magic, stream = _sniff(stream)
+    if magic.startswith(_GZIP_MAGIC):
+        return _ClosingGzipFile(stream)
+    if magic.startswith(_ZSTD_MAGIC):
+        return _zstd_reader(stream)
+    if magic.startswith(_HDF5_MAGIC):
+        if not stream.seekable():
+            err = (
+                "LHEH5 files cannot be read from a non-seekable stream such as a pipe."
+            )
+            raise ValueError(err)
+        return h5py.File(stream, "r")
+    return stream
+
+
 def _extract_fileobj(
     filepath: PathLike,
-) -> io.BufferedReader | gzip.GzipFile | h5py.File:
+    rdcc_nbytes: int | None = None,
+) -> IO[bytes] | gzip.GzipFile | h5py.File:
     """
-    Checks to see if a file is compressed, and if so, extract it with gzip
-    so that the uncompressed file can be returned.
+    Open a file and detect whether it is compressed or HDF5 from its magic bytes.
+    Compressed files are decompressed on the fly with gzip or zstd.
     It returns a file object containing XML data that will be ingested by
-    ``xml.etree.ElementTree.iterparse``.
+    ``xml.etree.ElementTree.iterparse``, or an `h5py.File`.
+
+    The file is opened only once, so FIFOs and ``/dev/stdin`` are supported as well.
 
     Args:
         filepath: A path-like object or str.
+        rdcc_nbytes: Size in bytes of the HDF5 chunk cache of each dataset, the default of h5py if None.
 
     Returns:
-        _io.BufferedReader or gzip.GzipFile or h5py.File: A file object containing XML or HDF5 data.
+        IO[bytes] or gzip.GzipFile or h5py.File: A file object containing XML or HDF5 data.
     """
-    is_gzip = False
-    is_hdf5 = False
-
-    with open(filepath, "rb") as gzip_file:
-        # GZIP magic number per RFC 1952 section 2.3.1
-        is_gzip = gzip_file.read(2) == b"\x1f\x8b"
-
-    with open(filepath, "rb") as f:
-        # HDF magic number per The HDF5 Field Guide II.A.
-        is_hdf5 = f.read(8) == b"\x89HDF\r\n\x1a\n"
-
-    if is_gzip:
-        return gzip.GzipFile(filepath)
-    if is_hdf5:
-        return h5py.File(filepath, "r")
-    return open(filepath, "rb")
+    stream: IO[bytes] = open(filepath, "rb")
+    try:
+        magic, stream = _sniff(stream)
+        if magic.startswith(_HDF5_MAGIC) and stream.seekable():
+            stream.close()
+            return h5py.File(filepath, "r", rdcc_nbytes=rdcc_nbytes)
+        return _decompress(stream)
+    except BaseException:
+        stream.close()
+        raise
 
 
 def _parse_lheformat_from_filepath(
@@ -1324,16 +2246,3 @@ def _parse_lheformat_from_filepath(
     if filepath_str.endswith((".gz", ".gzip")):
         return GZ_FORMAT
     return DEFAULT_FORMAT
-
-
-def _open_write_file(filepath: PathLike, lheformat: LHEXMLFormat) -> TextIO:
-    """
-    Open a file for writing, determining the format based on the file extension or provided LHEXMLFormat.
-
-    Args:
-        filepath: A path-like object or str.
-        lheformat: The LHEXMLFormat to use for writing.
-    """
-    if lheformat.compress:
-        return gzip.open(filepath, "wt")
-    return open(filepath, "w")
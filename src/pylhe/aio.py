@@ -0,0 +1,229 @@
+"""
+`asyncio <https://docs.python.org/3/library/asyncio.html>`_ interface for `pylhe`.
+
+The file I/O, decompression and parsing run in an executor so that iterating
+over the events does not block the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Executor, ThreadPoolExecutor
+from types import TracebackType
+from typing import TYPE_CHECKING
+
+import pylhe
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+__all__ = ["AsyncLHEFile", "open"]
+
+
+def __dir__() -> list[str]:
+    return __all__
+
+
+_DEFAULT_BATCH_SIZE = 256
+
+
+def open(
+    filepath: pylhe.PathLike,
+    *,
+    with_attributes: bool = True,
+    readahead: int = 2,
+    batch_size: int = _DEFAULT_BATCH_SIZE,
+    executor: Executor | None = None,
+) -> AsyncLHEFile:
+    """
+    Open an LHE file for asynchronous reading.
+
+    No I/O happens until the file is entered with ``async with`` or the events are requested.
+
+    Args:
+        filepath (PathLike): Path to the LHE file.
+        with_attributes (bool): Whether to parse attributes and optional data. Default is True.
+        readahead (int): Number of event batches to decompress and parse ahead of the consumer,
+            see the ``prefetch`` argument of `pylhe.LesHouchesEvents.frombuffer`. Default is 2.
+        batch_size (int): Number of events transferred from the executor per step of `AsyncLHEFile.aevents`.
+        executor (Executor | None): Executor to run the blocking work in.
+            By default, a dedicated single-thread executor is created and shut down on close.
+
+    Returns:
+        AsyncLHEFile: The file, to be used as an asynchronous context manager.
+    """
+    return AsyncLHEFile(
+        filepath,
+        with_attributes=with_attributes,
+        readahead=readahead,
+        batch_size=batch_size,
+        executor=executor,
+    )
+
+
+class AsyncLHEFile:
+    """
+    Asynchronous reader of an LHE file, see `pylhe.aio.open`.
+
+    Cancelling a task awaiting `abatch` or `aevents` does not lose any events:
+    the events read in the background are returned by the next call.
+    """
+
+    __slots__ = (
+        "_buffer",
+        "_events",
+        "_executor",
+        "_exhausted",
+        "_lhefile",
+        "_lock",
+        "_opening",
+        "_own_executor",
+        "_pending",
+        "batch_size",
+        "filepath",
+        "readahead",
+        "with_attributes",
+    )
+
+    def __init__(
+        self,
+        filepath: pylhe.PathLike,
+        *,
+        with_attributes: bool = True,
+        readahead: int = 2,
+        batch_size: int = _DEFAULT_BATCH_SIZE,
+        executor: Executor | None = None,
+    ) -> None:
+        if readahead < 0:
+            err = f"readahead must be non-negative, got {readahead}."
+            raise ValueError(err)
+        if batch_size < 1:
+            err = f"batch_size must be positive, got {batch_size}."
+            raise ValueError(err)
+        self.filepath = filepath
+        self.with_attributes = with_attributes
+        self.readahead = readahead
+        self.batch_size = batch_size
+        self._own_executor = executor is None
+        self._executor: Executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="pylhe-aio"
+        )
+        self._lhefile: pylhe.LHEFile | None = None
+        self._opening: asyncio.Future[pylhe.LHEFile] | None = None
+        self._events: Iterator[pylhe.LHEEvent] | None = None
+        self._buffer: list[pylhe.LHEEvent] = []
+        self._exhausted = False
+        self._pending: asyncio.Future[tuple[list[pylhe.LHEEvent], bool]] | None = None
+        self._lock = asyncio.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.filepath!r})"
+
+    @property
+    def lhefile(self) -> pylhe.LHEFile:
+        """The `pylhe.LHEFile` with the header and init block, available once opened."""
+        if self._lhefile is None:
+            err = f"{self!r} has not been opened, use 'async with' or 'await aopen()'."
+            raise RuntimeError(err)
+        return self._lhefile
+
+    async def aopen(self) -> None:
+        """Read the header and init block of the file in the executor."""
+        async with self._lock:
+            if self._lhefile is None:
+                if self._opening is None:
+                    self._opening = asyncio.wrap_future(
+                        self._executor.submit(self._open),
+                        loop=asyncio.get_running_loop(),
+                    )
+                self._lhefile = await asyncio.shield(self._opening)
+                self._events = iter(self._lhefile.events)
+
+    def _open(self) -> pylhe.LHEFile:
+        return pylhe.LesHouchesEvents.fromfile(
+            self.filepath,
+            with_attributes=self.with_attributes,
+            prefetch=self.readahead,
+        )
+
+    def _read(self, n: int) -> tuple[list[pylhe.LHEEvent], bool]:
+        assert self._events is not None
+        chunk = list(itertools.islice(self._events, n))
+        return chunk, len(chunk) < n
+
+    async def abatch(self, n: int) -> list[pylhe.LHEEvent]:
+        """
+        Read the next events.
+
+        Args:
+            n (int): Maximum number of events to read.
+
+        Returns:
+            list[LHEEvent]: The next ``n`` events, fewer at the end of the file.
+        """
+        if n < 0:
+            err = f"n must be non-negative, got {n}."
+            raise ValueError(err)
+        await self.aopen()
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while len(self._buffer) < n and not self._exhausted:
+                if self._pending is None:
+                    self._pending = asyncio.wrap_future(
+                        self._executor.submit(self._read, n - len(self._buffer)),
+                        loop=loop,
+                    )
+                # Shielded so that a cancelled caller leaves the chunk for the next call
+                chunk, self._exhausted = await asyncio.shield(self._pending)
+                self._pending = None
+                self._buffer.extend(chunk)
+            batch, self._buffer = self._buffer[:n], self._buffer[n:]
+        return batch
+
+    async def aevents(self) -> AsyncIterator[pylhe.LHEEvent]:
+        """
+        Iterate asynchronously over the events.
+
+        Yields:
+            LHEEvent: The events in the file.
+        """
+        while batch := await self.abatch(self.batch_size):
+            for event in batch:
+                yield event
+
+    async def aclose(self) -> None:
+        """Stop reading, close the file and shut down the executor if it was created here."""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            if self._lhefile is None and self._opening is not None:
+                # Opening was cancelled, close the file once it is open
+                lhefile = (await asyncio.gather(self._opening, return_exceptions=True))[
+                    0
+                ]
+                if isinstance(lhefile, pylhe.LHEFile):
+                    self._events = iter(lhefile.events)
+            if self._pending is not None:
+                await asyncio.gather(self._pending, return_exceptions=True)
+                self._pending = None
+            events, self._events = self._events, None
+            close = getattr(events, "close", None)
+            if close is not None:
+                await loop.run_in_executor(self._executor, close)
+            self._buffer = []
+            self._exhausted = True
+            if self._own_executor:
+                self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> Self:
+        await self.aopen()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.aclose()
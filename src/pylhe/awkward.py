@@ -4,14 +4,17 @@
 
 from __future__ import annotations
 
-from collections.abc import Iterable
+from collections.abc import Iterable, Mapping
+from typing import IO, Any
 
 import awkward as ak  # type: ignore[import-untyped]
+import numpy as np
+import numpy.typing as npt
 import vector
 
 import pylhe
 
-__all__ = ["to_awkward"]
+__all__ = ["from_awkward", "to_awkward", "tofile"]
 
 
 def __dir__() -> list[str]:
@@ -35,6 +38,19 @@ def to_awkward(event_iterable: Iterable[pylhe.LHEEvent] | pylhe.LHEFile) -> ak.A
     if isinstance(event_iterable, pylhe.LHEFile):
         event_iterable = event_iterable.events
 
+    if (
+        isinstance(event_iterable, pylhe.LHEEventColumns)
+        and len(event_iterable) > 0
+        and event_iterable.weights.regular
+    ):
+        # Columnar events can be wrapped directly if the weights are regular
+        return _from_columns(
+            event_iterable.eventinfo,
+            event_iterable.particles,
+            event_iterable.offsets,
+            weights=event_iterable.weights.columns,
+        )
+
     builder = ak.ArrayBuilder()
     for event in event_iterable:
         with builder.record(name="Event"):
@@ -74,6 +90,178 @@ def to_awkward(event_iterable: Iterable[pylhe.LHEEvent] | pylhe.LHEFile) -> ak.A
     return builder.snapshot()  # build the final awkward array
 
 
+def from_awkward(array: ak.Array) -> pylhe.LHEEventColumns:
+    """Convert an Awkward array with the `to_awkward` layout to columns of events.
+
+    The columns are extracted with vectorized Awkward operations, without creating
+    `LHEEvent` instances, so that selections done in Awkward can be written back
+    to LHE XML or LHEH5 with `tofile`, `pylhe.write_columns` or `pylhe.LHEWriter`.
+    The ``nparticles`` of the events are taken from the number of particles,
+    which can differ from the original value after a selection of particles.
+    Weights missing in some events, i.e. with an option type, are kept missing.
+
+    Args:
+        array (awkward.Array): Array of ``Event`` records, as returned by `to_awkward`.
+
+    Returns:
+        LHEEventColumns: The events as columns.
+    """
+    if len(array) == 0:
+        return pylhe.LHEEventColumns(
+            {f: np.empty(0, pylhe.columnar._dtype(f)) for f in _EVENTINFO_FIELDS},
+            {
+                f: np.empty(0, pylhe.columnar._dtype(f))
+                for f in pylhe.columnar.PARTICLE_FIELDS
+            },
+            np.zeros(1, dtype=np.int64),
+        )
+    missing = [f for f in ("eventinfo", "particles") if f not in array.fields]
+    if missing:
+        err = f"Expected an array of Event records as returned by to_awkward, missing the fields {missing}."
+        raise ValueError(err)
+    counts = _to_numpy(ak.num(array["particles"], axis=1), np.int64)
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    eventinfo = {
+        f: _to_numpy(array["eventinfo", f], pylhe.columnar._dtype(f))
+        for f in _EVENTINFO_FIELDS
+        if f != "nparticles"
+    }
+    eventinfo["nparticles"] = counts
+    particles = {
+        f: _to_numpy(
+            ak.flatten(
+                array["particles", "vector", f]
+                if f in _MOMENTUM_FIELDS
+                else array["particles", f],
+                axis=1,
+            ),
+            pylhe.columnar._dtype(f),
+        )
+        for f in pylhe.columnar.PARTICLE_FIELDS
+    }
+    weights: dict[str, npt.NDArray[np.float64]] = {}
+    present: dict[str, npt.NDArray[np.bool_]] = {}
+    if "weights" in array.fields:
+        for key in array["weights"].fields:
+            column = array["weights", key]
+            present[key] = ~_to_numpy(ak.is_none(column), np.bool_)
+            weights[key] = _to_numpy(ak.fill_none(column, np.nan), np.float64)
+    return pylhe.LHEEventColumns(
+        eventinfo={f: eventinfo[f] for f in _EVENTINFO_FIELDS},
+        particles=particles,
+        offsets=offsets,
+        weights=pylhe.columnar._KeyedColumns(weights, present),
+    )
+
+
+def tofile(
+    array: ak.Array,
+    filepath: pylhe.PathLike | IO[str] | IO[bytes],
+    init: pylhe.LHEInit,
+    header: pylhe.LHEHeader | str | None = None,
+    lheformat: pylhe.LHEOutputFormat | None = None,
+) -> None:
+    """Write an Awkward array with the `to_awkward` layout to an LHE XML or LHEH5 file.
+
+    The events are converted with `from_awkward` and written from the columns
+    by `pylhe.LHEWriter`, see `pylhe.write_columns`.
+
+    Args:
+        array (awkward.Array): Array of ``Event`` records, as returned by `to_awkward`.
+        filepath: Path of the output file, or a text or binary stream, see `pylhe.LHEWriter`.
+        init (LHEInit): Init block of the file.
+        header (LHEHeader | str | None): Header block of the file, or the serialized header block.
+        lheformat (LHEOutputFormat | None): How to serialize the events, see the `LHEOutputFormat` class.
+            Default is detected from the file name suffix for paths and `DEFAULT_FORMAT` for streams.
+    """
+    with pylhe.LHEWriter(filepath, init, header, lheformat) as writer:
+        writer.write_events(from_awkward(array))
+
+
+def _to_numpy(array: ak.Array, dtype: type[np.generic]) -> npt.NDArray[Any]:
+    return np.asarray(ak.to_numpy(array), dtype=dtype)
+
+
+_MOMENTUM_FIELDS = ("px", "py", "pz", "e")
+_PARTICLE_FIELDS = (
+    "id",
+    "status",
+    "mother1",
+    "mother2",
+    "color1",
+    "color2",
+    "m",
+    "lifetime",
+    "spin",
+)
+_EVENTINFO_FIELDS = ("nparticles", "pid", "weight", "scale", "aqed", "aqcd")
+
+
+def _record(
+    columns: Mapping[str, npt.NDArray[Any]],
+    fields: Iterable[str],
+    name: str,
+    length: int,
+) -> ak.contents.RecordArray:
+    present = [f for f in fields if f in columns]
+    return ak.contents.RecordArray(
+        [ak.contents.NumpyArray(np.ascontiguousarray(columns[f])) for f in present],
+        present,
+        length=length,
+        parameters={"__record__": name},
+    )
+
+
+def _from_columns(
+    eventinfo: Mapping[str, npt.NDArray[Any]],
+    particles: Mapping[str, npt.NDArray[Any]],
+    offsets: npt.NDArray[np.int64],
+    weights: Mapping[str, npt.NDArray[np.float64]] | None = None,
+) -> ak.Array:
+    """
+    Build the `to_awkward` layout directly from column arrays.
+
+    Columns missing from ``eventinfo`` or ``particles`` are left out of the records,
+    except for the momentum components, which are only available together.
+    """
+    momentum_fields = [f for f in _MOMENTUM_FIELDS if f in particles]
+    if momentum_fields and len(momentum_fields) < len(_MOMENTUM_FIELDS):
+        err = f"The momentum requires all of the particle columns {list(_MOMENTUM_FIELDS)}, got only {momentum_fields}."
+        raise ValueError(err)
+    nevents = len(offsets) - 1
+    # Without particle columns, the records of the particles have no fields
+    nparticles = len(next(iter(particles.values()))) if particles else int(offsets[-1])
+    particle = _record(particles, _PARTICLE_FIELDS, "Particle", nparticles)
+    if momentum_fields:
+        momentum = _record(particles, _MOMENTUM_FIELDS, "Momentum4D", nparticles)
+        particle = ak.contents.RecordArray(
+            [momentum, *particle.contents],
+            ["vector", *particle.fields],
+            length=nparticles,
+            parameters=particle.parameters,
+        )
+    event_contents = [_record(eventinfo, _EVENTINFO_FIELDS, "EventInfo", nevents)]
+    event_fields = ["eventinfo"]
+    if weights:
+        event_contents.append(_record(weights, weights.keys(), "Weights", nevents))
+        event_fields.append("weights")
+    event_contents.append(
+        ak.contents.ListOffsetArray(
+            ak.index.Index64(np.asarray(offsets, dtype=np.int64)), particle
+        )
+    )
+    event_fields.append("particles")
+    return ak.Array(
+        ak.contents.RecordArray(
+            event_contents,
+            event_fields,
+            length=nevents,
+            parameters={"__record__": "Event"},
+        )
+    )
+
+
 # Used to register Awkward behaviors
 class Particle:
     pass
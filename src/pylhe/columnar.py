@@ -0,0 +1,540 @@
+"""
+Columnar in-memory storage of LHE events backed by NumPy arrays.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from collections.abc import Iterable, Iterator, Sequence
+from typing import IO, Any, overload
+
+import numpy as np
+import numpy.typing as npt
+
+import pylhe
+
+__all__ = ["LHEEventColumns"]
+
+
+def __dir__() -> list[str]:
+    return __all__
+
+
+EVENTINFO_FIELDS = ("nparticles", "pid", "weight", "scale", "aqed", "aqcd")
+"""Names of the `LHEEventInfo` columns, in dataclass order"""
+PARTICLE_FIELDS = (
+    "id",
+    "status",
+    "mother1",
+    "mother2",
+    "color1",
+    "color2",
+    "px",
+    "py",
+    "pz",
+    "e",
+    "m",
+    "lifetime",
+    "spin",
+)
+"""Names of the `LHEParticle` columns, in dataclass order"""
+_INT_FIELDS = frozenset(
+    ("nparticles", "pid", "id", "status", "mother1", "mother2", "color1", "color2")
+)
+
+# Number of events converted to NumPy arrays at once while building or iterating
+_BATCH_SIZE = 4096
+
+
+def _dtype(name: str) -> type[np.int64 | np.float64]:
+    return np.int64 if name in _INT_FIELDS else np.float64
+
+
+class _KeyedColumns:
+    """
+    Per-event ``dict[str, float]`` values (weights, scales) stored as one column per key.
+
+    Keys missing from some events get a boolean presence column, keys present
+    in every event do not.
+    """
+
+    __slots__ = ("columns", "present")
+
+    def __init__(
+        self,
+        columns: dict[str, npt.NDArray[np.float64]],
+        present: dict[str, npt.NDArray[np.bool_]] | None = None,
+    ) -> None:
+        self.columns = columns
+        self.present = {k: v for k, v in (present or {}).items() if not v.all()}
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        return tuple(self.columns)
+
+    @property
+    def regular(self) -> bool:
+        """Whether every event provides every key."""
+        return not self.present
+
+    @property
+    def nbytes(self) -> int:
+        return int(
+            sum(v.nbytes for v in self.columns.values())
+            + sum(v.nbytes for v in self.present.values())
+        )
+
+    def rows(self, start: int, stop: int) -> Iterator[dict[str, float]]:
+        if not self.columns:
+            yield from ({} for _ in range(start, stop))
+            return
+        keys = self.keys
+        values = zip(
+            *(v[start:stop].tolist() for v in self.columns.values()), strict=True
+        )
+        if self.regular:
+            for row in values:
+                yield dict(zip(keys, row, strict=True))
+            return
+        present = zip(
+            *(
+                self.present[k][start:stop].tolist()
+                if k in self.present
+                else [True] * (stop - start)
+                for k in keys
+            ),
+            strict=True,
+        )
+        for row, mask in zip(values, present, strict=True):
+            yield {k: v for k, v, p in zip(keys, row, mask, strict=True) if p}
+
+    def take(self, indices: npt.NDArray[np.int64]) -> _KeyedColumns:
+        return _KeyedColumns(
+            {k: v[indices] for k, v in self.columns.items()},
+            {k: v[indices] for k, v in self.present.items()},
+        )
+
+
+class _ColumnStore:
+    """
+    A 1D column accumulated in chunks, optionally spilled to a raw file on disk.
+
+    Spilled chunks are buffered in memory until `flush`, which opens the file only
+    while appending to it, so that many spilled columns do not exhaust file descriptors.
+    The file is finally moved into the single file of all columns with `move_to`.
+    """
+
+    __slots__ = ("_chunks", "_path", "dtype", "length")
+
+    def __init__(self, dtype: type[np.generic]) -> None:
+        self.dtype = dtype
+        self.length = 0
+        self._chunks: list[npt.NDArray[Any]] = []
+        self._path: str | None = None
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes of the chunks still held in memory."""
+        return sum(c.nbytes for c in self._chunks)
+
+    def append(self, chunk: npt.NDArray[Any]) -> None:
+        self.length += len(chunk)
+        self._chunks.append(chunk)
+
+    def fill(self, value: Any, count: int) -> None:
+        """Append ``count`` copies of ``value``."""
+        for start in range(0, count, _BATCH_SIZE * 16):
+            self.append(
+                np.full(min(_BATCH_SIZE * 16, count - start), value, dtype=self.dtype)
+            )
+
+    def spill(self, path: str) -> None:
+        """Move the in-memory chunks to ``path``, all further chunks are moved there by `flush`."""
+        self._path = path
+        open(path, "wb").close()
+        self.flush()
+
+    def flush(self) -> None:
+        """Append the in-memory chunks to the file of a spilled column."""
+        if self._path is None or not self._chunks:
+            return
+        with open(self._path, "ab") as f:
+            for chunk in self._chunks:
+                chunk.tofile(f)
+        self._chunks.clear()
+
+    def move_to(self, f: IO[bytes]) -> None:
+        """Append the column of a spilled store to ``f`` and remove its own file."""
+        assert self._path is not None
+        self.flush()
+        with open(self._path, "rb") as source:
+            shutil.copyfileobj(source, f)
+        os.remove(self._path)
+
+    def finish(self) -> npt.NDArray[Any]:
+        """Return the column of a store that has not been spilled."""
+        if not self._chunks:
+            return np.empty(0, dtype=self.dtype)
+        return np.concatenate(self._chunks)
+
+
+class LHEEventColumns(Sequence["pylhe.LHEEvent"]):
+    """
+    Sequence of events stored in NumPy column buffers.
+
+    Event information and particles are kept in one array per field, with the
+    particles of event ``i`` located at ``offsets[i]:offsets[i + 1]``.
+    Weights and scales are stored with one column per key.
+    Indexing and iteration return freshly built `LHEEvent` instances, so
+    modifying a returned event does not change the stored columns.
+    """
+
+    __slots__ = (
+        "_spill_dir",
+        "attributes",
+        "eventinfo",
+        "offsets",
+        "optional",
+        "particles",
+        "scales",
+        "weights",
+    )
+
+    def __init__(
+        self,
+        eventinfo: dict[str, npt.NDArray[Any]],
+        particles: dict[str, npt.NDArray[Any]],
+        offsets: npt.NDArray[np.int64],
+        weights: _KeyedColumns | None = None,
+        scales: _KeyedColumns | None = None,
+        attributes: dict[int, dict[str, str]] | None = None,
+        optional: dict[int, list[str]] | None = None,
+    ) -> None:
+        self.eventinfo = eventinfo
+        """Event information columns keyed by `LHEEventInfo` field name"""
+        self.particles = particles
+        """Flat particle columns keyed by `LHEParticle` field name"""
+        self.offsets = offsets
+        """Particle offsets, the particles of event ``i`` are ``offsets[i]:offsets[i + 1]``"""
+        self.weights = weights if weights is not None else _KeyedColumns({})
+        """Event weights, one column per weight ID"""
+        self.scales = scales if scales is not None else _KeyedColumns({})
+        """Event scales, one column per scale name"""
+        self.attributes = attributes if attributes is not None else {}
+        """Non-empty event attributes keyed by event index"""
+        self.optional = optional if optional is not None else {}
+        """Non-empty optional '#' comments keyed by event index"""
+        self._spill_dir: tempfile.TemporaryDirectory[str] | None = None
+
+    @property
+    def spilled(self) -> bool:
+        """Whether the columns are memory-mapped from temporary files on disk."""
+        return self._spill_dir is not None
+
+    @classmethod
+    def fromevents(
+        cls, events: Iterable[pylhe.LHEEvent], max_memory: int | None = None
+    ) -> LHEEventColumns:
+        """
+        Build the columns by consuming an iterable of `LHEEvent` instances.
+
+        Args:
+            events: Events to store.
+            max_memory: Memory budget in bytes for the column buffers.
+                Once exceeded, the columns are spilled to temporary files and memory-mapped.
+                Default is None, i.e. no limit.
+        """
+        builder = _LHEEventColumnsBuilder(max_memory=max_memory)
+        for event in events:
+            builder.append(event)
+        return builder.finish()
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes held by the NumPy column buffers."""
+        return int(
+            sum(a.nbytes for a in self.eventinfo.values())
+            + sum(a.nbytes for a in self.particles.values())
+            + self.offsets.nbytes
+            + self.weights.nbytes
+            + self.scales.nbytes
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> pylhe.LHEEvent: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> LHEEventColumns: ...
+
+    def __getitem__(self, index: int | slice) -> pylhe.LHEEvent | LHEEventColumns:
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            err = f"event index {index} out of range for {n} events"
+            raise IndexError(err)
+        return next(self._iter_range(index, index + 1))
+
+    def __iter__(self) -> Iterator[pylhe.LHEEvent]:
+        n = len(self)
+        for start in range(0, n, _BATCH_SIZE):
+            yield from self._iter_range(start, min(start + _BATCH_SIZE, n))
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} with {len(self)} events>"
+
+    def _iter_range(self, start: int, stop: int) -> Iterator[pylhe.LHEEvent]:
+        """Build the `LHEEvent` instances of the events ``start:stop``."""
+        offsets = self.offsets[start : stop + 1].tolist()
+        pstart, pstop = offsets[0], offsets[-1]
+        eventinfo_rows = zip(
+            *(self.eventinfo[name][start:stop].tolist() for name in EVENTINFO_FIELDS),
+            strict=True,
+        )
+        particle_rows = list(
+            zip(
+                *(
+                    self.particles[name][pstart:pstop].tolist()
+                    for name in PARTICLE_FIELDS
+                ),
+                strict=True,
+            )
+        )
+        weights = self.weights.rows(start, stop)
+        scales = self.scales.rows(start, stop)
+        for i, info in enumerate(eventinfo_rows):
+            index = start + i
+            yield pylhe.LHEEvent(
+                eventinfo=pylhe.LHEEventInfo(*info),
+                particles=[
+                    pylhe.LHEParticle(*row)
+                    for row in particle_rows[
+                        offsets[i] - pstart : offsets[i + 1] - pstart
+                    ]
+                ],
+                weights=next(weights),
+                scales=next(scales),
+                attributes=dict(self.attributes.get(index, {})),
+                optional=list(self.optional.get(index, [])),
+            )
+
+    def take(
+        self, indices: Sequence[int] | npt.NDArray[np.integer[Any]]
+    ) -> LHEEventColumns:
+        """Return a new `LHEEventColumns` with the events at ``indices``, in that order."""
+        idx = np.asarray(indices, dtype=np.int64)
+        n = len(self)
+        idx = np.where(idx < 0, idx + n, idx)
+        if idx.size and (idx.min() < 0 or idx.max() >= n):
+            err = f"event indices out of range for {n} events"
+            raise IndexError(err)
+        starts = self.offsets[:-1][idx]
+        counts = self.offsets[1:][idx] - starts
+        offsets = np.zeros(len(idx) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        particle_idx = np.repeat(starts - offsets[:-1], counts) + np.arange(
+            offsets[-1], dtype=np.int64
+        )
+        return LHEEventColumns(
+            eventinfo={k: v[idx] for k, v in self.eventinfo.items()},
+            particles={k: v[particle_idx] for k, v in self.particles.items()},
+            offsets=offsets,
+            weights=self.weights.take(idx),
+            scales=self.scales.take(idx),
+            attributes={
+                new: self.attributes[old]
+                for new, old in enumerate(idx.tolist())
+                if old in self.attributes
+            },
+            optional={
+                new: self.optional[old]
+                for new, old in enumerate(idx.tolist())
+                if old in self.optional
+            },
+        )
+
+
+class _LHEEventColumnsBuilder:
+    """
+    Accumulate `LHEEvent` instances into `LHEEventColumns`, one batch of arrays at a time.
+
+    If ``max_memory`` (in bytes) is given and the column buffers outgrow it,
+    all columns are moved to raw files in a temporary directory and memory-mapped
+    when the builder finishes. Further batches are appended to the files whenever
+    the buffers outgrow ``max_memory`` again.
+    """
+
+    def __init__(
+        self, batch_size: int = _BATCH_SIZE, max_memory: int | None = None
+    ) -> None:
+        self.batch_size = batch_size
+        self.max_memory = max_memory
+        self._spill_dir: tempfile.TemporaryDirectory[str] | None = None
+        self._stores: list[_ColumnStore] = []
+        self._nevents = 0
+        self._nflushed = 0
+        self._eventinfo_rows: list[tuple[Any, ...]] = []
+        self._particle_rows: list[tuple[Any, ...]] = []
+        self._counts: list[int] = []
+        self._eventinfo = {name: self._store(_dtype(name)) for name in EVENTINFO_FIELDS}
+        self._particles = {name: self._store(_dtype(name)) for name in PARTICLE_FIELDS}
+        self._count_store = self._store(np.int64)
+        self._weight_rows: list[dict[str, float]] = []
+        self._weights: dict[str, tuple[_ColumnStore, _ColumnStore]] = {}
+        self._scale_rows: list[dict[str, float]] = []
+        self._scales: dict[str, tuple[_ColumnStore, _ColumnStore]] = {}
+        self._attributes: dict[int, dict[str, str]] = {}
+        self._optional: dict[int, list[str]] = {}
+
+    def _store(self, dtype: type[np.generic]) -> _ColumnStore:
+        store = _ColumnStore(dtype)
+        if self._spill_dir is not None:
+            store.spill(os.path.join(self._spill_dir.name, f"{len(self._stores)}.bin"))
+        self._stores.append(store)
+        return store
+
+    def _spill(self) -> None:
+        self._spill_dir = tempfile.TemporaryDirectory(
+            prefix="pylhe-", ignore_cleanup_errors=True
+        )
+        for i, store in enumerate(self._stores):
+            store.spill(os.path.join(self._spill_dir.name, f"{i}.bin"))
+
+    def append(self, event: pylhe.LHEEvent) -> None:
+        ei = event.eventinfo
+        self._eventinfo_rows.append(
+            (ei.nparticles, ei.pid, ei.weight, ei.scale, ei.aqed, ei.aqcd)
+        )
+        self._particle_rows.extend(
+            (
+                p.id,
+                p.status,
+                p.mother1,
+                p.mother2,
+                p.color1,
+                p.color2,
+                p.px,
+                p.py,
+                p.pz,
+                p.e,
+                p.m,
+                p.lifetime,
+                p.spin,
+            )
+            for p in event.particles
+        )
+        self._counts.append(len(event.particles))
+        self._weight_rows.append(event.weights)
+        self._scale_rows.append(event.scales)
+        if event.attributes:
+            self._attributes[self._nevents] = dict(event.attributes)
+        if event.optional:
+            self._optional[self._nevents] = list(event.optional)
+        self._nevents += 1
+        if len(self._counts) >= self.batch_size:
+            self._flush()
+
+    def _flush_keyed(
+        self,
+        rows: list[dict[str, float]],
+        stores: dict[str, tuple[_ColumnStore, _ColumnStore]],
+    ) -> None:
+        for row in rows:
+            for key in row:
+                if key not in stores:
+                    values, present = self._store(np.float64), self._store(np.bool_)
+                    # Events before the first occurrence of the key lack it
+                    values.fill(np.nan, self._nflushed)
+                    present.fill(False, self._nflushed)
+                    stores[key] = (values, present)
+        for key, (values, present) in stores.items():
+            values.append(
+                np.array([row.get(key, np.nan) for row in rows], dtype=np.float64)
+            )
+            present.append(np.array([key in row for row in rows], dtype=np.bool_))
+        rows.clear()
+
+    def _flush(self) -> None:
+        if not self._counts:
+            return
+        for name, column in zip(
+            EVENTINFO_FIELDS, zip(*self._eventinfo_rows, strict=True), strict=True
+        ):
+            self._eventinfo[name].append(np.array(column, dtype=_dtype(name)))
+        if self._particle_rows:
+            for name, column in zip(
+                PARTICLE_FIELDS, zip(*self._particle_rows, strict=True), strict=True
+            ):
+                self._particles[name].append(np.array(column, dtype=_dtype(name)))
+        self._count_store.append(np.array(self._counts, dtype=np.int64))
+        self._flush_keyed(self._weight_rows, self._weights)
+        self._flush_keyed(self._scale_rows, self._scales)
+        self._nflushed += len(self._counts)
+        self._eventinfo_rows.clear()
+        self._particle_rows.clear()
+        self._counts.clear()
+        if (
+            self.max_memory is not None
+            and sum(store.nbytes for store in self._stores) > self.max_memory
+        ):
+            if self._spill_dir is None:
+                self._spill()
+            else:
+                for store in self._stores:
+                    store.flush()
+
+    def _finish_stores(self) -> dict[_ColumnStore, npt.NDArray[Any]]:
+        """Return the arrays of all columns, memory-mapping the spilled columns from a single file."""
+        if self._spill_dir is None:
+            return {store: store.finish() for store in self._stores}
+        # Every memory map holds a file descriptor, so the column files are concatenated
+        # and mapped once, 8-byte aligned
+        path = os.path.join(self._spill_dir.name, "columns.bin")
+        starts = []
+        with open(path, "wb") as f:
+            for store in self._stores:
+                f.write(bytes(-f.tell() % 8))
+                starts.append(f.tell())
+                store.move_to(f)
+            size = f.tell()
+        if size == 0:
+            return {store: np.empty(0, dtype=store.dtype) for store in self._stores}
+        data = np.memmap(path, dtype=np.uint8, mode="r", shape=(size,))
+        return {
+            store: data[
+                start : start + store.length * np.dtype(store.dtype).itemsize
+            ].view(store.dtype)
+            for store, start in zip(self._stores, starts, strict=True)
+        }
+
+    def finish(self) -> LHEEventColumns:
+        self._flush()
+        arrays = self._finish_stores()
+        counts = arrays[self._count_store]
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        columns = LHEEventColumns(
+            eventinfo={name: arrays[store] for name, store in self._eventinfo.items()},
+            particles={name: arrays[store] for name, store in self._particles.items()},
+            offsets=offsets,
+            weights=_KeyedColumns(
+                {k: arrays[v] for k, (v, _) in self._weights.items()},
+                {k: arrays[p] for k, (_, p) in self._weights.items()},
+            ),
+            scales=_KeyedColumns(
+                {k: arrays[v] for k, (v, _) in self._scales.items()},
+                {k: arrays[p] for k, (_, p) in self._scales.items()},
+            ),
+            attributes=self._attributes,
+            optional=self._optional,
+        )
+        # The memory-mapped files live as long as the columns referencing them
+        columns._spill_dir = self._spill_dir
+        return columns
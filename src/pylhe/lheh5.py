@@ -14,13 +14,39 @@ References:
 
 from __future__ import annotations
 
+import functools
 import math
-from collections.abc import Iterable, Iterator, Sequence
+import operator
+import os
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Literal, TypeVar
 
+import awkward as ak  # type: ignore[import-untyped]
 import h5py  # type: ignore[import-untyped]
+import numpy as np
+import numpy.typing as npt
 
 import pylhe
 
+__all__ = [
+    "count_events",
+    "get_particles",
+    "parallel_map",
+    "read_events",
+    "read_init",
+    "read_iter_events",
+    "take",
+    "to_awkward",
+    "write",
+    "write_columns",
+]
+
+
+def __dir__() -> list[str]:
+    return __all__
+
+
 _LHEH5_VERSION = (2, 0, 0)
 
 # Below column names are used for reading and writing datasets in LHEH5 format v2.
@@ -102,6 +128,14 @@ def _column_indices(
     }
 
 
+def _weight_columns(event_columns: dict[str, int]) -> dict[str, int]:
+    """Return the indices of the weight variation columns, which follow the NOMINAL column of the events dataset."""
+    nominal = event_columns.get("NOMINAL")
+    if nominal is None:
+        return {}
+    return {name: index for name, index in event_columns.items() if index > nominal}
+
+
 def _row_int(
     row: Sequence[float],
     columns: dict[str, int],
@@ -200,8 +234,10 @@ def _create_row_dataset(
     return dataset
 
 
-def _append_rows(dataset: h5py.Dataset, rows: list[list[float]]) -> None:
-    if not rows:
+def _append_rows(
+    dataset: h5py.Dataset, rows: list[list[float]] | npt.NDArray[np.float64]
+) -> None:
+    if len(rows) == 0:
         return
 
     start = dataset.shape[0]
@@ -262,51 +298,511 @@ def count_events(file: h5py.File) -> int:
     return len(events)
 
 
-def read_iter_events(file: h5py.File) -> Iterator[pylhe.LHEEvent]:
-    """Read events from an HDF5 file in LHEH5 format."""
+# Minimum number of event rows read at once by `read_iter_events` and written at once by `write_columns`
+_READ_BLOCK_ROWS = 4096
+
+
+def _block_column(
+    rows: npt.NDArray[np.float64],
+    columns: dict[str, int],
+    *names: str,
+    default: float | None = None,
+) -> npt.NDArray[np.float64]:
+    """Return a column of a block of rows, like `_row_float` for a single row."""
+    for name in names:
+        index = columns.get(name)
+        if index is not None and index < rows.shape[1]:
+            return rows[:, index]
+
+    if default is not None:
+        return np.full(len(rows), default)
+
+    err = f"None of the requested columns are available: {', '.join(names)}"
+    raise KeyError(err)
+
+
+def _block_rows(events: h5py.Dataset) -> int:
+    """Return the number of event rows read or written at once, a multiple of the HDF5 chunk rows of the events dataset."""
+    if events.chunks is None:
+        return _READ_BLOCK_ROWS
+    chunk_rows = int(events.chunks[0])
+    return chunk_rows * max(1, _READ_BLOCK_ROWS // chunk_rows)
+
+
+def read_iter_events(
+    file: h5py.File, block_rows: int | None = None
+) -> Iterator[pylhe.LHEEvent]:
+    """
+    Read events from an HDF5 file in LHEH5 format.
+
+    The events and their particles are read in blocks of ``block_rows`` events, so that each
+    HDF5 chunk is read and decompressed once. The columns following the NOMINAL column of the
+    events dataset are read as the event weights.
+
+    Args:
+        file (h5py.File): The LHEH5 file.
+        block_rows (int | None): Number of events read at once. Default is None, i.e. a multiple of
+            the chunk rows of the events dataset of at least 4096 events.
+    """
     events = file["events"]
     particles = file["particles"]
     event_columns = _column_indices(events, default=_EVENT_COLUMNS)
+    particle_columns = _column_indices(particles, default=_PARTICLE_COLUMNS)
+    if block_rows is None:
+        block_rows = _block_rows(events)
+    if block_rows < 1:
+        err = f"block_rows must be positive, got {block_rows}."
+        raise ValueError(err)
+
+    for block_start in range(0, len(events), block_rows):
+        rows = np.asarray(
+            events[block_start : block_start + block_rows], dtype=np.float64
+        ).reshape(-1, events.shape[1])
+        yield from _rows_to_events(rows, event_columns, particles, particle_columns)
+
+
+def read_events(
+    file: h5py.File, start: int | None = None, stop: int | None = None
+) -> list[pylhe.LHEEvent]:
+    """
+    Read the events ``start:stop`` from an HDF5 file in LHEH5 format.
+
+    Only the event rows of the range and the particle rows of its events are read, so that several
+    workers can read disjoint event ranges of the same file.
+
+    Args:
+        file (h5py.File): The LHEH5 file.
+        start (int | None): Index of the first event, counted from the end if negative.
+            Default is None, i.e. the first event.
+        stop (int | None): Index after the last event, counted from the end if negative.
+            Default is None, i.e. after the last event.
+
+    Returns:
+        list[LHEEvent]: The events of the range.
+    """
+    events = file["events"]
+    particles = file["particles"]
+    start, stop, _ = slice(start, stop).indices(len(events))
+    rows = np.asarray(events[start : max(start, stop)], dtype=np.float64).reshape(
+        -1, events.shape[1]
+    )
+    return list(
+        _rows_to_events(
+            rows,
+            _column_indices(events, default=_EVENT_COLUMNS),
+            particles,
+            _column_indices(particles, default=_PARTICLE_COLUMNS),
+        )
+    )
+
+
+def take(
+    file: h5py.File, indices: Sequence[int] | npt.NDArray[np.integer[Any]]
+) -> list[pylhe.LHEEvent]:
+    """
+    Read the events at ``indices`` from an HDF5 file in LHEH5 format, in that order.
+
+    The indices are sorted and consecutive indices are merged into ranges, so that each range of
+    event rows and each range of particle rows is read with a single HDF5 read.
+
+    Args:
+        file (h5py.File): The LHEH5 file.
+        indices (Sequence[int] | NDArray): Indices of the events, counted from the end if negative.
+
+    Returns:
+        list[LHEEvent]: The events at ``indices``.
+    """
+    events = file["events"]
+    particles = file["particles"]
+    rows = _take_rows(events, indices)
+    return list(
+        _rows_to_events(
+            rows,
+            _column_indices(events, default=_EVENT_COLUMNS),
+            particles,
+            _column_indices(particles, default=_PARTICLE_COLUMNS),
+        )
+    )
+
 
-    for event_row in events:
-        start = _row_int(event_row, event_columns, "start")
-        nparticles = _row_int(event_row, event_columns, "nparticles")
-        trials = _row_float(event_row, event_columns, "trials", default=float("nan"))
-        fscale = _row_float(event_row, event_columns, "fscale", default=float("nan"))
-        rscale = _row_float(event_row, event_columns, "rscale", default=float("nan"))
+def _take_rows(
+    dataset: h5py.Dataset, indices: Sequence[int] | npt.NDArray[np.integer[Any]]
+) -> npt.NDArray[np.float64]:
+    """Read the rows at ``indices`` of a dataset, with one read per range of consecutive indices."""
+    n = len(dataset)
+    idx = np.asarray(indices, dtype=np.int64).reshape(-1)
+    idx = np.where(idx < 0, idx + n, idx)
+    if idx.size and (idx.min() < 0 or idx.max() >= n):
+        err = f"event indices out of range for {n} events"
+        raise IndexError(err)
+    unique, inverse = np.unique(idx, return_inverse=True)
+    # Ranges of consecutive indices
+    breaks = np.flatnonzero(np.diff(unique) != 1) + 1
+    firsts = np.concatenate(([0], breaks))
+    lasts = np.append(breaks, len(unique))
+    ncolumns = dataset.shape[1]
+    blocks = [
+        np.asarray(
+            dataset[int(unique[a]) : int(unique[b - 1]) + 1], dtype=np.float64
+        ).reshape(-1, ncolumns)
+        for a, b in zip(firsts.tolist(), lasts.tolist(), strict=True)
+        if b > a
+    ]
+    rows = np.concatenate(blocks) if blocks else np.empty((0, ncolumns))
+    return rows[inverse.reshape(-1)]
+
+
+def _rows_to_events(
+    rows: npt.NDArray[np.float64],
+    event_columns: dict[str, int],
+    particles: h5py.Dataset,
+    particle_columns: dict[str, int],
+) -> Iterator[pylhe.LHEEvent]:
+    """Build the `LHEEvent` instances of event rows, reading their particles from the particles dataset."""
+    starts = _block_column(rows, event_columns, "start").astype(np.int64)
+    counts = _block_column(rows, event_columns, "nparticles").astype(np.int64)
+    particle_rows, offsets = _read_particle_rows(particles, starts, counts)
+    particle_data = list(
+        zip(
+            *(
+                _block_column(particle_rows, particle_columns, name)
+                .astype(pylhe.columnar._dtype(name))
+                .tolist()
+                for name in _PARTICLE_COLUMNS
+            ),
+            strict=True,
+        )
+    )
+    eventinfo_data = zip(
+        counts.tolist(),
+        _block_column(rows, event_columns, "pid").astype(np.int64).tolist(),
+        _block_column(rows, event_columns, "weight", "NOMINAL", default=0.0).tolist(),
+        *(
+            _block_column(rows, event_columns, name, default=float("nan")).tolist()
+            for name in ("scale", "aqed", "aqcd")
+        ),
+        strict=True,
+    )
+    trials, fscales, rscales = (
+        _block_column(rows, event_columns, name, default=float("nan")).tolist()
+        for name in ("trials", "fscale", "rscale")
+    )
+    weight_columns = _weight_columns(event_columns)
+    weight_names = list(weight_columns)
+    weight_data = rows[:, list(weight_columns.values())].tolist()
+    particle_offsets = offsets.tolist()
+
+    for i, info in enumerate(eventinfo_data):
         attributes: dict[str, str] = {}
         scales: dict[str, float] = {}
-
-        if not math.isnan(trials):
-            attributes["trials"] = str(trials)
-        if not math.isnan(fscale):
-            scales["fscale"] = fscale
-        if not math.isnan(rscale):
-            scales["rscale"] = rscale
+        if not math.isnan(trials[i]):
+            attributes["trials"] = str(trials[i])
+        if not math.isnan(fscales[i]):
+            scales["fscale"] = fscales[i]
+        if not math.isnan(rscales[i]):
+            scales["rscale"] = rscales[i]
 
         yield pylhe.LHEEvent(
-            eventinfo=pylhe.LHEEventInfo(
-                nparticles=nparticles,
-                pid=_row_int(event_row, event_columns, "pid"),
-                weight=_row_float(
-                    event_row,
-                    event_columns,
-                    "weight",
-                    "NOMINAL",
-                    default=0.0,
-                ),
-                scale=_row_float(
-                    event_row, event_columns, "scale", default=float("nan")
-                ),
-                aqed=_row_float(event_row, event_columns, "aqed", default=float("nan")),
-                aqcd=_row_float(event_row, event_columns, "aqcd", default=float("nan")),
-            ),
-            particles=get_particles(particles, start, nparticles),
+            eventinfo=pylhe.LHEEventInfo(*info),
+            particles=[
+                pylhe.LHEParticle(*particle)
+                for particle in particle_data[
+                    particle_offsets[i] : particle_offsets[i + 1]
+                ]
+            ],
+            weights=dict(zip(weight_names, weight_data[i], strict=True)),
             scales=scales,
             attributes=attributes,
         )
 
 
+def _read_particle_rows(
+    particles: h5py.Dataset,
+    starts: npt.NDArray[np.int64],
+    counts: npt.NDArray[np.int64],
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+    """
+    Read the particle rows of events given by their ``starts`` and ``counts``, and their offsets in the rows.
+
+    Overlapping or adjacent particle ranges are merged, so that each merged range is read with a single HDF5 read.
+    """
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    ends = starts + counts
+    ncolumns = particles.shape[1]
+    if offsets[-1] == 0:
+        return np.empty((0, ncolumns)), offsets
+    if np.array_equal(starts[1:], ends[:-1]):
+        # Events stored one after the other, the common case
+        rows = particles[int(starts[0]) : int(ends[-1])]
+        return np.asarray(rows, dtype=np.float64).reshape(-1, ncolumns), offsets
+
+    nonempty = np.flatnonzero(counts)
+    order = nonempty[np.argsort(starts[nonempty], kind="stable")]
+    sorted_starts = starts[order]
+    reach = np.maximum.accumulate(ends[order])
+    # A new range begins where an event starts after the end of all previous ones
+    first = np.concatenate(([0], np.flatnonzero(sorted_starts[1:] > reach[:-1]) + 1))
+    last = np.append(first[1:], len(order)) - 1
+    range_starts = sorted_starts[first]
+    range_ends = reach[last]
+    buffer = np.concatenate(
+        [
+            np.asarray(particles[int(a) : int(b)], dtype=np.float64).reshape(
+                -1, ncolumns
+            )
+            for a, b in zip(range_starts, range_ends, strict=True)
+        ]
+    )
+    buffer_offsets = np.concatenate(([0], np.cumsum(range_ends - range_starts)))
+    # Position of the first particle of each event in the buffer
+    positions = np.zeros(len(counts), dtype=np.int64)
+    range_index = np.searchsorted(range_starts, starts[nonempty], side="right") - 1
+    positions[nonempty] = (
+        buffer_offsets[range_index] + starts[nonempty] - range_starts[range_index]
+    )
+    index = np.repeat(positions - offsets[:-1], counts) + np.arange(offsets[-1])
+    return buffer[index], offsets
+
+
+def _rows_to_columns(
+    rows: npt.NDArray[np.float64],
+    event_columns: dict[str, int],
+    particles: h5py.Dataset,
+    names: set[str] | None = None,
+) -> tuple[
+    dict[str, npt.NDArray[Any]],
+    dict[str, npt.NDArray[Any]],
+    npt.NDArray[np.int64],
+    dict[str, npt.NDArray[np.float64]],
+]:
+    """
+    Convert event rows to event information, particle and weight columns with particle offsets.
+
+    Only the columns ``names`` are converted if given, the particles are not read if none of them is selected.
+    """
+    counts = _block_column(rows, event_columns, "nparticles").astype(np.int64)
+    eventinfo = {
+        "nparticles": counts,
+        "pid": _block_column(rows, event_columns, "pid").astype(np.int64),
+        "weight": _block_column(rows, event_columns, "weight", "NOMINAL", default=0.0),
+        **{
+            name: _block_column(rows, event_columns, name, default=float("nan"))
+            for name in ("scale", "aqed", "aqcd")
+        },
+    }
+    weights = {
+        name: rows[:, index] for name, index in _weight_columns(event_columns).items()
+    }
+    particle_columns = {
+        name: index
+        for name, index in _column_indices(particles, default=_PARTICLE_COLUMNS).items()
+        if name in _PARTICLE_COLUMNS and (names is None or name in names)
+    }
+    if particle_columns:
+        starts = _block_column(rows, event_columns, "start").astype(np.int64)
+        particle_rows, offsets = _read_particle_rows(particles, starts, counts)
+    else:
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        particle_rows = np.empty((0, particles.shape[1]))
+    particle_data = {
+        name: particle_rows[:, index].astype(pylhe.columnar._dtype(name))
+        for name, index in particle_columns.items()
+    }
+    if names is not None:
+        eventinfo = {name: eventinfo[name] for name in eventinfo if name in names}
+        weights = {name: weights[name] for name in weights if name in names}
+    return eventinfo, particle_data, offsets, weights
+
+
+def _read_columns(
+    events: h5py.Dataset,
+    particles: h5py.Dataset,
+    start: int,
+    stop: int,
+    names: set[str] | None = None,
+) -> tuple[
+    dict[str, npt.NDArray[Any]],
+    dict[str, npt.NDArray[Any]],
+    npt.NDArray[np.int64],
+    dict[str, npt.NDArray[np.float64]],
+]:
+    """Read the events ``start:stop`` as columns, see `_rows_to_columns`."""
+    rows = np.asarray(events[start:stop], dtype=np.float64).reshape(-1, events.shape[1])
+    return _rows_to_columns(
+        rows, _column_indices(events, default=_EVENT_COLUMNS), particles, names
+    )
+
+
+def to_awkward(
+    file: h5py.File,
+    columns: Iterable[str] | None = None,
+    entry_start: int | None = None,
+    entry_stop: int | None = None,
+) -> ak.Array:
+    """
+    Read events from an HDF5 file in LHEH5 format into an Awkward array with the layout of `pylhe.awkward.to_awkward`.
+
+    Whole column slices of the events and particles datasets are wrapped without creating `LHEEvent`
+    instances, the particles of each event being located with the ``start`` and ``nparticles`` columns.
+
+    Example::
+
+        with h5py.File("events.hdf5") as f:
+            arr = pylhe.lheh5.to_awkward(f, columns=["weight", "px", "py", "pz", "e"])
+
+    Args:
+        file (h5py.File): The LHEH5 file.
+        columns (Iterable[str] | None): Names of the `LHEEventInfo` and `LHEParticle` fields and of
+            the weights to read. Any of ``px``, ``py``, ``pz`` and ``e`` selects all four, which
+            form the ``vector`` of the particles. Default is None, i.e. all of them.
+        entry_start (int | None): Index of the first event to read, counted from the end if negative.
+            Default is None, i.e. the first event.
+        entry_stop (int | None): Index after the last event to read, counted from the end if negative.
+            Default is None, i.e. after the last event.
+
+    Returns:
+        awkward.Array: An Awkward array of the events.
+    """
+    events = file["events"]
+    start, stop, _ = slice(entry_start, entry_stop).indices(len(events))
+    names = None
+    if columns is not None:
+        names = set(columns)
+        known = {
+            *pylhe.columnar.EVENTINFO_FIELDS,
+            *pylhe.columnar.PARTICLE_FIELDS,
+            *_weight_columns(_column_indices(events, default=_EVENT_COLUMNS)),
+        }
+        if unknown := sorted(names - known):
+            err = f"Unknown columns {unknown}, expected names of LHEEventInfo or LHEParticle fields or weights."
+            raise ValueError(err)
+        if names & set(pylhe.awkward._MOMENTUM_FIELDS):
+            names.update(pylhe.awkward._MOMENTUM_FIELDS)
+    eventinfo, particles, offsets, weights = _read_columns(
+        events, file["particles"], start, max(start, stop), names
+    )
+    return pylhe.awkward._from_columns(eventinfo, particles, offsets, weights=weights)
+
+
+T = TypeVar("T")
+
+
+def parallel_map(
+    path: pylhe.PathLike,
+    fn: Callable[[ak.Array], T],
+    workers: int | None = None,
+    chunk_events: int = 100_000,
+    columns: Iterable[str] | None = None,
+    reduce: Literal["sum", "concatenate"] | Callable[[T, T], T] | None = None,
+    ordered: bool = True,
+) -> Any:
+    """
+    Apply a function to the events of an LHEH5 file in parallel processes, one range of events at a time.
+
+    The events are split into ranges of ``chunk_events`` events. Each worker process opens the file
+    read-only, reads a range with `to_awkward` and returns ``fn`` of it. A file without events
+    gives a single empty range.
+
+    ``fn`` and its results are sent between processes, so they must be picklable,
+    e.g. ``fn`` defined at module level rather than a lambda.
+
+    Example::
+
+        import hist
+
+        def fill(events):
+            h = hist.Hist.new.Reg(50, 0, 500, name="pt").Double()
+            h.fill(ak.flatten(events.particles.vector.pt), weight=...)
+            return h
+
+        h = pylhe.lheh5.parallel_map("events.hdf5", fill, workers=8, reduce="sum")
+
+    Args:
+        path (PathLike): Path to the LHEH5 file.
+        fn (Callable[[ak.Array], T]): Function applied to the Awkward array of each range of events.
+        workers (int | None): Number of worker processes. Default is None, i.e. the number of CPUs.
+            With 0, the ranges are processed one after the other in the calling process.
+        chunk_events (int): Number of events per range. Default is 100000.
+        columns (Iterable[str] | None): Columns read for ``fn``, see `to_awkward`.
+            Default is None, i.e. all of them.
+        reduce (str | Callable[[T, T], T] | None): How the results are combined: ``"sum"`` adds them,
+            ``"concatenate"`` concatenates Awkward or NumPy arrays, and a function combines two
+            results. Default is None, i.e. the list of results.
+        ordered (bool): Whether the results are combined in the order of the ranges. Otherwise,
+            they are combined as they complete. Default is True.
+
+    Returns:
+        The list of the results of the ranges, or the combined result with ``reduce``.
+    """
+    if chunk_events < 1:
+        err = f"chunk_events must be positive, got {chunk_events}."
+        raise ValueError(err)
+    if workers is not None and workers < 0:
+        err = f"workers must not be negative, got {workers}."
+        raise ValueError(err)
+    if isinstance(reduce, str) and reduce not in ("sum", "concatenate"):
+        err = f"Unknown reduce {reduce!r}, expected 'sum', 'concatenate' or a function."
+        raise ValueError(err)
+    with h5py.File(path, "r") as file:
+        nevents = count_events(file)
+    ranges = [
+        (start, min(start + chunk_events, nevents))
+        for start in range(0, max(nevents, 1), chunk_events)
+    ]
+    task = functools.partial(
+        _map_range, os.fsdecode(path), fn, None if columns is None else list(columns)
+    )
+    if workers == 0:
+        return _reduce_results((task(*r) for r in ranges), reduce)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(task, *r) for r in ranges]
+        try:
+            return _reduce_results(
+                (
+                    future.result()
+                    for future in (futures if ordered else as_completed(futures))
+                ),
+                reduce,
+            )
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def _map_range(
+    path: str,
+    fn: Callable[[ak.Array], T],
+    columns: list[str] | None,
+    start: int,
+    stop: int,
+) -> T:
+    """Apply ``fn`` to the events ``start:stop`` of an LHEH5 file, see `parallel_map`."""
+    with h5py.File(path, "r") as file:
+        return fn(to_awkward(file, columns, start, stop))
+
+
+def _reduce_results(
+    results: Iterator[T],
+    reduce: Literal["sum", "concatenate"] | Callable[[T, T], T] | None,
+) -> Any:
+    """Combine the results of `parallel_map`."""
+    if reduce is None:
+        return list(results)
+    if reduce == "sum":
+        return functools.reduce(operator.add, results)
+    if reduce == "concatenate":
+        arrays: list[Any] = list(results)
+        if all(isinstance(array, np.ndarray) for array in arrays):
+            return np.concatenate(arrays)
+        return ak.concatenate(arrays)
+    assert callable(reduce)
+    return functools.reduce(reduce, results)
+
+
 def read_init(file: h5py.File) -> pylhe.LHEInit:
     """Read the init and procInfo datasets from an HDF5 file in LHEH5 format."""
     init = file["init"]
@@ -347,87 +843,147 @@ def write(
     lhe: pylhe.LesHouchesEvents, file: h5py.File, lheformat: pylhe.LHEHDF5Format
 ) -> None:
     """Write a LesHouchesEvents object to an HDF5 file in LHEH5 format."""
-    proc_info = lhe.init.procInfo
-    init_info = lhe.init.initInfo
-
-    if init_info.numProcesses != len(proc_info):
-        err = (
-            "initInfo.numProcesses does not match the number of procInfo rows: "
-            f"{init_info.numProcesses} != {len(proc_info)}"
-        )
-        raise ValueError(err)
+    writer = _EventWriter(file, lhe.init, lheformat)
+    for event in lhe.events:
+        writer.write_event(event)
+    writer.close()
 
-    init_dataset = file.create_dataset(
-        "init",
-        data=[
-            init_info.beamA,
-            init_info.beamB,
-            init_info.energyA,
-            init_info.energyB,
-            init_info.PDFgroupA,
-            init_info.PDFgroupB,
-            init_info.PDFsetA,
-            init_info.PDFsetB,
-            init_info.weightingStrategy,
-            init_info.numProcesses,
-        ],
-        dtype="f8",
-    )
-    _set_column_attrs(init_dataset, _INIT_COLUMNS)
 
-    proc_rows = [
-        [
-            proc.procId,
-            float("nan") if proc.npLO is None else proc.npLO,
-            float("nan") if proc.npNLO is None else proc.npNLO,
-            proc.xSection,
-            proc.error,
-            proc.unitWeight,
-        ]
-        for proc in proc_info
-    ]
-    proc_dataset = file.create_dataset(
-        "procInfo",
-        data=proc_rows or None,
-        shape=(len(proc_rows), len(_PROCINFO_COLUMNS)),
-        dtype="f8",
+def write_columns(
+    file: h5py.File,
+    init: pylhe.LHEInit,
+    event_columns: Mapping[str, npt.ArrayLike] | ak.Array,
+    particle_columns: Mapping[str, npt.ArrayLike] | None = None,
+    offsets: npt.ArrayLike | None = None,
+    lheformat: pylhe.LHEHDF5Format | None = None,
+    *,
+    weights: Mapping[str, npt.ArrayLike] | None = None,
+) -> None:
+    """
+    Write events given as NumPy or Awkward columns to an HDF5 file in LHEH5 format.
+
+    Unlike `write`, no `LHEEvent` objects are created: the ``start`` column is computed
+    from the particle counts with `numpy.cumsum` and the events are written in blocks of
+    whole HDF5 chunks, each with a single resize and assignment of the events and
+    particles datasets. The columns are as for `pylhe.write_columns`, the particles of
+    the event with index ``i`` being ``offsets[i]:offsets[i + 1]``. If ``offsets`` is not
+    given, they are computed from the ``nparticles`` event column.
+
+    ``event_columns`` can also be an Awkward array with the layout of `to_awkward`, e.g.
+    after a selection of events, in which case the particles and weights are taken from
+    the array. The weights are stored as extra columns of the events dataset after
+    ``NOMINAL``, which requires every event to have every weight.
+
+    Args:
+        file (h5py.File): HDF5 file opened for writing.
+        init (LHEInit): Init block, written to the init and procInfo datasets.
+        event_columns (Mapping[str, ArrayLike] | awkward.Array): One array per `LHEEventInfo`
+            field, one entry per event, or an Awkward array of ``Event`` records.
+        particle_columns (Mapping[str, ArrayLike] | None): One array per `LHEParticle` field,
+            one entry per particle. Must not be given for an Awkward array.
+        offsets (ArrayLike | None): Start of the particles of each event in the particle columns,
+            followed by the end of those of the last event. Must not be given for an Awkward array.
+        lheformat (LHEHDF5Format | None): Chunking and compression of the datasets,
+            default is `pylhe.HDF5_FORMAT`.
+        weights (Mapping[str, ArrayLike] | None): One array of weights per weight ID, one entry per event.
+            Must not be given for an Awkward array.
+    """
+    if isinstance(event_columns, ak.Array):
+        if particle_columns is not None or offsets is not None or weights is not None:
+            err = "particle_columns, offsets and weights are taken from the Awkward array and must not be given."
+            raise ValueError(err)
+        events = pylhe.awkward.from_awkward(event_columns)
+        if not events.weights.regular:
+            err = "LHEH5 files store every weight for every event, but some events are missing weights."
+            raise ValueError(err)
+        event_columns = events.eventinfo
+        particle_columns = events.particles
+        offsets = events.offsets
+        weights = dict(events.weights.columns)
+    elif particle_columns is None:
+        err = "particle_columns are required unless event_columns is an Awkward array."
+        raise ValueError(err)
+    elif offsets is None:
+        if "nparticles" not in event_columns:
+            err = "Either offsets or the nparticles event column is required."
+            raise ValueError(err)
+        counts = np.asarray(event_columns["nparticles"], dtype=np.int64)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+    columns = pylhe.writer._ArrayColumns(
+        event_columns, particle_columns, offsets, weights
     )
-    _set_column_attrs(proc_dataset, _PROCINFO_COLUMNS)
-
-    events_write_args = _dataset_write_args(
-        lheformat,
-        chunk_rows=lheformat.event_chunk_rows,
-        ncolumns=len(_EVENT_COLUMNS),
+    columns.check_fields(
+        pylhe.columnar.EVENTINFO_FIELDS, pylhe.columnar.PARTICLE_FIELDS
     )
-    events_dataset = _create_row_dataset(
-        file,
-        "events",
-        _EVENT_COLUMNS,
-        write_args=events_write_args,
+    writer = _EventWriter(
+        file, init, lheformat or pylhe.HDF5_FORMAT, weight_ids=tuple(columns.weights)
     )
-    particles_write_args = _dataset_write_args(
-        lheformat,
-        chunk_rows=lheformat.particle_chunk_rows,
-        ncolumns=len(_PARTICLE_COLUMNS),
+    writer.write_columns(
+        columns.eventinfo, columns.particles, columns.offsets, columns.weights
     )
-    particles_dataset = _create_row_dataset(
-        file,
-        "particles",
-        _PARTICLE_COLUMNS,
-        write_args=particles_write_args,
+    writer.close()
+
+
+class _EventWriter:
+    """
+    Write events incrementally to an HDF5 file in LHEH5 format.
+
+    The init and procInfo datasets are written on construction, the version dataset on `close`.
+    Event and particle rows are buffered and appended to the datasets in chunks.
+    The weights with the IDs ``weight_ids`` are stored as extra event columns after ``NOMINAL``.
+    """
+
+    __slots__ = (
+        "_event_rows",
+        "_events_dataset",
+        "_particle_rows",
+        "_particles_dataset",
+        "_start",
+        "_weight_ids",
+        "file",
+        "lheformat",
     )
 
-    particle_rows: list[list[float]] = []
-    event_rows: list[list[float]] = []
-    start = 0
-
-    def _flush_pending_rows() -> None:
-        _append_rows(events_dataset, event_rows)
-        _append_rows(particles_dataset, particle_rows)
-        event_rows.clear()
-        particle_rows.clear()
+    def __init__(
+        self,
+        file: h5py.File,
+        init: pylhe.LHEInit,
+        lheformat: pylhe.LHEHDF5Format,
+        weight_ids: tuple[str, ...] = (),
+    ) -> None:
+        self.file = file
+        self.lheformat = lheformat
+        if duplicates := sorted(set(weight_ids) & set(_EVENT_COLUMNS)):
+            err = f"Weight IDs {duplicates} are already columns of the events dataset."
+            raise ValueError(err)
+        self._weight_ids = weight_ids
+        _write_init(file, init)
+        self._events_dataset = _create_row_dataset(
+            file,
+            "events",
+            _EVENT_COLUMNS + weight_ids,
+            write_args=_dataset_write_args(
+                lheformat,
+                chunk_rows=lheformat.event_chunk_rows,
+                ncolumns=len(_EVENT_COLUMNS) + len(weight_ids),
+            ),
+        )
+        self._particles_dataset = _create_row_dataset(
+            file,
+            "particles",
+            _PARTICLE_COLUMNS,
+            write_args=_dataset_write_args(
+                lheformat,
+                chunk_rows=lheformat.particle_chunk_rows,
+                ncolumns=len(_PARTICLE_COLUMNS),
+            ),
+        )
+        self._event_rows: list[list[float]] = []
+        self._particle_rows: list[list[float]] = []
+        self._start = 0
 
-    for event in lhe.events:
+    def write_event(self, event: pylhe.LHEEvent) -> None:
         nparticles = len(event.particles)
         if event.eventinfo.nparticles != nparticles:
             err = (
@@ -436,11 +992,11 @@ def write(
             )
             raise ValueError(err)
 
-        event_rows.append(
+        self._event_rows.append(
             [
                 event.eventinfo.pid,
                 nparticles,
-                start,
+                self._start,
                 _event_trials(event),
                 event.eventinfo.scale,
                 _event_scale(event, "fscale", "muf"),
@@ -448,10 +1004,11 @@ def write(
                 event.eventinfo.aqed,
                 event.eventinfo.aqcd,
                 event.eventinfo.weight,
+                *[event.weights.get(key, math.nan) for key in self._weight_ids],
             ]
         )
 
-        particle_rows.extend(
+        self._particle_rows.extend(
             [
                 [
                     particle.id,
@@ -471,13 +1028,120 @@ def write(
                 for particle in event.particles
             ]
         )
-        start += nparticles
+        self._start += nparticles
         if (
-            len(event_rows) >= lheformat.event_chunk_rows
-            or len(particle_rows) >= lheformat.particle_chunk_rows
+            len(self._event_rows) >= self.lheformat.event_chunk_rows
+            or len(self._particle_rows) >= self.lheformat.particle_chunk_rows
         ):
-            _flush_pending_rows()
+            self.flush()
+
+    def write_columns(
+        self,
+        eventinfo: Mapping[str, npt.NDArray[Any]],
+        particles: Mapping[str, npt.NDArray[Any]],
+        offsets: npt.NDArray[np.int64],
+        weights: Mapping[str, npt.NDArray[np.float64]] | None = None,
+    ) -> None:
+        """
+        Append events given as columns, the particles of event ``i`` being ``offsets[i]:offsets[i + 1]``.
+
+        The events are appended in blocks of whole HDF5 chunks, each with a single resize of the datasets.
+        The event rows have no trials and factorization and renormalization scales.
+        """
+        self.flush()
+        weights = weights or {}
+        counts = np.diff(offsets)
+        starts = np.zeros(len(counts), dtype=np.int64)
+        np.cumsum(counts[:-1], out=starts[1:])
+        starts += self._start
+        columns = {
+            "pid": eventinfo["pid"],
+            "nparticles": counts,
+            "start": starts,
+            "scale": eventinfo["scale"],
+            "aqed": eventinfo["aqed"],
+            "aqcd": eventinfo["aqcd"],
+            "NOMINAL": eventinfo["weight"],
+            **{key: weights[key] for key in self._weight_ids},
+        }
+        names = _EVENT_COLUMNS + self._weight_ids
+        block_rows = _block_rows(self._events_dataset)
+        for begin in range(0, len(counts), block_rows):
+            end = min(begin + block_rows, len(counts))
+            event_rows = np.zeros((end - begin, len(names)), dtype=np.float64)
+            for name, column in columns.items():
+                event_rows[:, names.index(name)] = column[begin:end]
+            _append_rows(self._events_dataset, event_rows)
+            _append_rows(
+                self._particles_dataset,
+                np.column_stack(
+                    [
+                        np.asarray(
+                            particles[name][offsets[begin] : offsets[end]], np.float64
+                        )
+                        for name in _PARTICLE_COLUMNS
+                    ]
+                ),
+            )
+        self._start += int(counts.sum())
+
+    def flush(self) -> None:
+        """Append the pending rows to the datasets."""
+        _append_rows(self._events_dataset, self._event_rows)
+        _append_rows(self._particles_dataset, self._particle_rows)
+        self._event_rows.clear()
+        self._particle_rows.clear()
+
+    def close(self) -> None:
+        """Append the pending rows and write the version dataset. The file itself is left open."""
+        self.flush()
+        self.file.create_dataset("version", data=_LHEH5_VERSION, dtype="i8")
+
+
+def _write_init(file: h5py.File, init: pylhe.LHEInit) -> None:
+    proc_info = init.procInfo
+    init_info = init.initInfo
+
+    if init_info.numProcesses != len(proc_info):
+        err = (
+            "initInfo.numProcesses does not match the number of procInfo rows: "
+            f"{init_info.numProcesses} != {len(proc_info)}"
+        )
+        raise ValueError(err)
 
-    _flush_pending_rows()
+    init_dataset = file.create_dataset(
+        "init",
+        data=[
+            init_info.beamA,
+            init_info.beamB,
+            init_info.energyA,
+            init_info.energyB,
+            init_info.PDFgroupA,
+            init_info.PDFgroupB,
+            init_info.PDFsetA,
+            init_info.PDFsetB,
+            init_info.weightingStrategy,
+            init_info.numProcesses,
+        ],
+        dtype="f8",
+    )
+    _set_column_attrs(init_dataset, _INIT_COLUMNS)
 
-    file.create_dataset("version", data=_LHEH5_VERSION, dtype="i8")
+    proc_rows = [
+        [
+            proc.procId,
+            float("nan") if proc.npLO is None else proc.npLO,
+            float("nan") if proc.npNLO is None else proc.npNLO,
+            proc.xSection,
+            proc.error,
+            proc.unitWeight,
+        ]
+        for proc in proc_info
+    ]
+    proc_dataset = file.create_dataset(
+        "procInfo",
+        data=proc_rows or None,
+        shape=(len(proc_rows), len(_PROCINFO_COLUMNS)),
+        dtype="f8",
+    )
+    _set_column_attrs(proc_dataset, _PROCINFO_COLUMNS)
@@ -0,0 +1,973 @@
+"""
+Streaming tools rewriting LHE files, e.g. splitting them into several files.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import functools
+import io
+import itertools
+import os
+import re
+import xml.etree.ElementTree as ET
+from collections import OrderedDict, deque
+from collections.abc import Callable, Hashable, Iterable, Iterator, Sequence
+from operator import attrgetter
+from typing import Protocol, TypeVar
+
+import awkward as ak  # type: ignore[import-untyped]
+import h5py  # type: ignore[import-untyped]
+import numpy as np
+import numpy.typing as npt
+
+import pylhe
+from pylhe import lheh5, writer
+
+__all__ = ["add_weights", "demux", "slim", "split"]
+
+
+def __dir__() -> list[str]:
+    return __all__
+
+
+class _Closeable(Protocol):
+    def close(self) -> None: ...  # pragma: no cover
+
+
+TCloseable = TypeVar("TCloseable", bound=_Closeable)
+
+
+class _Outputs:
+    """
+    The output files of a tool, named by a pattern with the file index ``i``.
+
+    In background mode, at most ``workers`` files are open at once, each written by a worker thread.
+    """
+
+    __slots__ = ("_open", "background", "paths", "pattern", "workers")
+
+    def __init__(self, pattern: str, workers: int) -> None:
+        if pattern.format(i=0) == pattern.format(i=1):
+            err = (
+                f"The pattern {pattern!r} must contain the file index, e.g. {{i:04d}}."
+            )
+            raise ValueError(err)
+        if workers < 0:
+            err = f"workers must be non-negative, got {workers}."
+            raise ValueError(err)
+        self.pattern = pattern
+        self.workers = workers
+        self.background = workers > 0
+        self.paths: list[str] = []
+        self._open: deque[_Closeable] = deque()
+
+    def open(self, factory: Callable[[str], TCloseable]) -> TCloseable:
+        """Open the next file with ``factory``, after waiting for a worker if all of them are busy."""
+        while self._open and len(self._open) >= max(self.workers, 1):
+            self._open.popleft().close()
+        path = self.pattern.format(i=len(self.paths))
+        output = factory(path)
+        self._open.append(output)
+        self.paths.append(path)
+        return output
+
+    def finish(self) -> None:
+        """Close the current file, which in background mode is left to its worker until a new file is opened."""
+        if not self.background and self._open:
+            self._open.popleft().close()
+
+    def close(self) -> None:
+        """Close all files."""
+        while self._open:
+            self._open.popleft().close()
+
+    def abort(self) -> None:
+        """Close all files, ignoring errors."""
+        while self._open:
+            with contextlib.suppress(Exception):
+                self._open.popleft().close()
+
+
+def split(
+    filepath: pylhe.PathLike,
+    events_per_file: int | None = None,
+    max_bytes: int | None = None,
+    pattern: str = "out_{i:04d}.lhe.gz",
+    workers: int = 0,
+    lheformat: pylhe.LHEOutputFormat | None = None,
+) -> list[str]:
+    """
+    Split an LHE file into several files with the same header and init block.
+
+    A new file is started when the current one has ``events_per_file`` events, or when
+    the next event would take it beyond ``max_bytes`` bytes of uncompressed LHE XML, including
+    the header, init block and closing tag. Every file has at least one event, even if that exceeds
+    ``max_bytes``, no files are written for a file without events.
+
+    LHE XML is split into LHE XML files without parsing the events: the header, init
+    and event blocks are copied as they are in the source, so that ``lheformat`` only
+    selects the compression. Other combinations of input and output formats read the events
+    and write them with ``lheformat``.
+
+    Example::
+
+        paths = pylhe.split("events.lhe.gz", events_per_file=50_000, pattern="shards/out_{i:04d}.lhe.gz", workers=4)
+
+    Args:
+        filepath (PathLike): Path to the LHE XML or LHEH5 file.
+        events_per_file (int | None): Maximum number of events per file.
+        max_bytes (int | None): Maximum size of a file in bytes of uncompressed LHE XML, i.e. of the
+            file itself for uncompressed output. Not supported for LHEH5 output.
+        pattern (str): Pattern of the output paths, formatted with the index ``i`` of the file.
+        workers (int): Number of files compressed and written in parallel by worker threads while
+            the next events are read. Default is 0, i.e. the files are written one after another.
+        lheformat (LHEOutputFormat | None): Format of the output files, detected from the suffix of
+            ``pattern`` by default.
+
+    Returns:
+        list[str]: The paths of the written files, in the order of the events.
+    """
+    if events_per_file is None and max_bytes is None:
+        err = "Either events_per_file or max_bytes is required."
+        raise ValueError(err)
+    for name, limit in (("events_per_file", events_per_file), ("max_bytes", max_bytes)):
+        if limit is not None and limit < 1:
+            err = f"{name} must be positive, got {limit}."
+            raise ValueError(err)
+    if lheformat is None:
+        lheformat = pylhe._parse_lheformat_from_filepath(pattern)
+    if max_bytes is not None and isinstance(lheformat, pylhe.LHEHDF5Format):
+        err = "max_bytes is only supported for LHE XML output."
+        raise ValueError(err)
+    outputs = _Outputs(pattern, workers)
+
+    with pylhe._extract_fileobj(filepath) as fileobj:
+        try:
+            if isinstance(lheformat, pylhe.LHEHDF5Format):
+                _split_events(
+                    pylhe.LesHouchesEvents.frombuffer(fileobj),
+                    events_per_file,
+                    outputs,
+                    lheformat,
+                )
+            elif isinstance(fileobj, h5py.File):
+                lhef = pylhe.LesHouchesEvents.frombuffer(fileobj)
+                serializer = pylhe._event_serializer(lheformat)
+                _split_text(
+                    lhef._prologue(lheformat),
+                    (serializer.event(event) + "\n" for event in lhef.events),
+                    events_per_file,
+                    max_bytes,
+                    outputs,
+                    lheformat,
+                )
+            else:
+                prologue, data = pylhe._raw_prologue(fileobj)
+                _split_text(
+                    prologue.decode(),
+                    _decoded(pylhe._raw_events(fileobj, data)),
+                    events_per_file,
+                    max_bytes,
+                    outputs,
+                    lheformat,
+                )
+        except BaseException:
+            outputs.abort()
+            raise
+    outputs.close()
+    return outputs.paths
+
+
+def _xml_sink(
+    path: str,
+    lheformat: pylhe.LHEXMLFormat,
+    prologue: str | None,
+    background: bool = False,
+    reopen: bool = False,
+) -> writer._XMLSink | writer._BackgroundSink:
+    """
+    Open an LHE XML output file and write its ``prologue``.
+
+    Without ``prologue``, the events are appended to the file instead, see the ``mode`` of `LHEWriter`.
+    With ``reopen``, a gzip-compressed file is written such that appending to it later is cheap.
+    """
+    if prologue is None:
+        writer._truncate_epilogue(path, lheformat.compress)
+    xml_sink = writer._XMLSink(
+        path,
+        lheformat,
+        writer._DEFAULT_BUFFER_SIZE,
+        append=prologue is None,
+        separate_epilogue=reopen,
+    )
+    sink: writer._XMLSink | writer._BackgroundSink = (
+        writer._BackgroundSink(xml_sink, writer._DEFAULT_QUEUE_SIZE)
+        if background
+        else xml_sink
+    )
+    if prologue is not None:
+        sink.write(prologue)
+    return sink
+
+
+def _decoded(blocks: Iterable[bytes]) -> Iterator[str]:
+    """Decode raw event blocks, each followed by a newline."""
+    for block in blocks:
+        yield block.decode() + "\n"
+
+
+def _split_text(
+    prologue: str,
+    texts: Iterable[str],
+    events_per_file: int | None,
+    max_bytes: int | None,
+    outputs: _Outputs,
+    lheformat: pylhe.LHEXMLFormat,
+) -> None:
+    """Write serialized events to LHE XML files, see `split`."""
+
+    def _open(path: str) -> writer._XMLSink | writer._BackgroundSink:
+        return _xml_sink(path, lheformat, prologue, outputs.background)
+
+    sink: writer._XMLSink | writer._BackgroundSink | None = None
+    # Events are collected in blocks before they are handed to the sink
+    parts: list[str] = []
+    buffered = nevents = size = 0
+    # Size in bytes of a file without events
+    overhead = _nbytes(prologue) + _nbytes(pylhe._EPILOGUE)
+    for text in texts:
+        nbytes = _nbytes(text) if max_bytes is not None else 0
+        if sink is not None and (
+            (events_per_file is not None and nevents >= events_per_file)
+            or (max_bytes is not None and size + nbytes > max_bytes)
+        ):
+            sink.write("".join(parts))
+            parts.clear()
+            buffered = 0
+            outputs.finish()
+            sink = None
+        if sink is None:
+            sink = outputs.open(_open)
+            nevents = 0
+            size = overhead
+        parts.append(text)
+        buffered += len(text)
+        nevents += 1
+        size += nbytes
+        if buffered >= writer._DEFAULT_BUFFER_SIZE:
+            sink.write("".join(parts))
+            parts.clear()
+            buffered = 0
+    if sink is not None:
+        sink.write("".join(parts))
+        outputs.finish()
+
+
+def _nbytes(text: str) -> int:
+    """Return the length of ``text`` encoded as UTF-8, without encoding ASCII text."""
+    return len(text) if text.isascii() else len(text.encode())
+
+
+def _split_events(
+    lhef: pylhe.LesHouchesEvents,
+    events_per_file: int | None,
+    outputs: _Outputs,
+    lheformat: pylhe.LHEOutputFormat,
+) -> None:
+    """Write parsed events to files with `LHEWriter`, see `split`."""
+
+    def _open(path: str) -> pylhe.LHEWriter:
+        return pylhe.LHEWriter(
+            path,
+            lhef.init,
+            lhef.header,
+            lheformat,
+            comment=lhef.comment,
+            attributes=lhef.attributes,
+            background=outputs.background,
+        )
+
+    lhe_writer: pylhe.LHEWriter | None = None
+    nevents = 0
+    for event in lhef.events:
+        if (
+            lhe_writer is not None
+            and events_per_file is not None
+            and nevents >= events_per_file
+        ):
+            outputs.finish()
+            lhe_writer = None
+        if lhe_writer is None:
+            lhe_writer = outputs.open(_open)
+            nevents = 0
+        lhe_writer.write_event(event)
+        nevents += 1
+    if lhe_writer is not None:
+        outputs.finish()
+
+
+def demux(
+    filepath: pylhe.PathLike,
+    key: str | Callable[[pylhe.LHEEvent], Hashable] = "pid",
+    out_pattern: str = "out_{key}.lhe.gz",
+    max_open: int = 64,
+    lheformat: pylhe.LHEXMLFormat | None = None,
+) -> dict[Hashable, str]:
+    """
+    Split an LHE file into one LHE XML file per value of an event key, e.g. per process ID, in a single pass.
+
+    For ``key="pid"``, the init block of each file keeps only the `LHEProcInfo` of its process,
+    unless none of them matches. Other keys keep the init block as it is.
+
+    At most ``max_open`` files are open at once. Beyond that, the least recently written file is
+    closed and reopened in append mode when the next event for it arrives.
+
+    LHE XML input with a key naming an `LHEEventInfo` field is not parsed beyond the header, the init
+    block and the first line of each event: the event blocks are copied as they are in the source.
+    Otherwise, the events are read and written with ``lheformat``.
+
+    Example::
+
+        paths = pylhe.demux("events.lhe.gz", out_pattern="process_{key}.lhe.gz")
+
+    Args:
+        filepath (PathLike): Path to the LHE XML or LHEH5 file.
+        key (str | Callable[[LHEEvent], Hashable]): Name of an `LHEEventInfo` field, or a function
+            returning the key of an event. Default is ``"pid"``, the process ID.
+        out_pattern (str): Pattern of the output paths, formatted with the ``key`` of the events.
+        max_open (int): Maximum number of files open at once. Default is 64.
+        lheformat (LHEXMLFormat | None): Format of the output files, detected from the suffix of
+            ``out_pattern`` by default.
+
+    Returns:
+        dict[Hashable, str]: The path of the file of each key, in the order of their first events.
+    """
+    if out_pattern.format(key=0) == out_pattern.format(key=1):
+        err = f"The pattern {out_pattern!r} must contain the {{key}} of the events."
+        raise ValueError(err)
+    if max_open < 1:
+        err = f"max_open must be positive, got {max_open}."
+        raise ValueError(err)
+    if isinstance(key, str) and key not in pylhe.columnar.EVENTINFO_FIELDS:
+        err = f"Unknown event key {key!r}, expected one of {list(pylhe.columnar.EVENTINFO_FIELDS)} or a function."
+        raise ValueError(err)
+    if lheformat is None:
+        detected = pylhe._parse_lheformat_from_filepath(out_pattern)
+        if not isinstance(detected, pylhe.LHEXMLFormat):
+            err = "demux only writes LHE XML files."
+            raise ValueError(err)
+        lheformat = detected
+
+    with pylhe._extract_fileobj(filepath) as fileobj:
+        if isinstance(key, str) and not isinstance(fileobj, h5py.File):
+            raw_prologue, data = pylhe._raw_prologue(fileobj)
+            lhef = pylhe.LesHouchesEvents.frombuffer(
+                io.BytesIO(raw_prologue + pylhe._EPILOGUE.encode())
+            )
+            # Everything before the init block is kept as it is in the source
+            head = raw_prologue[: raw_prologue.rfind(b"<init")].decode()
+            field = attrgetter(key)
+
+            def _prologue(value: Hashable) -> str:
+                init = _process_init(lhef.init, value) if key == "pid" else lhef.init
+                return head + init.tolhe(lheformat) + "\n"
+
+            items = (
+                (field(pylhe._raw_eventinfo(block)), block.decode() + "\n")
+                for block in pylhe._raw_events(fileobj, data)
+            )
+            return _demux_text(items, _prologue, out_pattern, max_open, lheformat)
+
+        lhef = pylhe.LesHouchesEvents.frombuffer(fileobj)
+        keyfunc = attrgetter(f"eventinfo.{key}") if isinstance(key, str) else key
+        serializer = pylhe._event_serializer(lheformat)
+
+        def _parsed_prologue(value: Hashable) -> str:
+            if key != "pid":
+                return lhef._prologue(lheformat)
+            init = _process_init(lhef.init, value)
+            return dataclasses.replace(lhef, init=init, events=[])._prologue(lheformat)
+
+        return _demux_text(
+            ((keyfunc(event), serializer.event(event) + "\n") for event in lhef.events),
+            _parsed_prologue,
+            out_pattern,
+            max_open,
+            lheformat,
+        )
+
+
+def _process_init(init: pylhe.LHEInit, pid: Hashable) -> pylhe.LHEInit:
+    """Return the init block with only the process information of the process ``pid``, if any."""
+    procinfo = [proc for proc in init.procInfo if proc.procId == pid]
+    if not procinfo:
+        return init
+    return dataclasses.replace(
+        init,
+        initInfo=dataclasses.replace(init.initInfo, numProcesses=len(procinfo)),
+        procInfo=procinfo,
+    )
+
+
+def _demux_text(
+    items: Iterable[tuple[Hashable, str]],
+    prologue: Callable[[Hashable], str],
+    out_pattern: str,
+    max_open: int,
+    lheformat: pylhe.LHEXMLFormat,
+) -> dict[Hashable, str]:
+    """Write serialized events to the LHE XML files of their keys, see `demux`."""
+    paths: dict[Hashable, str] = {}
+    # Open files, from the least to the most recently written
+    sinks: OrderedDict[Hashable, writer._XMLSink | writer._BackgroundSink] = (
+        OrderedDict()
+    )
+    try:
+        for value, text in items:
+            sink = sinks.get(value)
+            if sink is None:
+                if len(sinks) >= max_open:
+                    sinks.popitem(last=False)[1].close()
+                path = paths.get(value)
+                if path is None:
+                    path = paths[value] = out_pattern.format(key=value)
+                    sink = _xml_sink(path, lheformat, prologue(value), reopen=True)
+                else:
+                    sink = _xml_sink(path, lheformat, None)
+                sinks[value] = sink
+            else:
+                sinks.move_to_end(value)
+            sink.write(text)
+    except BaseException:
+        while sinks:
+            with contextlib.suppress(Exception):
+                sinks.popitem()[1].close()
+        raise
+    while sinks:
+        sinks.popitem(last=False)[1].close()
+    return paths
+
+
+def slim(
+    in_path: pylhe.PathLike,
+    out_path: pylhe.PathLike,
+    keep_weights: Iterable[str] = (),
+    keep_groups: Iterable[str] = (),
+    lheformat: pylhe.LHEXMLFormat | None = None,
+    background: bool = True,
+) -> None:
+    """
+    Copy an LHE XML file, keeping only some of its weights, in a single streaming pass.
+
+    The kept weights are ``keep_weights`` and the weights of the weight groups named ``keep_groups``.
+    The other weights are removed from the ``<initrwgt>`` block of the header and from the
+    ``<rwgt>`` and ``<weights>`` blocks of the events. Everything else is copied as it is in
+    the source without parsing the events, so that ``lheformat`` only selects the compression.
+
+    Example::
+
+        pylhe.slim("events.lhe.gz", "slim.lhe.gz", keep_groups=["scale_variation"])
+
+    Args:
+        in_path (PathLike): Path to the LHE XML file.
+        out_path (PathLike): Path to the output LHE XML file.
+        keep_weights (Iterable[str]): IDs of the weights to keep.
+        keep_groups (Iterable[str]): Names of the weight groups whose weights are kept.
+        lheformat (LHEXMLFormat | None): Format of the output file, detected from the suffix of
+            ``out_path`` by default.
+        background (bool): Compress and write the output in a worker thread, in parallel with
+            rewriting the next events. Default is True.
+    """
+    keep_weights = set(keep_weights)
+    keep_groups = set(keep_groups)
+    if lheformat is None:
+        detected = pylhe._parse_lheformat_from_filepath(out_path)
+        if not isinstance(detected, pylhe.LHEXMLFormat):
+            err = "slim only writes LHE XML files."
+            raise ValueError(err)
+        lheformat = detected
+
+    with pylhe._extract_fileobj(in_path) as fileobj:
+        if isinstance(fileobj, h5py.File):
+            err = "slim requires LHE XML input, LHEH5 files only store the nominal weight."
+            raise ValueError(err)  # noqa: TRY004  # invalid file content rather than argument type
+        raw_prologue, data = pylhe._raw_prologue(fileobj)
+        header = pylhe.LesHouchesEvents.frombuffer(
+            io.BytesIO(raw_prologue + pylhe._EPILOGUE.encode())
+        ).header or pylhe.LHEHeader(initrwgt=pylhe.LHEInitRWGT())
+        initrwgt = header.initrwgt
+        keep = keep_weights | _group_weights(initrwgt, keep_groups)
+        declared = set(initrwgt.weights_by_id())
+        if declared and not keep_weights <= declared:
+            err = f"Unknown weight IDs {sorted(keep_weights - declared)}."
+            raise ValueError(err)
+        prologue = _replace_initrwgt(
+            raw_prologue, _slim_initrwgt(initrwgt, keep).tolhe(lheformat)
+        )
+        slimmer = _WeightSlimmer(keep, initrwgt.index_to_id())
+
+        sink = _xml_sink(
+            os.fsdecode(out_path), lheformat, prologue.decode(), background
+        )
+        try:
+            parts: list[bytes] = []
+            buffered = 0
+            for block in pylhe._raw_events(fileobj, data):
+                slimmed = slimmer.slim(block)
+                parts.append(slimmed)
+                parts.append(b"\n")
+                buffered += len(slimmed) + 1
+                if buffered >= writer._DEFAULT_BUFFER_SIZE:
+                    sink.write(b"".join(parts).decode())
+                    parts.clear()
+                    buffered = 0
+            sink.write(b"".join(parts).decode())
+        except BaseException:
+            with contextlib.suppress(Exception):
+                sink.close()
+            raise
+        sink.close()
+
+
+def _group_weights(initrwgt: pylhe.LHEInitRWGT, names: set[str]) -> set[str]:
+    """Return the IDs of the weights of the weight groups ``names``, by name or by the type of old MadGraph versions."""
+    ids: set[str] = set()
+    found: set[str] = set()
+    for entry in initrwgt.entries:
+        if isinstance(entry, pylhe.LHEInitRWGTWeightGroup):
+            name = (
+                entry.name
+                if entry.name is not None
+                else entry.extra_attributes.get("type")
+            )
+            if name in names:
+                found.add(name)
+                ids.update(weight.id for weight in entry.weights)
+    if names - found:
+        err = f"Unknown weight groups {sorted(names - found)}."
+        raise ValueError(err)
+    return ids
+
+
+def _slim_initrwgt(initrwgt: pylhe.LHEInitRWGT, keep: set[str]) -> pylhe.LHEInitRWGT:
+    """Return the ``<initrwgt>`` block with only the weights ``keep``, dropping emptied weight groups."""
+    entries: list[pylhe.InitRWGTEntry] = []
+    for entry in initrwgt.entries:
+        if isinstance(entry, pylhe.LHEInitRWGTWeight):
+            if entry.id in keep:
+                entries.append(entry)
+        elif weights := [weight for weight in entry.weights if weight.id in keep]:
+            entries.append(dataclasses.replace(entry, weights=weights))
+    return pylhe.LHEInitRWGT(entries=entries)
+
+
+def _replace_initrwgt(prologue: bytes, initrwgt: str) -> bytes:
+    """Replace the ``<initrwgt>`` block of a raw prologue, keeping the rest as it is."""
+    start = prologue.find(b"<initrwgt")
+    if start < 0:
+        return prologue
+    stop = prologue.index(b"</initrwgt>", start) + len(b"</initrwgt>")
+    return prologue[:start] + initrwgt.rstrip().encode() + prologue[stop:]
+
+
+_RWGT_WEIGHT = re.compile(
+    rb"[ \t]*<wgt\s+id\s*=\s*(['\"])(.*?)\1[^>]*>[^<]*</wgt>[ \t]*\r?\n?"
+)
+_EMPTY_RWGT = re.compile(rb"[ \t]*<rwgt[^>]*>\s*</rwgt>[ \t]*\r?\n?")
+_WEIGHTS_BLOCK = re.compile(rb"([ \t]*)(<weights[^>]*>)([^<]*)(</weights>[ \t]*\r?\n?)")
+
+
+class _WeightSlimmer:
+    """Removes weights from raw ``<event>`` blocks, see `slim`."""
+
+    __slots__ = ("_index_map", "_keep", "_keep_ids")
+
+    def __init__(self, keep: set[str], index_map: dict[int, str]) -> None:
+        self._keep = {weight_id.encode() for weight_id in keep}
+        self._keep_ids = keep
+        self._index_map = index_map
+
+    def _rwgt_weight(self, match: re.Match[bytes]) -> bytes:
+        return match[0] if match[2] in self._keep else b""
+
+    def _weights_block(self, match: re.Match[bytes]) -> bytes:
+        if not self._index_map:
+            err = "<initrwgt> is required to slim <weights> blocks but not found in the header."
+            raise ValueError(err)
+        indent, opening, values, closing = match.groups()
+        kept = [
+            value
+            for i, value in enumerate(values.split())
+            if self._index_map.get(i) in self._keep_ids
+        ]
+        if not kept:
+            return b""
+        separator = b"\n" if b"\n" in values.strip() else b" "
+        newline = b"\n" if values.startswith(b"\n") else b""
+        return indent + opening + newline + separator.join(kept) + newline + closing
+
+    def slim(self, block: bytes) -> bytes:
+        """Return the ``<event>`` block without the removed weights, and without weight blocks left empty."""
+        start = block.find(b"<rwgt")
+        if start >= 0:
+            rwgt = _RWGT_WEIGHT.sub(self._rwgt_weight, block[start:])
+            block = block[:start] + _EMPTY_RWGT.sub(b"", rwgt)
+        if b"<weights" in block:
+            block = _WEIGHTS_BLOCK.sub(self._weights_block, block)
+        return block
+
+
+def add_weights(
+    in_path: pylhe.PathLike,
+    out_path: pylhe.PathLike,
+    new_ids: Sequence[str],
+    values: npt.ArrayLike | Callable[[ak.Array], npt.ArrayLike],
+    group: str | None = None,
+    descriptions: Sequence[str] | None = None,
+    lheformat: pylhe.LHEOutputFormat | None = None,
+    batch_size: int = 4096,
+    background: bool = True,
+) -> None:
+    """
+    Copy an LHE file, adding new weights to every event in a single streaming pass.
+
+    For LHE XML files, the new weights are declared in the ``<initrwgt>`` block of the header, in the
+    weight group ``group`` if given, and their values are inserted into the ``<rwgt>`` or
+    ``<weights>`` block of each event, or into a new block for events without weights.
+    Everything else is copied as it is in the source, so that ``lheformat`` only selects the
+    compression and the block of events without weights.
+
+    For LHEH5 files, the new weights are appended as columns of the events dataset, after the
+    NOMINAL column and the existing weight variations. ``group`` and ``descriptions`` are not stored.
+
+    ``values`` is either an array with one row per event and one column per new weight, or a
+    function computing such an array from a batch of at most ``batch_size`` events, given as an
+    Awkward array with the layout of `pylhe.to_awkward`. A single new weight may be given as a 1D array.
+
+    Example::
+
+        def cw(events):
+            return events.eventinfo.weight * (1 + 0.1 * events.eventinfo.scale / 1000)
+
+        pylhe.add_weights("events.lhe.gz", "eft.lhe.gz", ["cW_0p1"], cw, group="eft")
+
+    Args:
+        in_path (PathLike): Path to the LHE XML or LHEH5 file.
+        out_path (PathLike): Path to the output file, in the same format as the input.
+        new_ids (Sequence[str]): IDs of the new weights.
+        values (ArrayLike | Callable[[ak.Array], ArrayLike]): Values of the new weights, or a
+            function returning them for a batch of events.
+        group (str | None): Name of the weight group of the new weights. The weights are added
+            to the last group if it has this name, otherwise a new group is added.
+            Default is None, i.e. no weight group.
+        descriptions (Sequence[str] | None): Description texts of the new weights. Default is None,
+            i.e. the IDs.
+        lheformat (LHEOutputFormat | None): Format of the output file, detected from the suffix of
+            ``out_path`` by default.
+        batch_size (int): Number of events of the batches given to ``values`` if it is a function.
+            Default is 4096.
+        background (bool): Compress and write LHE XML output in a worker thread, in parallel with
+            rewriting the next events. Default is True.
+    """
+    new_ids = list(new_ids)
+    if not new_ids:
+        err = "new_ids must not be empty."
+        raise ValueError(err)
+    if len(set(new_ids)) != len(new_ids):
+        err = f"Duplicate weight IDs in {new_ids}."
+        raise ValueError(err)
+    if descriptions is not None and len(descriptions) != len(new_ids):
+        err = f"Expected {len(new_ids)} descriptions, got {len(descriptions)}."
+        raise ValueError(err)
+    if batch_size < 1:
+        err = f"batch_size must be positive, got {batch_size}."
+        raise ValueError(err)
+    if lheformat is None:
+        lheformat = pylhe._parse_lheformat_from_filepath(out_path)
+    weight_values = _WeightValues(values, len(new_ids))
+
+    with pylhe._extract_fileobj(in_path) as fileobj:
+        if isinstance(fileobj, h5py.File) != isinstance(lheformat, pylhe.LHEHDF5Format):
+            err = "add_weights writes the format of its input, LHE XML or LHEH5."
+            raise ValueError(err)
+        if isinstance(fileobj, h5py.File):
+            assert isinstance(lheformat, pylhe.LHEHDF5Format)
+            _add_lheh5_weights(
+                fileobj, out_path, new_ids, weight_values, lheformat, batch_size
+            )
+            return
+        assert isinstance(lheformat, pylhe.LHEXMLFormat)
+
+        raw_prologue, data = pylhe._raw_prologue(fileobj)
+        header = pylhe.LesHouchesEvents.frombuffer(
+            io.BytesIO(raw_prologue + pylhe._EPILOGUE.encode())
+        ).header or pylhe.LHEHeader(initrwgt=pylhe.LHEInitRWGT())
+        initrwgt = header.initrwgt
+        declared = initrwgt.weights_by_id()
+        if existing := sorted(set(new_ids) & set(declared)):
+            err = f"Weight IDs {existing} are already declared in <initrwgt>."
+            raise ValueError(err)
+        weights = [
+            pylhe.LHEInitRWGTWeight(id=weight_id, name=description)
+            for weight_id, description in zip(
+                new_ids, descriptions or new_ids, strict=True
+            )
+        ]
+        prologue = _insert_initrwgt(
+            raw_prologue, _extend_initrwgt(initrwgt, weights, group).tolhe(lheformat)
+        )
+        adder = _WeightAdder(new_ids, len(declared), lheformat)
+        index_map = initrwgt.index_to_id()
+
+        sink = _xml_sink(
+            os.fsdecode(out_path), lheformat, prologue.decode(), background
+        )
+        try:
+            blocks = pylhe._raw_events(fileobj, data)
+            while batch := list(itertools.islice(blocks, batch_size)):
+                rows = weight_values.batch(
+                    len(batch), functools.partial(_awkward_batch, batch, index_map)
+                )
+                sink.write(
+                    b"".join(
+                        adder.add(block, row) + b"\n"
+                        for block, row in zip(batch, rows.tolist(), strict=True)
+                    ).decode()
+                )
+            weight_values.finish()
+        except BaseException:
+            with contextlib.suppress(Exception):
+                sink.close()
+            raise
+        sink.close()
+
+
+class _WeightValues:
+    """The values of the new weights, handed out by batch of events, see `add_weights`."""
+
+    __slots__ = ("_array", "_function", "_nids", "_start")
+
+    def __init__(
+        self,
+        values: npt.ArrayLike | Callable[[ak.Array], npt.ArrayLike],
+        nids: int,
+    ) -> None:
+        self._nids = nids
+        self._start = 0
+        self._function: Callable[[ak.Array], npt.ArrayLike] | None = None
+        self._array: npt.NDArray[np.float64] | None = None
+        if callable(values):
+            self._function = values
+        else:
+            self._array = self._rows(values)
+
+    def _rows(
+        self, values: npt.ArrayLike, nevents: int | None = None
+    ) -> npt.NDArray[np.float64]:
+        rows = np.asarray(values, dtype=np.float64)
+        if rows.ndim == 1 and self._nids == 1:
+            rows = rows[:, np.newaxis]
+        if (
+            rows.ndim != 2
+            or rows.shape[1] != self._nids
+            or (nevents is not None and len(rows) != nevents)
+        ):
+            expected = (nevents if nevents is not None else "nevents", self._nids)
+            err = f"Expected weight values of shape {expected}, got {rows.shape}."
+            raise ValueError(err)
+        return rows
+
+    def batch(
+        self, nevents: int, events: Callable[[], ak.Array]
+    ) -> npt.NDArray[np.float64]:
+        """Return the values of the next ``nevents`` events, computed from their ``events`` for a function."""
+        if self._function is not None:
+            return self._rows(self._function(events()), nevents)
+        assert self._array is not None
+        rows = self._array[self._start : self._start + nevents]
+        self._start += nevents
+        if len(rows) != nevents:
+            err = f"The weight values have {len(self._array)} rows but the file has more events."
+            raise ValueError(err)
+        return rows
+
+    def finish(self) -> None:
+        """Check that the values of all events have been used."""
+        if self._array is not None and self._start != len(self._array):
+            err = f"The weight values have {len(self._array)} rows but the file has {self._start} events."
+            raise ValueError(err)
+
+
+def _awkward_batch(blocks: list[bytes], index_map: dict[int, str]) -> ak.Array:
+    """Parse raw ``<event>`` blocks into an Awkward array with the layout of `pylhe.to_awkward`."""
+    events = pylhe.LHEEvent._fromelements(
+        [ET.fromstring(block) for block in blocks], index_map, with_attributes=True
+    )
+    return pylhe.to_awkward(pylhe.LHEEventColumns.fromevents(events))
+
+
+def _lheh5_batch(
+    events: h5py.Dataset, particles: h5py.Dataset, start: int, stop: int
+) -> ak.Array:
+    """Read the events ``start:stop`` of an LHEH5 file into an Awkward array with the layout of `pylhe.to_awkward`."""
+    eventinfo, particle_columns, offsets, weights = lheh5._read_columns(
+        events, particles, start, stop
+    )
+    return pylhe.awkward._from_columns(
+        eventinfo, particle_columns, offsets, weights=weights
+    )
+
+
+def _add_lheh5_weights(
+    source: h5py.File,
+    out_path: pylhe.PathLike,
+    new_ids: list[str],
+    weight_values: _WeightValues,
+    lheformat: pylhe.LHEHDF5Format,
+    batch_size: int,
+) -> None:
+    """Copy an LHEH5 file with new weight columns in the events dataset, see `add_weights`."""
+    events = source["events"]
+    particles = source["particles"]
+    columns = (
+        *lheh5._column_names(events, default=lheh5._EVENT_COLUMNS),
+        *new_ids,
+    )
+    if existing := sorted(set(new_ids) & set(columns[: -len(new_ids)])):
+        err = f"Weight IDs {existing} are already columns of the events dataset."
+        raise ValueError(err)
+    with h5py.File(out_path, "w") as target:
+        for name in source:
+            if name != "events":
+                source.copy(name, target)
+        dataset = lheh5._create_row_dataset(
+            target,
+            "events",
+            columns,
+            write_args=lheh5._dataset_write_args(
+                lheformat, chunk_rows=lheformat.event_chunk_rows, ncolumns=len(columns)
+            ),
+        )
+        for start in range(0, len(events), batch_size):
+            stop = min(start + batch_size, len(events))
+            rows = weight_values.batch(
+                stop - start,
+                functools.partial(_lheh5_batch, events, particles, start, stop),
+            )
+            lheh5._append_rows(dataset, np.hstack([events[start:stop], rows]))
+        weight_values.finish()
+
+
+def _extend_initrwgt(
+    initrwgt: pylhe.LHEInitRWGT,
+    weights: list[pylhe.LHEInitRWGTWeight],
+    group: str | None,
+) -> pylhe.LHEInitRWGT:
+    """
+    Return the ``<initrwgt>`` block with ``weights`` appended, in the weight group ``group`` if given.
+
+    The weights are appended after all existing weights, so that the indices of ``<weights>`` blocks stay valid.
+    """
+    entries = list(initrwgt.entries)
+    if group is None:
+        entries.extend(weights)
+        return pylhe.LHEInitRWGT(entries=entries)
+    groups = [
+        entry for entry in entries if isinstance(entry, pylhe.LHEInitRWGTWeightGroup)
+    ]
+    if entries and entries[-1] in groups and groups[-1].name == group:
+        entries[-1] = dataclasses.replace(
+            groups[-1], weights=[*groups[-1].weights, *weights]
+        )
+    elif any(entry.name == group for entry in groups):
+        err = f"The weight group {group!r} is not the last entry of <initrwgt>, new weights cannot be added to it."
+        raise ValueError(err)
+    else:
+        entries.append(pylhe.LHEInitRWGTWeightGroup(name=group, weights=weights))
+    return pylhe.LHEInitRWGT(entries=entries)
+
+
+_INIT_START = re.compile(rb"<init[\s>]")
+
+
+def _insert_initrwgt(prologue: bytes, initrwgt: str) -> bytes:
+    """Replace or add the ``<initrwgt>`` block of a raw prologue, keeping the rest as it is."""
+    if not initrwgt or b"<initrwgt" in prologue:
+        return _replace_initrwgt(prologue, initrwgt)
+    block = initrwgt.rstrip().encode() + b"\n"
+    stop = prologue.find(b"</header>")
+    if stop < 0:
+        match = _INIT_START.search(prologue)
+        assert match is not None
+        stop = match.start()
+        block = b"<header>\n" + block + b"</header>\n"
+    return prologue[:stop] + block + prologue[stop:]
+
+
+def _insert_line(block: bytes, stop: int, text: bytes) -> bytes:
+    """Insert lines of ``text`` before the line ending at ``stop``, or break the line there."""
+    start = block.rfind(b"\n", 0, stop) + 1
+    if block[start:stop].strip():
+        return block[:stop] + b"\n" + text + block[stop:]
+    return block[:start] + text + block[start:]
+
+
+class _WeightAdder:
+    """Inserts new weights into raw ``<event>`` blocks, see `add_weights`."""
+
+    __slots__ = ("_block", "_ndeclared", "_rwgt", "_value")
+
+    def __init__(
+        self, new_ids: list[str], ndeclared: int, lheformat: pylhe.LHEXMLFormat
+    ) -> None:
+        # Same printf formats as the weights blocks of `LHEEvent.tolhe`
+        self._value = b"%11.4e"
+        self._rwgt = "".join(
+            f" <wgt id='{weight_id.replace('%', '%%')}'>%11.4e</wgt>\n"
+            for weight_id in new_ids
+        ).encode()
+        self._ndeclared = ndeclared
+        # Events without weights get a new block, a <weights> block only if it has no other weights
+        if lheformat.weights is pylhe.LHEWeightFormat.WEIGHTS and not ndeclared:
+            self._block = b"<weights>\n" + b"%11.4e\n" * len(new_ids) + b"</weights>\n"
+        else:
+            self._block = b"<rwgt>\n" + self._rwgt + b"</rwgt>\n"
+
+    def _weights_block(self, match: re.Match[bytes], row: tuple[float, ...]) -> bytes:
+        indent, opening, values, closing = match.groups()
+        existing = values.split()
+        if len(existing) != self._ndeclared:
+            err = (
+                f"event <weights> block has {len(existing)} entries"
+                f" but <initrwgt> declares {self._ndeclared}"
+            )
+            raise ValueError(err)
+        separator = b"\n" if b"\n" in values.strip() or not existing else b" "
+        stripped = values.rstrip()
+        new = separator.join(self._value % value for value in row)
+        return (
+            indent
+            + opening
+            + stripped
+            + separator
+            + new
+            + values[len(stripped) :]
+            + closing
+        )
+
+    def add(self, block: bytes, values: list[float]) -> bytes:
+        """Return the ``<event>`` block with the new weights ``values``."""
+        row = tuple(values)
+        stop = block.find(b"</rwgt>")
+        if stop >= 0:
+            return _insert_line(block, stop, self._rwgt % row)
+        match = _WEIGHTS_BLOCK.search(block)
+        if match is not None:
+            return (
+                block[: match.start()]
+                + self._weights_block(match, row)
+                + block[match.end() :]
+            )
+        return _insert_line(block, block.rfind(b"</event>"), self._block % row)
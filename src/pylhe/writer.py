@@ -0,0 +1,1130 @@
+"""
+Incremental writing of LHE events.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import gzip
+import io
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+import zlib
+from collections.abc import Callable, Iterable, Mapping
+from itertools import islice
+from types import TracebackType
+from typing import IO, TYPE_CHECKING, Any, Literal
+
+import h5py  # type: ignore[import-untyped]
+import numpy as np
+import numpy.typing as npt
+
+import pylhe
+from pylhe import lheh5
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+__all__ = ["LHEWriter", "write_columns"]
+
+
+def __dir__() -> list[str]:
+    return __all__
+
+
+_DEFAULT_BUFFER_SIZE = 1 << 20
+_EVENT_BLOCK_SIZE = 1024
+_DEFAULT_QUEUE_SIZE = 4
+# Number of events formatted at once by `write_columns`
+_COLUMN_BATCH_SIZE = 4096
+
+
+class LHEWriter:
+    """
+    Write LHE events incrementally to an LHE XML or LHEH5 file, a named pipe or a stream.
+
+    The header and init block are serialized once on construction, the closing
+    ``</LesHouchesEvents>`` tag is written on `close`. XML output is collected in
+    blocks of ``buffer_size`` characters before it is written to the target.
+    If the body of the ``with`` statement raises, the output is closed without the
+    closing tag, so that the incomplete file is not mistaken for a complete one.
+
+    Use it as a context manager::
+
+        with pylhe.LHEWriter("events.lhe.gz", init=lhef.init, header=lhef.header) as writer:
+            writer.write_event(event)
+            writer.write_events(batch)
+
+    For a consumer reading from a pipe, e.g. a parton shower, see `LHEWriter.to_stream`.
+    Writes block while the consumer of a pipe is not reading, i.e. back-pressure
+    from the consumer throttles the producer.
+    """
+
+    __slots__ = (
+        "_closed",
+        "_declared_weights",
+        "_sink",
+        "flush_every",
+        "lheformat",
+        "nevents",
+    )
+
+    def __init__(
+        self,
+        target: pylhe.PathLike | IO[str] | IO[bytes],
+        init: pylhe.LHEInit,
+        header: pylhe.LHEHeader | str | None = None,
+        lheformat: pylhe.LHEOutputFormat | None = None,
+        *,
+        comment: str | None = None,
+        attributes: dict[str, str] | None = None,
+        flush_every: int = 0,
+        flush_after_init: bool = False,
+        buffer_size: int = _DEFAULT_BUFFER_SIZE,
+        background: bool = False,
+        queue_size: int = _DEFAULT_QUEUE_SIZE,
+        mode: Literal["w", "a"] = "w",
+    ) -> None:
+        """
+        Open the target and write the header and init block.
+
+        With ``mode="a"``, the events are appended to an existing LHE XML file instead. Its closing
+        ``</LesHouchesEvents>`` tag is removed and written again on `close`, so appending costs only
+        the new events. For gzip-compressed files, the appended events are written as a new gzip member
+        followed by the closing tag in a separate member, which the next append removes. If the closing
+        tag is part of the last member instead, e.g. in files written with ``mode="w"``, that member is
+        decompressed and compressed again once without it.
+
+        Args:
+            target: Path of the output file or named pipe, or a text or binary stream.
+                Streams are flushed but not closed by `close`.
+            init (LHEInit): Init block of the file.
+            header (LHEHeader | str | None): Header block of the file, or the header block serialized once
+                with `LHEHeader.tolhe` to reuse it for many files. Not stored in LHEH5 files.
+            lheformat (LHEOutputFormat | None): How to serialize the events, see the `LHEOutputFormat` class.
+                Default is detected from the file name suffix for paths and `DEFAULT_FORMAT` for streams.
+            comment (str | None): Comment written before the header. Not stored in LHEH5 files.
+            attributes (dict[str, str] | None): Extra attributes of the root ``LesHouchesEvents`` element.
+                Not stored in LHEH5 files.
+            flush_every (int): Flush the output after every ``flush_every`` events. Default is 0, i.e. never
+                flush explicitly and leave it to the buffering of the writer and the target.
+            flush_after_init (bool): Flush the output after the header and init block. Default is False.
+            buffer_size (int): Number of characters of LHE XML collected before writing them to the target.
+            background (bool): Serialize, compress and write the events in a worker thread, so that producing
+                the next events overlaps with the output. Events must not be modified after they are handed
+                to the writer. Errors of the worker are raised by `flush` and `close`. Default is False.
+            queue_size (int): Maximum number of blocks of events queued for the worker thread
+                before writing blocks the producer.
+            mode (str): ``"w"`` to write a new file, ``"a"`` to append to an existing LHE XML file.
+                In append mode, ``init`` and the weights of ``header`` must match the existing file,
+                ``header``, ``comment`` and ``attributes`` are not written. The weights of the appended
+                events must be declared in the ``<initrwgt>`` block of the file, in its order for
+                ``<weights>`` blocks.
+        """
+        if flush_every < 0:
+            err = f"flush_every must be non-negative, got {flush_every}."
+            raise ValueError(err)
+        if queue_size < 1:
+            err = f"queue_size must be positive, got {queue_size}."
+            raise ValueError(err)
+        if mode not in ("w", "a"):
+            err = f"mode must be 'w' or 'a', got {mode!r}."
+            raise ValueError(err)
+        if lheformat is None:
+            lheformat = _detect_lheformat(target)
+        self.lheformat = lheformat
+        self.flush_every = flush_every
+        self.nevents = 0
+        self._closed = False
+        self._declared_weights: _DeclaredWeights | None = None
+        self._sink: _XMLSink | _LHEH5Sink | _BackgroundSink
+        if mode == "a":
+            if isinstance(lheformat, pylhe.LHEHDF5Format) or not isinstance(
+                target, (str, bytes, os.PathLike)
+            ):
+                err = "Append mode is only supported for LHE XML files given by path."
+                raise ValueError(err)
+            self._declared_weights = _check_appendable(target, init, header, lheformat)
+            _truncate_epilogue(target, lheformat.compress)
+            self._sink = _XMLSink(
+                target,
+                lheformat,
+                buffer_size,
+                append=True,
+                weight_ids=self._declared_weights.ids
+                if self._declared_weights is not None
+                else None,
+            )
+        elif isinstance(lheformat, pylhe.LHEHDF5Format):
+            self._sink = _LHEH5Sink(target, init, lheformat)
+        else:
+            lhef = pylhe.LesHouchesEvents(
+                init=init,
+                header=header if isinstance(header, pylhe.LHEHeader) else None,
+                comment=comment,
+                extra_attributes=dict(attributes or {}),
+            )
+            self._sink = _XMLSink(
+                target,
+                lheformat,
+                buffer_size,
+                weight_ids=pylhe._weight_ids(
+                    _parse_header(header) if isinstance(header, str) else header
+                ),
+            )
+            self._sink.write(
+                lhef._prologue(lheformat, header if isinstance(header, str) else None)
+            )
+        if background:
+            self._sink = _BackgroundSink(self._sink, queue_size)
+        if flush_after_init:
+            self._sink.flush()
+
+    @classmethod
+    def to_stream(
+        cls,
+        target: pylhe.PathLike | IO[str] | IO[bytes],
+        init: pylhe.LHEInit,
+        header: pylhe.LHEHeader | str | None = None,
+        lheformat: pylhe.LHEXMLFormat | None = None,
+        *,
+        comment: str | None = None,
+        attributes: dict[str, str] | None = None,
+        flush_every: int = 1,
+        flush_after_init: bool = True,
+    ) -> LHEWriter:
+        """
+        Open a writer for a consumer that reads the events while they are written.
+
+        Compared to the constructor, the output is flushed after the init block and after every event by default.
+
+        Args:
+            target: A named pipe, or a text or binary stream such as the ``stdin`` of a `subprocess.Popen`.
+            init (LHEInit): Init block of the file.
+            header (LHEHeader | str | None): Header block of the file, or the serialized header block.
+            lheformat (LHEXMLFormat | None): How to serialize the events, see the `LHEXMLFormat` class.
+            comment (str | None): Comment written before the header.
+            attributes (dict[str, str] | None): Extra attributes of the root ``LesHouchesEvents`` element.
+            flush_every (int): Flush the output after every ``flush_every`` events. Default is 1.
+            flush_after_init (bool): Flush the output after the header and init block. Default is True.
+
+        Returns:
+            LHEWriter: The writer.
+        """
+        return cls(
+            target,
+            init,
+            header,
+            lheformat,
+            comment=comment,
+            attributes=attributes,
+            flush_every=flush_every,
+            flush_after_init=flush_after_init,
+        )
+
+    @property
+    def closed(self) -> bool:
+        """Whether the writer has been closed."""
+        return self._closed
+
+    def _check_open(self) -> None:
+        if self._closed:
+            err = "Cannot write to a closed LHEWriter."
+            raise ValueError(err)
+
+    def write_event(self, event: pylhe.LHEEvent) -> None:
+        """
+        Write a single event.
+
+        Args:
+            event (LHEEvent): The event to write.
+        """
+        self._check_open()
+        if self._declared_weights is not None:
+            self._declared_weights.check(tuple(event.weights))
+        self._sink.write_events((event,))
+        self.nevents += 1
+        if self.flush_every and self.nevents % self.flush_every == 0:
+            self._sink.flush()
+
+    def write_events(self, events: Iterable[pylhe.LHEEvent]) -> None:
+        """
+        Write several events.
+
+        Args:
+            events (Iterable[LHEEvent]): The events to write.
+        """
+        self._check_open()
+        if self.flush_every:
+            for event in events:
+                self.write_event(event)
+            return
+        columns = _plain_columns(events)
+        if columns is not None:
+            # Written without building LHEEvent instances
+            if self._declared_weights is not None:
+                self._declared_weights.check(tuple(columns.weights))
+            self._sink.write_columns(columns)
+            self.nevents += columns.nevents
+            return
+        iterator = iter(events)
+        while block := list(islice(iterator, _EVENT_BLOCK_SIZE)):
+            if self._declared_weights is not None:
+                for event in block:
+                    self._declared_weights.check(tuple(event.weights))
+            self._sink.write_events(block)
+            self.nevents += len(block)
+
+    def write_columns(
+        self,
+        event_columns: Mapping[str, npt.ArrayLike],
+        particle_columns: Mapping[str, npt.ArrayLike],
+        offsets: npt.ArrayLike,
+        weights: Mapping[str, npt.ArrayLike] | None = None,
+    ) -> None:
+        """
+        Write events given as columns, see `write_columns`.
+
+        Args:
+            event_columns (Mapping[str, ArrayLike]): One array per `LHEEventInfo` field, one entry per event.
+            particle_columns (Mapping[str, ArrayLike]): One array per `LHEParticle` field, one entry per particle.
+            offsets (ArrayLike): Start of the particles of each event in the particle columns,
+                followed by the end of those of the last event.
+            weights (Mapping[str, ArrayLike] | None): One array of weights per weight ID, one entry per event.
+        """
+        self._check_open()
+        columns = _ArrayColumns(event_columns, particle_columns, offsets, weights)
+        if self._declared_weights is not None:
+            self._declared_weights.check(tuple(columns.weights))
+        self._sink.write_columns(columns)
+        self.nevents += columns.nevents
+        if self.flush_every:
+            self._sink.flush()
+
+    def flush(self) -> None:
+        """Write the buffered output to the target and flush it, waiting for the worker thread in background mode."""
+        if not self._closed:
+            self._sink.flush()
+            if isinstance(self._sink, _BackgroundSink):
+                self._sink.join()
+
+    def close(self) -> None:
+        """
+        Write the closing ``</LesHouchesEvents>`` tag and close the output. Calling it again has no effect.
+
+        In background mode, waits for the worker thread and raises its error, if any.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._sink.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        elif not self._closed:
+            self._closed = True
+            # Errors of closing the incomplete output must not mask the exception in flight
+            with contextlib.suppress(Exception):
+                self._sink.abort()
+
+
+class _XMLSink:
+    """Block-buffered LHE XML output."""
+
+    __slots__ = (
+        "_buffer",
+        "_buffered",
+        "_close_stream",
+        "_serializer",
+        "_stream",
+        "_write_epilogue",
+        "buffer_size",
+        "lheformat",
+        "weight_ids",
+    )
+
+    def __init__(
+        self,
+        target: pylhe.PathLike | IO[str] | IO[bytes],
+        lheformat: pylhe.LHEXMLFormat,
+        buffer_size: int,
+        append: bool = False,
+        weight_ids: tuple[str, ...] | None = None,
+        separate_epilogue: bool = False,
+    ) -> None:
+        self.lheformat = lheformat
+        # Weight IDs declared in the <initrwgt> block of the output, see `pylhe._EventSerializer.weight_order`
+        self.weight_ids = weight_ids
+        self.buffer_size = buffer_size
+        self._serializer = pylhe._event_serializer(lheformat)
+        self._buffer: list[str] = []
+        self._buffered = 0
+        self._stream, self._write_epilogue, self._close_stream = _open_target(
+            target, lheformat, append, separate_epilogue
+        )
+
+    def write(self, text: str) -> None:
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self._drain()
+
+    def write_events(self, events: Iterable[pylhe.LHEEvent]) -> None:
+        self.write(self._serializer.events(events, self.weight_ids))
+
+    def write_columns(self, columns: _ArrayColumns) -> None:
+        columns.check_fields(
+            self._serializer.eventinfo.names, self._serializer.particle.names
+        )
+        formatter = _ColumnFormatter(
+            self._serializer,
+            self._serializer.weight_order(tuple(columns.weights), self.weight_ids),
+        )
+        for start in range(0, columns.nevents, _COLUMN_BATCH_SIZE):
+            self.write(
+                formatter.format(
+                    columns, start, min(start + _COLUMN_BATCH_SIZE, columns.nevents)
+                )
+            )
+
+    def _drain(self) -> None:
+        if self._buffer:
+            self._stream.write("".join(self._buffer))
+            self._buffer.clear()
+            self._buffered = 0
+
+    def flush(self) -> None:
+        self._drain()
+        self._stream.flush()
+
+    def close(self) -> None:
+        try:
+            self._drain()
+            self._write_epilogue()
+        finally:
+            self._close_stream()
+
+    def abort(self) -> None:
+        """Close the output without the closing tag."""
+        try:
+            self._drain()
+        finally:
+            self._close_stream()
+
+
+class _LHEH5Sink:
+    """LHEH5 output, buffered in chunks of rows by `lheh5._EventWriter`."""
+
+    __slots__ = ("_file", "_writer")
+
+    def __init__(
+        self,
+        target: pylhe.PathLike | IO[str] | IO[bytes],
+        init: pylhe.LHEInit,
+        lheformat: pylhe.LHEHDF5Format,
+    ) -> None:
+        self._file = h5py.File(target, "w")
+        try:
+            self._writer = lheh5._EventWriter(self._file, init, lheformat)
+        except BaseException:
+            self._file.close()
+            raise
+
+    def write_events(self, events: Iterable[pylhe.LHEEvent]) -> None:
+        for event in events:
+            self._writer.write_event(event)
+
+    def write_columns(self, columns: _ArrayColumns) -> None:
+        columns.check_fields(
+            pylhe.columnar.EVENTINFO_FIELDS, pylhe.columnar.PARTICLE_FIELDS
+        )
+        self._writer.write_columns(
+            columns.eventinfo, columns.particles, columns.offsets
+        )
+
+    def flush(self) -> None:
+        self._writer.flush()
+        self._file.flush()
+
+    def close(self) -> None:
+        try:
+            self._writer.close()
+        finally:
+            self._file.close()
+
+    def abort(self) -> None:
+        """Close the file without the version dataset."""
+        try:
+            self._writer.flush()
+        finally:
+            self._file.close()
+
+
+def write_columns(
+    target: pylhe.PathLike | IO[str] | IO[bytes],
+    init: pylhe.LHEInit,
+    header: pylhe.LHEHeader | str | None,
+    event_columns: Mapping[str, npt.ArrayLike],
+    particle_columns: Mapping[str, npt.ArrayLike],
+    offsets: npt.ArrayLike,
+    weights: Mapping[str, npt.ArrayLike] | None = None,
+    lheformat: pylhe.LHEOutputFormat | None = None,
+    *,
+    comment: str | None = None,
+    attributes: dict[str, str] | None = None,
+) -> None:
+    """
+    Write events given as NumPy columns to an LHE XML or LHEH5 file, without creating `LHEEvent` objects.
+
+    For LHE XML, the events are formatted in batches with the templates of the `LHEXMLFormat`,
+    each batch with a single ``%`` formatting operation where the templates allow it. The output
+    is the same as writing the equivalent `LHEEvent` objects, without optional lines and scales.
+    For LHEH5, the columns are appended to the event and particle datasets as a whole,
+    storing only the nominal ``weight``.
+
+    The event with index ``i`` has the particles ``offsets[i]:offsets[i + 1]`` of the particle columns,
+    as in the ``offsets`` of an Awkward array. The ``nparticles`` event column is optional, it is
+    taken from the offsets if missing. Every event has all of the ``weights``, which are written
+    as ``<rwgt>`` or ``<weights>`` blocks depending on the `LHEWeightFormat`.
+
+    Example::
+
+        pylhe.write_columns(
+            "events.lhe.gz",
+            init,
+            header,
+            event_columns={"pid": pid, "weight": weight, "scale": scale, "aqed": aqed, "aqcd": aqcd},
+            particle_columns={"id": pdgid, "status": status, ..., "spin": spin},
+            offsets=offsets,
+            weights={"1001": w1001, "1002": w1002},
+        )
+
+    Args:
+        target: Path of the output file, or a text or binary stream, see `LHEWriter`.
+        init (LHEInit): Init block of the file.
+        header (LHEHeader | str | None): Header block of the file, or the serialized header block.
+        event_columns (Mapping[str, ArrayLike]): One array per `LHEEventInfo` field, one entry per event.
+        particle_columns (Mapping[str, ArrayLike]): One array per `LHEParticle` field, one entry per particle.
+        offsets (ArrayLike): Start of the particles of each event in the particle columns,
+            followed by the end of those of the last event.
+        weights (Mapping[str, ArrayLike] | None): One array of weights per weight ID, one entry per event.
+        lheformat (LHEOutputFormat | None): How to serialize the events, see the `LHEOutputFormat` class.
+            Default is detected from the file name suffix for paths and `DEFAULT_FORMAT` for streams.
+        comment (str | None): Comment written before the header. Not stored in LHEH5 files.
+        attributes (dict[str, str] | None): Extra attributes of the root ``LesHouchesEvents`` element.
+            Not stored in LHEH5 files.
+    """
+    with LHEWriter(
+        target, init, header, lheformat, comment=comment, attributes=attributes
+    ) as writer:
+        writer.write_columns(event_columns, particle_columns, offsets, weights)
+
+
+class _ArrayColumns:
+    """Validated event, particle and weight columns of `write_columns`."""
+
+    __slots__ = ("eventinfo", "nevents", "offsets", "particles", "weights")
+
+    def __init__(
+        self,
+        event_columns: Mapping[str, npt.ArrayLike],
+        particle_columns: Mapping[str, npt.ArrayLike],
+        offsets: npt.ArrayLike,
+        weights: Mapping[str, npt.ArrayLike] | None,
+    ) -> None:
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if self.offsets.ndim != 1 or len(self.offsets) == 0:
+            err = "offsets must be a one-dimensional array with one more entry than events."
+            raise ValueError(err)
+        counts = np.diff(self.offsets)
+        if np.any(counts < 0):
+            err = "offsets must be non-decreasing."
+            raise ValueError(err)
+        self.nevents = len(counts)
+        self.eventinfo = {
+            "nparticles": counts,
+            **_columns(event_columns, self.nevents, "event"),
+        }
+        if not np.array_equal(self.eventinfo["nparticles"], counts):
+            err = "The nparticles event column does not match the offsets."
+            raise ValueError(err)
+        self.particles = _columns(particle_columns, None, "particle")
+        for name, column in self.particles.items():
+            if len(column) < self.offsets[-1]:
+                err = f"The particle column {name!r} has {len(column)} entries, but the offsets end at {self.offsets[-1]}."
+                raise ValueError(err)
+        self.weights = {
+            str(key): column
+            for key, column in _columns(weights or {}, self.nevents, "weight").items()
+        }
+
+    def check_fields(
+        self, eventinfo_fields: Iterable[str], particle_fields: Iterable[str]
+    ) -> None:
+        """Raise a ValueError if columns of the given fields are missing."""
+        missing = [name for name in eventinfo_fields if name not in self.eventinfo] + [
+            name for name in particle_fields if name not in self.particles
+        ]
+        if missing:
+            err = f"Missing columns for the fields {missing}."
+            raise ValueError(err)
+
+
+def _plain_columns(events: Iterable[pylhe.LHEEvent]) -> _ArrayColumns | None:
+    """
+    Return the columns of `LHEEventColumns` that can be written with `write_columns`.
+
+    These are events with consistent ``nparticles`` and weights for every event, without
+    scales, attributes or optional lines.
+    """
+    if (
+        not isinstance(events, pylhe.LHEEventColumns)
+        or not events.weights.regular
+        or events.scales.columns
+        or events.attributes
+        or events.optional
+        or not np.array_equal(events.eventinfo["nparticles"], np.diff(events.offsets))
+    ):
+        return None
+    return _ArrayColumns(
+        events.eventinfo, events.particles, events.offsets, events.weights.columns
+    )
+
+
+def _columns(
+    columns: Mapping[str, npt.ArrayLike], length: int | None, kind: str
+) -> dict[str, npt.NDArray[Any]]:
+    """Convert columns to one-dimensional arrays of the dtype of their field, checking their length."""
+    arrays: dict[str, npt.NDArray[Any]] = {}
+    for name, column in columns.items():
+        dtype = np.float64 if kind == "weight" else pylhe.columnar._dtype(name)
+        array = np.asarray(column, dtype=dtype)
+        if array.ndim != 1 or (length is not None and len(array) != length):
+            expected = "one entry per event" if length is not None else "one dimension"
+            err = f"The {kind} column {name!r} must have {expected}, got shape {array.shape}."
+            raise ValueError(err)
+        arrays[name] = array
+    return arrays
+
+
+class _ColumnFormatter:
+    """
+    Formats batches of events given as columns in LHE XML.
+
+    With printf-style templates, the values of all events of a batch are scattered
+    into one array in the order of their fields in the joined event templates and
+    formatted with a single ``%`` operation.
+    """
+
+    __slots__ = ("_blocks", "_eventinfo", "_particle", "_weight_ids", "_weights")
+
+    def __init__(
+        self, serializer: pylhe._EventSerializer, weight_ids: tuple[str, ...]
+    ) -> None:
+        self._eventinfo = serializer.eventinfo
+        self._particle = serializer.particle
+        if serializer.weights is pylhe.LHEWeightFormat.NONE:
+            weight_ids = ()
+        self._weight_ids = weight_ids
+        self._weights = serializer.weights_template(weight_ids) if weight_ids else ""
+        # printf templates of an event, by number of particles
+        self._blocks: dict[int, str] = {}
+
+    def format(self, columns: _ArrayColumns, start: int, stop: int) -> str:
+        """Format the events ``start:stop``, each followed by a newline."""
+        offsets = columns.offsets[start : stop + 1]
+        eventinfo = [
+            columns.eventinfo[name][start:stop] for name in self._eventinfo.names
+        ]
+        particles = [
+            columns.particles[name][offsets[0] : offsets[-1]]
+            for name in self._particle.names
+        ]
+        weights = [columns.weights[key][start:stop] for key in self._weight_ids]
+        if self._eventinfo.printf is None or self._particle.printf is None:
+            return self._format_rows(np.diff(offsets), eventinfo, particles, weights)
+        return self._format_printf(offsets, eventinfo, particles, weights)
+
+    def _block(self, nparticles: int) -> str:
+        block = self._blocks.get(nparticles)
+        if block is None:
+            assert self._eventinfo.printf is not None
+            assert self._particle.printf is not None
+            block = self._blocks.setdefault(
+                nparticles,
+                "<event>\n"
+                + self._eventinfo.printf
+                + "\n"
+                + "\n".join([self._particle.printf] * nparticles)
+                + "\n"
+                + self._weights
+                + "</event>\n",
+            )
+        return block
+
+    def _format_printf(
+        self,
+        offsets: npt.NDArray[np.int64],
+        eventinfo: list[npt.NDArray[Any]],
+        particles: list[npt.NDArray[Any]],
+        weights: list[npt.NDArray[Any]],
+    ) -> str:
+        counts = np.diff(offsets)
+        nevents = len(counts)
+        neventinfo, nparticle, nweights = len(eventinfo), len(particles), len(weights)
+        # Layout of the values of an event: event info, particles, weights
+        sizes = neventinfo + nparticle * counts + nweights
+        begins = np.cumsum(sizes) - sizes
+        values = np.empty(int(sizes.sum()), dtype=np.float64)
+        values[begins[:, None] + np.arange(neventinfo)] = _stack(eventinfo, nevents)
+        event_index = np.repeat(np.arange(nevents), counts)
+        local_index = (
+            np.arange(len(event_index)) - (offsets[:-1] - offsets[0])[event_index]
+        )
+        values[
+            (begins[event_index] + neventinfo + nparticle * local_index)[:, None]
+            + np.arange(nparticle)
+        ] = _stack(particles, len(event_index))
+        values[
+            (begins + neventinfo + nparticle * counts)[:, None] + np.arange(nweights)
+        ] = _stack(weights, nevents)
+        template = "".join([self._block(n) for n in counts.tolist()])
+        # %d formats the integer fields stored as floats like integers
+        return template % tuple(values.tolist())
+
+    def _format_rows(
+        self,
+        counts: npt.NDArray[np.int64],
+        eventinfo: list[npt.NDArray[Any]],
+        particles: list[npt.NDArray[Any]],
+        weights: list[npt.NDArray[Any]],
+    ) -> str:
+        eventinfo_rows = _rows(eventinfo, len(counts))
+        particle_rows = _rows(particles, int(counts.sum()))
+        weight_rows = _rows(weights, len(counts))
+        eventinfo_template = self._eventinfo.positional
+        particle_template = self._particle.positional
+        parts = []
+        first = 0
+        for i, n in enumerate(counts.tolist()):
+            parts.append(
+                "<event>\n"
+                + eventinfo_template.format(*eventinfo_rows[i])
+                + "\n"
+                + "\n".join(
+                    [
+                        particle_template.format(*row)
+                        for row in particle_rows[first : first + n]
+                    ]
+                )
+                + "\n"
+                + (self._weights % weight_rows[i] if self._weights else "")
+                + "</event>\n"
+            )
+            first += n
+        return "".join(parts)
+
+
+def _stack(columns: list[npt.NDArray[Any]], length: int) -> npt.NDArray[np.float64]:
+    """Stack columns of ``length`` entries into a float array with one row per entry."""
+    if not columns:
+        return np.empty((length, 0), dtype=np.float64)
+    return np.column_stack(columns).astype(np.float64, copy=False)
+
+
+def _rows(
+    columns: list[npt.NDArray[Any]], length: int
+) -> list[tuple[int | float, ...]]:
+    """Convert columns of ``length`` entries into rows of Python numbers."""
+    if not columns:
+        return [()] * length
+    return list(zip(*[column.tolist() for column in columns], strict=True))
+
+
+class _BackgroundSink:
+    """
+    Runs the calls of another sink in a worker thread, see the ``background`` option of `LHEWriter`.
+
+    Events are handed over in blocks through a bounded queue. After an error, the worker
+    skips the remaining calls except for closing the sink and the error is raised by
+    `join` and `close` in the producing thread.
+    """
+
+    __slots__ = ("_error", "_events", "_queue", "_sink", "_thread")
+
+    def __init__(self, sink: _XMLSink | _LHEH5Sink, queue_size: int) -> None:
+        self._sink = sink
+        self._events: list[pylhe.LHEEvent] = []
+        self._error: BaseException | None = None
+        self._queue: queue.Queue[
+            tuple[Callable[..., None], tuple[Any, ...], bool] | None
+        ] = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(
+            target=self._work, name="pylhe-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _work(self) -> None:
+        while (item := self._queue.get()) is not None:
+            method, args, always = item
+            if self._error is None or always:
+                try:
+                    method(*args)
+                except BaseException as exc:  # noqa: BLE001  # re-raised in the producing thread
+                    if self._error is None:
+                        self._error = exc
+            self._queue.task_done()
+        self._queue.task_done()
+
+    def _put(
+        self, method: Callable[..., None], *args: Any, always: bool = False
+    ) -> None:
+        self._queue.put((method, args, always))
+
+    def _submit_events(self) -> None:
+        if self._events:
+            events, self._events = self._events, []
+            self._put(self._sink.write_events, events)
+
+    def _raise(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def write(self, text: str) -> None:
+        assert isinstance(self._sink, _XMLSink)
+        self._submit_events()
+        self._put(self._sink.write, text)
+
+    def write_events(self, events: Iterable[pylhe.LHEEvent]) -> None:
+        self._events.extend(events)
+        if len(self._events) >= _EVENT_BLOCK_SIZE:
+            self._submit_events()
+
+    def write_columns(self, columns: _ArrayColumns) -> None:
+        self._submit_events()
+        self._put(self._sink.write_columns, columns)
+
+    def flush(self) -> None:
+        self._submit_events()
+        self._put(self._sink.flush)
+
+    def join(self) -> None:
+        """Wait until the worker has processed all calls and raise its error, if any."""
+        self._queue.join()
+        self._raise()
+
+    def close(self) -> None:
+        self._submit_events()
+        self._put(self._sink.close, always=True)
+        self._queue.put(None)
+        self._thread.join()
+        self._raise()
+
+    def abort(self) -> None:
+        """Stop the worker and close the sink without its epilogue, ignoring the error of the worker."""
+        self._submit_events()
+        self._put(self._sink.abort, always=True)
+        self._queue.put(None)
+        self._thread.join()
+
+
+def _detect_lheformat(
+    target: pylhe.PathLike | IO[str] | IO[bytes],
+) -> pylhe.LHEOutputFormat:
+    """Detect the output format from the file name suffix of a path, defaulting to `DEFAULT_FORMAT` for streams."""
+    if not isinstance(target, (str, bytes, os.PathLike)):
+        return pylhe.DEFAULT_FORMAT
+    return pylhe._parse_lheformat_from_filepath(target)
+
+
+def _open_target(
+    target: pylhe.PathLike | IO[str] | IO[bytes],
+    lheformat: pylhe.LHEXMLFormat,
+    append: bool = False,
+    separate_epilogue: bool = False,
+) -> tuple[IO[str], Callable[[], None], Callable[[], None]]:
+    """
+    Open the text stream that the events are written to.
+
+    Compressed output is a single gzip member. When appending or with ``separate_epilogue``, the
+    closing ``</LesHouchesEvents>`` tag is written in a separate gzip member instead, which
+    `_truncate_epilogue` removes cheaply on the next append.
+
+    Returns:
+        tuple[IO[str], Callable[[], None], Callable[[], None]]: The text stream, a function
+            writing the closing tag and a function closing the stream, which leaves
+            streams passed in by the caller open.
+    """
+    if isinstance(target, (str, bytes, os.PathLike)):
+        if lheformat.compress:
+            return _open_gzip(
+                open(target, "ab" if append else "wb"),
+                owned=True,
+                separate_epilogue=append or separate_epilogue,
+            )
+        stream = open(target, "a" if append else "w")
+
+        def _write_epilogue() -> None:
+            stream.write(pylhe._EPILOGUE)
+            stream.flush()
+
+        return stream, _write_epilogue, stream.close
+    if not isinstance(target, (io.RawIOBase, io.BufferedIOBase)):
+        if lheformat.compress:
+            err = "Compressed output requires a binary stream."
+            raise ValueError(err)
+        text: IO[str] = target  # type: ignore[assignment]
+
+        def _write_text_epilogue() -> None:
+            text.write(pylhe._EPILOGUE)
+
+        return text, _write_text_epilogue, text.flush
+    if lheformat.compress:
+        return _open_gzip(target, owned=False)
+
+    wrapper = io.TextIOWrapper(target, encoding="utf-8")
+
+    def _write_wrapper_epilogue() -> None:
+        wrapper.write(pylhe._EPILOGUE)
+
+    def _close() -> None:
+        wrapper.flush()
+        wrapper.detach()
+
+    return wrapper, _write_wrapper_epilogue, _close
+
+
+def _open_gzip(
+    raw: IO[bytes], owned: bool, separate_epilogue: bool = False
+) -> tuple[IO[str], Callable[[], None], Callable[[], None]]:
+    """
+    Open a gzip text stream on ``raw`` for `_open_target`, closing ``raw`` only if ``owned``.
+
+    With ``separate_epilogue``, the closing tag is written in a separate gzip member.
+    """
+    compressed = gzip.GzipFile(fileobj=raw, mode="wb")
+    wrapper = io.TextIOWrapper(compressed, encoding="utf-8")
+
+    def _write_epilogue() -> None:
+        if not separate_epilogue:
+            wrapper.write(pylhe._EPILOGUE)
+            return
+        # Ends the gzip member of the events, leaving the raw stream open
+        wrapper.close()
+        raw.write(gzip.compress(pylhe._EPILOGUE.encode(), mtime=0))
+
+    def _close() -> None:
+        try:
+            wrapper.close()
+        finally:
+            if owned:
+                raw.close()
+            else:
+                raw.flush()
+
+    return wrapper, _write_epilogue, _close
+
+
+# Number of bytes at the end of a file searched for the closing tag
+_EPILOGUE_SEARCH_SIZE = 4096
+# Number of bytes read at once when scanning and compressing gzip members
+_GZIP_CHUNK_SIZE = 1 << 16
+
+
+def _check_appendable(
+    filepath: pylhe.PathLike,
+    init: pylhe.LHEInit,
+    header: pylhe.LHEHeader | str | None,
+    lheformat: pylhe.LHEXMLFormat,
+) -> _DeclaredWeights | None:
+    """
+    Check that the init block and the weights of an existing LHE XML file match the appended events.
+
+    Returns the check of the weights of the appended events, None if no weights are written.
+    """
+    if isinstance(header, str):
+        header = _parse_header(header)
+    existing = pylhe.LesHouchesEvents.fromfile(filepath)
+    close = getattr(existing.events, "close", None)
+    if close is not None:
+        close()
+    if existing.init.tolhe(lheformat) != init.tolhe(lheformat):
+        err = f"The init block does not match the one of {os.fsdecode(filepath)!r}."
+        raise ValueError(err)
+    existing_initrwgt = (
+        existing.header.initrwgt if existing.header is not None else pylhe.LHEInitRWGT()
+    )
+    if header is not None and existing_initrwgt.tolhe(
+        lheformat
+    ) != header.initrwgt.tolhe(lheformat):
+        err = f"The initrwgt block does not match the one of {os.fsdecode(filepath)!r}."
+        raise ValueError(err)
+    if (
+        lheformat.version is not pylhe.LHEVersion.V3
+        or lheformat.weights is pylhe.LHEWeightFormat.NONE
+    ):
+        return None
+    return _DeclaredWeights(
+        tuple(weight.id for weight in existing_initrwgt.iter_weights()),
+        ordered=lheformat.weights is pylhe.LHEWeightFormat.WEIGHTS,
+        filepath=os.fsdecode(filepath),
+    )
+
+
+# Maximum number of distinct weight ID tuples remembered as checked by `_DeclaredWeights`
+_CHECKED_WEIGHTS_CACHE_SIZE = 64
+
+
+class _DeclaredWeights:
+    """
+    Check the weight IDs of events appended to a file against its ``<initrwgt>`` block.
+
+    ``<weights>`` blocks are read by position, so their IDs must be the first declared weights in order.
+    """
+
+    __slots__ = ("_checked", "_declared", "filepath", "ids", "ordered")
+
+    def __init__(self, ids: tuple[str, ...], ordered: bool, filepath: str) -> None:
+        self.ids = ids
+        self._declared = frozenset(ids)
+        self.ordered = ordered
+        self.filepath = filepath
+        self._checked: set[tuple[str, ...]] = set()
+
+    def check(self, ids: tuple[str, ...]) -> None:
+        """Raise a ValueError if the weight ``ids`` of an event are not declared in the file."""
+        if ids in self._checked:
+            return
+        if undeclared := [key for key in ids if key not in self._declared]:
+            err = f"The weights {undeclared} are not declared in the initrwgt block of {self.filepath!r}."
+            raise ValueError(err)
+        if self.ordered and ids != self.ids[: len(ids)]:
+            err = f"The weights {list(ids)} do not match the order of the weights {list(self.ids)} declared in {self.filepath!r}."
+            raise ValueError(err)
+        if len(self._checked) < _CHECKED_WEIGHTS_CACHE_SIZE:
+            self._checked.add(ids)
+
+
+def _parse_header(text: str) -> pylhe.LHEHeader:
+    """Parse a serialized header block."""
+    context = ET.iterparse(io.StringIO(text), events=["start", "end"])
+    _, root = next(context)
+    return pylhe.LHEHeader._fromcontext(root, context)
+
+
+def _truncate_epilogue(filepath: pylhe.PathLike, compress: bool) -> None:
+    """
+    Remove the closing ``</LesHouchesEvents>`` tag at the end of an LHE XML file.
+
+    For gzip-compressed files, a last gzip member containing only the closing tag is removed.
+    Otherwise, the last member is compressed again without the closing tag.
+    """
+    err = f"Cannot append to {os.fsdecode(filepath)!r}: the closing </LesHouchesEvents> tag is not found at the end of the file."
+    with open(filepath, "r+b") as f:
+        start = max(0, f.seek(0, os.SEEK_END) - _EPILOGUE_SEARCH_SIZE)
+        f.seek(start)
+        tail = f.read()
+        if not compress:
+            offset = _epilogue_offset(tail)
+            if offset is None:
+                raise ValueError(err)
+            f.truncate(start + offset)
+            return
+        offset = _gzip_epilogue_offset(tail)
+        if offset is not None:
+            f.truncate(start + offset)
+            return
+        try:
+            start = _gzip_last_member_offset(f)
+            f.seek(start)
+            with tempfile.TemporaryFile() as member:
+                if not _recompress_without_epilogue(f, member):
+                    raise ValueError(err)
+                f.seek(start)
+                f.truncate()
+                member.seek(0)
+                shutil.copyfileobj(member, f)
+        except (OSError, EOFError, zlib.error) as exc:
+            msg = f"Cannot append to {os.fsdecode(filepath)!r}: {exc}"
+            raise ValueError(msg) from exc
+
+
+def _gzip_last_member_offset(f: IO[bytes]) -> int:
+    """Return the offset of the last gzip member of a file, decompressing all members to find their ends."""
+    f.seek(0)
+    start = position = 0
+    decompressor = None
+    while chunk := f.read(_GZIP_CHUNK_SIZE):
+        position += len(chunk)
+        while chunk:
+            if decompressor is None:
+                start = position - len(chunk)
+                decompressor = zlib.decompressobj(wbits=31)
+            decompressor.decompress(chunk)
+            if not decompressor.eof:
+                break
+            chunk = decompressor.unused_data
+            decompressor = None
+    return start
+
+
+def _recompress_without_epilogue(source: IO[bytes], target: IO[bytes]) -> bool:
+    """
+    Compress the content of the gzip member at the position of ``source`` into ``target`` without the closing tag.
+
+    Returns False if the content does not end with the closing tag.
+    """
+    tail = b""
+    with (
+        gzip.GzipFile(fileobj=source, mode="rb") as decompressed,
+        gzip.GzipFile(fileobj=target, mode="wb") as compressed,
+    ):
+        while block := decompressed.read(_GZIP_CHUNK_SIZE):
+            data = tail + block
+            compressed.write(data[:-_EPILOGUE_SEARCH_SIZE])
+            tail = data[-_EPILOGUE_SEARCH_SIZE:]
+        offset = _epilogue_offset(tail)
+        if offset is None:
+            return False
+        compressed.write(tail[:offset])
+    return True
+
+
+def _epilogue_offset(tail: bytes) -> int | None:
+    offset = tail.rfind(pylhe._EPILOGUE.encode())
+    if offset < 0 or tail[offset + len(pylhe._EPILOGUE) :].strip():
+        return None
+    return offset
+
+
+def _gzip_epilogue_offset(tail: bytes) -> int | None:
+    """Return the offset of the last gzip member if it contains only the closing tag."""
+    for match in reversed(
+        list(re.finditer(re.escape(pylhe._GZIP_MAGIC + b"\x08"), tail))
+    ):
+        decompressor = zlib.decompressobj(wbits=31)
+        try:
+            data = decompressor.decompress(tail[match.start() :])
+        except zlib.error:
+            continue
+        if (
+            decompressor.eof
+            and not decompressor.unused_data
+            and data.strip() == pylhe._EPILOGUE.encode()
+        ):
+            return match.start()
+    return None
@@ -0,0 +1,183 @@
+import numpy as np
+import pytest
+
+import pylhe
+
+PROLOGUE = """<LesHouchesEvents version="3.0">
+<header>
+<MGVersion>
+3.5.0
+</MGVersion>
+<initrwgt>
+<weightgroup name="scale_variation" combine="envelope">
+<weight id="1001">muR=1 muF=1</weight>
+<weight id="1002">muR=2 muF=1</weight>
+</weightgroup>
+</initrwgt>
+</header>
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+"""
+
+EVENT = """<event>
+ 1      1 +{weight:.7e} 9.11884000e+01 -1.0e+00 -1.0e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<rwgt>
+<wgt id='1001'> 1.00000e+00</wgt>
+<wgt id='1002'> 2.00000e+00</wgt>
+</rwgt>
+</event>
+"""
+
+WEIGHTS_EVENT = """<event>
+ 1      1 +{weight:.7e} 9.11884000e+01 -1.0e+00 -1.0e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<weights>
+1.0
+2.0
+</weights>
+</event>
+"""
+
+BARE_EVENT = """<event>
+ 1      1 +{weight:.7e} 9.11884000e+01 -1.0e+00 -1.0e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+</event>
+"""
+
+EVENTS = [EVENT, WEIGHTS_EVENT, BARE_EVENT, EVENT]
+
+
+@pytest.fixture
+def lhe_path(tmp_path):
+    path = tmp_path / "events.lhe"
+    path.write_text(
+        PROLOGUE
+        + "".join(event.format(weight=i + 1.0) for i, event in enumerate(EVENTS))
+        + "</LesHouchesEvents>"
+    )
+    return path
+
+
+@pytest.mark.parametrize("suffix", [".lhe", ".lhe.gz"])
+def test_add_weights_array(tmp_path, lhe_path, suffix):
+    out_path = tmp_path / f"out{suffix}"
+    values = np.array([[10.0, 20.0], [11.0, 21.0], [12.0, 22.0], [13.0, 23.0]])
+    pylhe.add_weights(
+        lhe_path, out_path, ["eft_1", "eft_2"], values, group="eft", background=False
+    )
+
+    lhef = pylhe.LesHouchesEvents.fromfile(out_path)
+    entries = lhef.header.initrwgt.entries
+    assert [entry.name for entry in entries] == ["scale_variation", "eft"]
+    assert [weight.id for weight in entries[1].weights] == ["eft_1", "eft_2"]
+    events = list(lhef.events)
+    assert [event.weights for event in events] == [
+        {"1001": 1.0, "1002": 2.0, "eft_1": 10.0, "eft_2": 20.0},
+        {"1001": 1.0, "1002": 2.0, "eft_1": 11.0, "eft_2": 21.0},
+        {"eft_1": 12.0, "eft_2": 22.0},
+        {"1001": 1.0, "1002": 2.0, "eft_1": 13.0, "eft_2": 23.0},
+    ]
+    # The event lines are copied as they are
+    assert [event.eventinfo.weight for event in events] == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_add_weights_callable(tmp_path, lhe_path):
+    out_path = tmp_path / "out.lhe"
+    batches = []
+
+    def double(events):
+        batches.append(len(events))
+        return 2 * events.eventinfo.weight
+
+    pylhe.add_weights(lhe_path, out_path, ["double"], double, batch_size=3)
+
+    assert batches == [3, 1]
+    lhef = pylhe.LesHouchesEvents.fromfile(out_path)
+    assert [weight.id for weight in lhef.header.initrwgt.iter_weights()] == [
+        "1001",
+        "1002",
+        "double",
+    ]
+    assert [event.weights["double"] for event in lhef.events] == [2.0, 4.0, 6.0, 8.0]
+
+
+def test_add_weights_without_initrwgt(tmp_path):
+    path = tmp_path / "events.lhe"
+    path.write_text(
+        PROLOGUE[: PROLOGUE.index("<header>")]
+        + PROLOGUE[PROLOGUE.index("<init>") :]
+        + BARE_EVENT.format(weight=1.0)
+        + "</LesHouchesEvents>"
+    )
+    out_path = tmp_path / "out.lhe"
+    pylhe.add_weights(
+        path,
+        out_path,
+        ["a"],
+        [5.0],
+        descriptions=["cW=1"],
+        lheformat=pylhe.WEIGHTS_FORMAT,
+    )
+
+    lhef = pylhe.LesHouchesEvents.fromfile(out_path)
+    assert lhef.header.initrwgt.entries == [pylhe.LHEInitRWGTWeight("a", "cW=1")]
+    assert "<weights>" in out_path.read_text()
+    assert [event.weights for event in lhef.events] == [{"a": 5.0}]
+
+
+def test_add_weights_lheh5(tmp_path, lhe_path):
+    h5_path = tmp_path / "events.hdf5"
+    pylhe.LesHouchesEvents.fromfile(lhe_path).tofile(h5_path)
+    out_path = tmp_path / "out.hdf5"
+
+    pylhe.add_weights(
+        h5_path,
+        out_path,
+        ["double"],
+        lambda events: 2 * events.eventinfo.weight,
+        batch_size=3,
+    )
+    pylhe.add_weights(out_path, tmp_path / "more.hdf5", ["a", "b"], np.ones((4, 2)))
+
+    events = list(pylhe.LesHouchesEvents.fromfile(tmp_path / "more.hdf5").events)
+    assert [event.weights for event in events] == [
+        {"double": 2.0 * (i + 1), "a": 1.0, "b": 1.0} for i in range(4)
+    ]
+    assert [event.particles for event in events] == [
+        event.particles for event in pylhe.LesHouchesEvents.fromfile(h5_path).events
+    ]
+
+
+def test_add_weights_validation(tmp_path, lhe_path):
+    out_path = tmp_path / "out.lhe"
+    with pytest.raises(ValueError, match="already declared"):
+        pylhe.add_weights(lhe_path, out_path, ["1001"], np.ones(4))
+    with pytest.raises(ValueError, match="Duplicate"):
+        pylhe.add_weights(lhe_path, out_path, ["a", "a"], np.ones((4, 2)))
+    with pytest.raises(ValueError, match="shape"):
+        pylhe.add_weights(lhe_path, out_path, ["a", "b"], np.ones(4))
+    with pytest.raises(ValueError, match="has more events"):
+        pylhe.add_weights(lhe_path, out_path, ["a"], np.ones(3))
+    with pytest.raises(ValueError, match="has 4 events"):
+        pylhe.add_weights(lhe_path, out_path, ["a"], np.ones(5))
+    with pytest.raises(ValueError, match="format of its input"):
+        pylhe.add_weights(lhe_path, tmp_path / "out.hdf5", ["a"], np.ones(4))
+
+
+def test_add_weights_existing_group(tmp_path, lhe_path):
+    out_path = tmp_path / "out.lhe"
+    pylhe.add_weights(lhe_path, out_path, ["1003"], np.ones(4), group="scale_variation")
+
+    entries = pylhe.LesHouchesEvents.fromfile(out_path).header.initrwgt.entries
+    assert [weight.id for weight in entries[0].weights] == ["1001", "1002", "1003"]
+    assert entries[0].combine == "envelope"
+
+    # Weights cannot be inserted before the weights of later entries
+    pylhe.add_weights(lhe_path, out_path, ["a"], np.ones(4))
+    with pytest.raises(ValueError, match="not the last entry"):
+        pylhe.add_weights(
+            out_path, tmp_path / "more.lhe", ["b"], np.ones(4), group="scale_variation"
+        )
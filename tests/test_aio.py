@@ -0,0 +1,74 @@
+import asyncio
+import gzip
+
+import pytest
+
+import pylhe
+import pylhe.aio
+
+HEADER = """<LesHouchesEvents version="3.0">
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+"""
+
+EVENT = """<event>
+  2      1 +{weight:.7e}  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+</event>
+"""
+
+NEVENTS = 600
+
+
+@pytest.fixture(params=["events.lhe", "events.lhe.gz"])
+def lhe_path(request, tmp_path):
+    path = tmp_path / request.param
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "wt") as f:
+        f.write(HEADER)
+        for i in range(NEVENTS):
+            f.write(EVENT.format(weight=i + 1))
+        f.write("</LesHouchesEvents>")
+    return path
+
+
+def test_aevents(lhe_path):
+    async def main():
+        async with pylhe.aio.open(lhe_path, batch_size=100) as lhe:
+            assert lhe.lhefile.init.initInfo.beamA == 2212
+            return [event async for event in lhe.aevents()]
+
+    events = asyncio.run(main())
+    assert events == list(pylhe.LesHouchesEvents.fromfile(lhe_path).events)
+
+
+@pytest.mark.parametrize("readahead", [0, 3])
+def test_abatch(lhe_path, readahead):
+    async def main():
+        async with pylhe.aio.open(lhe_path, readahead=readahead) as lhe:
+            return [len(await lhe.abatch(n)) for n in (0, 250, 250, 250, 250)]
+
+    assert asyncio.run(main()) == [0, 250, 250, 100, 0]
+
+
+def test_abatch_cancellation_keeps_events(lhe_path):
+    async def main():
+        async with pylhe.aio.open(lhe_path) as lhe:
+            task = asyncio.create_task(lhe.abatch(NEVENTS))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return await lhe.abatch(NEVENTS)
+
+    weights = [e.eventinfo.weight for e in asyncio.run(main())]
+    assert weights == pytest.approx(range(1, NEVENTS + 1))
+
+
+def test_lhefile_requires_open(lhe_path):
+    lhe = pylhe.aio.open(lhe_path)
+    with pytest.raises(RuntimeError, match=r"has not been opened"):
+        _ = lhe.lhefile
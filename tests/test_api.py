@@ -1,4 +1,5 @@
 import pylhe
+import pylhe.aio
 
 
 def test_top_level_api():
@@ -8,7 +9,9 @@ def test_top_level_api():
         "HDF5_FORMAT",
         "HDF5_GZ_FORMAT",
         "LHEEvent",
+        "LHEEventColumns",
         "LHEEventInfo",
+        "LHEEventSequence",
         "LHEFile",
         "LHEGenerator",
         "LHEHDF5Format",
@@ -21,18 +24,43 @@ def test_top_level_api():
         "LHEParticle",
         "LHEProcInfo",
         "LHEWeightFormat",
+        "LHEWriter",
         "LHEXMLFormat",
         "RWGT_FORMAT",
         "RWGT_GZ_FORMAT",
         "WEIGHTS_FORMAT",
         "WEIGHTS_GZ_FORMAT",
         "__version__",
+        "add_weights",
+        "demux",
+        "slim",
+        "split",
         "to_awkward",
+        "write_columns",
     ]
 
 
 def test_awkward_api():
-    assert dir(pylhe.awkward) == ["to_awkward"]
+    assert dir(pylhe.awkward) == ["from_awkward", "to_awkward", "tofile"]
+
+
+def test_aio_api():
+    assert dir(pylhe.aio) == ["AsyncLHEFile", "open"]
+
+
+def test_lheh5_api():
+    assert dir(pylhe.lheh5) == [
+        "count_events",
+        "get_particles",
+        "parallel_map",
+        "read_events",
+        "read_init",
+        "read_iter_events",
+        "take",
+        "to_awkward",
+        "write",
+        "write_columns",
+    ]
 
 
 def test_load_version():
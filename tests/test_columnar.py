@@ -0,0 +1,201 @@
+import gc
+from pathlib import Path
+
+import awkward as ak
+import numpy as np
+import pytest
+
+import pylhe
+
+LHE_CONTENT = """<LesHouchesEvents version="3.0">
+<header>
+<initrwgt>
+<weight id="1001">muR=1 muF=1</weight>
+<weight id="1002">muR=2 muF=1</weight>
+</initrwgt>
+</header>
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+<event npLO=" -1 ">
+  2      1 +1.0000000e+00  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+#aMCatNLO comment
+<rwgt>
+<wgt id='1001'> 1.0000e+00</wgt>
+<wgt id='1002'> 2.0000e+00</wgt>
+</rwgt>
+<scales muf='90.1' mur='90.2'/>
+</event>
+<event>
+  3      2 +3.0000000e+00  1.25000000e+02 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       25  1    1    2    0    0 +0.00000000e+00 +0.00000000e+00 +2.32272819e+02 +6.80344965e+02 +1.25000000e+02 0.0000e+00 9.0000e+00
+<rwgt>
+<wgt id='1001'> 3.0000e+00</wgt>
+<wgt id='1002'> 4.0000e+00</wgt>
+</rwgt>
+</event>
+<event>
+  2      1 +2.0000000e+00  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<rwgt>
+<wgt id='1001'> 2.0000e+00</wgt>
+</rwgt>
+</event>
+</LesHouchesEvents>"""
+
+
+def test_columnar_storage_matches_list_storage():
+    as_list = pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, generator=False)
+    columnar = pylhe.LesHouchesEvents.fromstring(
+        LHE_CONTENT, generator=False, storage="columnar"
+    )
+
+    assert isinstance(columnar.events, pylhe.LHEEventColumns)
+    assert len(columnar.events) == 3
+    assert list(columnar.events) == as_list.events
+    assert columnar.events[-1] == as_list.events[-1]
+    assert columnar.events[0].attributes == {"npLO": " -1 "}
+    assert columnar.events[0].optional == ["#aMCatNLO comment"]
+    assert columnar.events[0].scales == {"muf": 90.1, "mur": 90.2}
+    assert columnar.events[2].weights == {"1001": 2.0}
+    assert columnar.events[0].tolhe() == as_list.events[0].tolhe()
+
+
+def test_columnar_storage_uses_numpy_columns():
+    events = pylhe.LesHouchesEvents.fromstring(
+        LHE_CONTENT, generator=False, storage="columnar"
+    ).events
+
+    assert events.offsets.tolist() == [0, 2, 5, 7]
+    assert events.eventinfo["pid"].dtype == np.int64
+    assert events.particles["id"].tolist() == [21, 21, 21, 21, 25, 21, 21]
+    assert events.particles["pz"].dtype == np.float64
+    assert events.weights.keys == ("1001", "1002")
+    assert events.nbytes > 0
+
+
+def test_columnar_views_are_independent_copies():
+    events = pylhe.LesHouchesEvents.fromstring(
+        LHE_CONTENT, generator=False, storage="columnar"
+    ).events
+
+    event = events[0]
+    event.particles[0].px = 42.0
+    event.attributes["npLO"] = "2"
+
+    assert events[0].particles[0].px == 0.0
+    assert events[0].attributes == {"npLO": " -1 "}
+
+
+def test_columnar_slicing_and_take():
+    as_list = pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, generator=False).events
+    events = pylhe.LHEEventColumns.fromevents(as_list)
+
+    assert list(events[1:]) == as_list[1:]
+    assert list(events[::-1]) == as_list[::-1]
+    assert list(events.take([2, 0])) == [as_list[2], as_list[0]]
+    assert len(events[3:]) == 0
+
+    with pytest.raises(IndexError):
+        events[3]
+    with pytest.raises(IndexError):
+        events.take([5])
+
+
+def test_columnar_to_awkward_matches_builder():
+    as_list = pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, generator=False).events
+    # drop the irregular third event so that the weights form a regular record
+    regular = as_list[:2]
+
+    expected = pylhe.to_awkward(regular)
+    result = pylhe.to_awkward(pylhe.LHEEventColumns.fromevents(regular))
+
+    assert result.type == expected.type
+    assert result.to_list() == expected.to_list()
+    assert ak.all(result.particles.vector.e == expected.particles.vector.e)
+
+    # irregular weights fall back to the generic conversion
+    assert (
+        pylhe.to_awkward(pylhe.LHEEventColumns.fromevents(as_list)).to_list()
+        == pylhe.to_awkward(as_list).to_list()
+    )
+
+
+def test_unknown_storage_raises():
+    with pytest.raises(ValueError, match=r"Unknown event storage 'dict'"):
+        pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, generator=False, storage="dict")
+
+
+def test_max_memory_spills_columns_to_disk():
+    as_list = pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, generator=False).events
+    spilled = pylhe.LesHouchesEvents.fromstring(
+        LHE_CONTENT, generator=False, max_memory=1
+    ).events
+
+    assert isinstance(spilled, pylhe.LHEEventColumns)
+    assert spilled.spilled
+    assert isinstance(spilled.particles["px"], np.memmap)
+    assert list(spilled) == as_list
+    assert spilled[2].weights == {"1001": 2.0}
+
+
+def test_max_memory_not_exceeded_stays_in_memory():
+    events = pylhe.LesHouchesEvents.fromstring(
+        LHE_CONTENT, generator=False, max_memory=2**30
+    ).events
+
+    assert isinstance(events, pylhe.LHEEventColumns)
+    assert not events.spilled
+    assert not isinstance(events.particles["px"], np.memmap)
+
+
+def test_spilled_keys_appearing_late_are_padded():
+    as_list = pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, generator=False).events
+    as_list[0].weights = {}
+    as_list[2].scales = {"muf": 1.0}
+    builder = pylhe.columnar._LHEEventColumnsBuilder(batch_size=1, max_memory=1)
+    for event in as_list:
+        builder.append(event)
+    events = builder.finish()
+
+    assert events.spilled
+    assert list(events) == as_list
+    assert events.weights.present["1001"].tolist() == [False, True, True]
+
+    # the temporary files are removed together with the columns
+    spill_dir = Path(events._spill_dir.name)
+    assert spill_dir.exists()
+    del builder, events
+    gc.collect()
+    assert not spill_dir.exists()
+
+
+def test_spill_many_weights_keeps_files_closed():
+    resource = pytest.importorskip("resource")
+    events = [
+        pylhe.LHEEvent(
+            eventinfo=pylhe.LHEEventInfo(0, 1, 1.0, 91.2, 0.0078, 0.118),
+            particles=[],
+            weights={str(key): float(i * key) for key in range(600)},
+        )
+        for i in range(5)
+    ]
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    builder = pylhe.columnar._LHEEventColumnsBuilder(batch_size=2, max_memory=1000)
+    # Far fewer file descriptors than spilled columns, two per weight
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(soft, 256), hard))
+    try:
+        for event in events:
+            builder.append(event)
+        columns = builder.finish()
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    assert columns.spilled
+    assert list(columns) == events
@@ -0,0 +1,93 @@
+import gzip
+
+import pytest
+
+import pylhe
+
+PROLOGUE = """<LesHouchesEvents version="3.0">
+<header>
+<MGVersion>
+3.5.0
+</MGVersion>
+</header>
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  3
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+  2.000000e+00  0.000000e+00  1.000000e+00  2
+  3.000000e+00  0.000000e+00  1.000000e+00  3
+</init>
+"""
+
+EVENT = """<event>
+ 1      {pid} +{weight:.7e} 9.11884000e+01 -1.0e+00 -1.0e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<mgrwt>
+<rscale>  0 0.91188000E+02</rscale>
+</mgrwt>
+</event>
+"""
+
+PIDS = [1, 2, 1, 3, 3, 2, 1, 2, 3, 1]
+EVENTS = [EVENT.format(pid=pid, weight=i + 1.0) for i, pid in enumerate(PIDS)]
+
+
+@pytest.fixture
+def lhe_path(tmp_path):
+    path = tmp_path / "events.lhe"
+    path.write_text(PROLOGUE + "".join(EVENTS) + "</LesHouchesEvents>")
+    return path
+
+
+@pytest.mark.parametrize("max_open", [64, 1])
+@pytest.mark.parametrize("suffix", [".lhe", ".lhe.gz"])
+def test_demux_by_pid(tmp_path, lhe_path, max_open, suffix):
+    paths = pylhe.demux(
+        lhe_path, out_pattern=str(tmp_path / f"proc_{{key}}{suffix}"), max_open=max_open
+    )
+
+    assert list(paths) == [1, 2, 3]
+    for pid, path in paths.items():
+        with (gzip.open if suffix.endswith(".gz") else open)(path, "rt") as f:
+            text = f.read()
+        expected = [event for event, p in zip(EVENTS, PIDS, strict=True) if p == pid]
+        assert text.endswith("".join(expected) + "</LesHouchesEvents>")
+        lhef = pylhe.LesHouchesEvents.fromfile(path)
+        assert [proc.procId for proc in lhef.init.procInfo] == [pid]
+        assert lhef.init.initInfo.numProcesses == 1
+        assert lhef.header.extra_elements[0].tag == "MGVersion"
+        assert [e.eventinfo.pid for e in lhef.events] == [pid] * PIDS.count(pid)
+
+
+def test_demux_key_function(tmp_path, lhe_path):
+    paths = pylhe.demux(
+        lhe_path,
+        key=lambda event: "odd" if event.eventinfo.weight % 2 else "even",
+        out_pattern=str(tmp_path / "{key}.lhe"),
+        max_open=1,
+    )
+
+    assert list(paths) == ["odd", "even"]
+    odd = pylhe.LesHouchesEvents.fromfile(paths["odd"])
+    assert len(odd.init.procInfo) == 3
+    assert [e.eventinfo.weight for e in odd.events] == [1.0, 3.0, 5.0, 7.0, 9.0]
+
+
+def test_demux_lheh5(tmp_path, lhe_path):
+    h5_path = tmp_path / "events.hdf5"
+    pylhe.LesHouchesEvents.fromfile(lhe_path).tofile(h5_path)
+    paths = pylhe.demux(h5_path, out_pattern=str(tmp_path / "proc_{key}.lhe"))
+
+    lhef = pylhe.LesHouchesEvents.fromfile(paths[2])
+    assert [proc.procId for proc in lhef.init.procInfo] == [2]
+    assert [e.eventinfo.weight for e in lhef.events] == [2.0, 6.0, 8.0]
+
+
+def test_demux_validation(tmp_path, lhe_path):
+    with pytest.raises(ValueError, match="key"):
+        pylhe.demux(lhe_path, out_pattern=str(tmp_path / "out.lhe"))
+    with pytest.raises(ValueError, match="Unknown event key"):
+        pylhe.demux(lhe_path, key="energy")
+    with pytest.raises(ValueError, match="max_open"):
+        pylhe.demux(lhe_path, max_open=0)
+    with pytest.raises(ValueError, match="LHE XML"):
+        pylhe.demux(lhe_path, out_pattern=str(tmp_path / "out_{key}.hdf5"))
@@ -0,0 +1,123 @@
+import gzip
+
+import pytest
+
+import pylhe
+
+LHE_CONTENT = """<LesHouchesEvents version="3.0">
+<header>
+<initrwgt>
+<weight id="1001">muR=1 muF=1</weight>
+<weight id="1002">muR=2 muF=1</weight>
+</initrwgt>
+</header>
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+<event>
+  2      1 +1.0000000e+00  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<rwgt>
+<wgt id='1001'> 1.0000e+00</wgt>
+<wgt id='1002'> 2.0000e+00</wgt>
+</rwgt>
+</event>
+<event>
+  2      1 +3.0000000e+00  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<rwgt>
+<wgt id='1001'> 3.0000e+00</wgt>
+<wgt id='1002'> 4.0000e+00</wgt>
+</rwgt>
+</event>
+<event>
+  2      1 +2.0000000e+00  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<rwgt>
+<wgt id='1001'> 2.0000e+00</wgt>
+<wgt id='1002'> 1.0000e+00</wgt>
+</rwgt>
+</event>
+</LesHouchesEvents>"""
+
+
+@pytest.fixture(params=["events.lhe", "events.lhe.gz"])
+def lhe_path(request, tmp_path):
+    path = tmp_path / request.param
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "wt") as f:
+        f.write(LHE_CONTENT)
+    return path
+
+
+def test_reiterable_events_can_be_iterated_twice(lhe_path):
+    lhe = pylhe.LesHouchesEvents.fromfile(lhe_path, reiterable=True)
+
+    assert isinstance(lhe.events, pylhe.LHEEventSequence)
+    assert lhe.init.initInfo.beamA == 2212
+    assert lhe.header is not None
+
+    max_weight = max(e.eventinfo.weight for e in lhe.events)
+    unweighted = [e.eventinfo.weight / max_weight for e in lhe.events]
+
+    assert max_weight == pytest.approx(3.0)
+    assert unweighted == pytest.approx([1 / 3, 1.0, 2 / 3])
+    assert list(lhe.events) == list(pylhe.LesHouchesEvents.fromfile(lhe_path).events)
+
+
+def test_reiterable_options(lhe_path, monkeypatch):
+    calls = []
+    frombuffer = pylhe.LesHouchesEvents.frombuffer.__func__
+
+    def _frombuffer(cls, fileobject, **kwargs):
+        calls.append((kwargs["prefetch"], kwargs["parse_workers"]))
+        return frombuffer(cls, fileobject, **kwargs)
+
+    monkeypatch.setattr(pylhe.LesHouchesEvents, "frombuffer", classmethod(_frombuffer))
+    lhe = pylhe.LesHouchesEvents.fromfile(
+        lhe_path, reiterable=True, prefetch=1, parse_workers=2
+    )
+    assert len(list(lhe.events)) == 3
+    assert len(list(lhe.events)) == 3
+    # The first pass only reads the header and init
+    assert calls == [(0, 0), (1, 2), (1, 2)]
+
+    with pytest.raises(ValueError, match=r"reiterable"):
+        pylhe.LesHouchesEvents.fromfile(lhe_path, reiterable=True, storage="columnar")
+    with pytest.raises(ValueError, match=r"reiterable"):
+        pylhe.LesHouchesEvents.fromfile(lhe_path, reiterable=True, max_memory=1)
+
+
+def test_event_sequence_len_is_cached(lhe_path, monkeypatch):
+    events = pylhe.LHEEventSequence(lhe_path)
+
+    assert len(events) == 3
+
+    def _fail(_filepath):
+        pytest.fail("count_events should not be called again")
+
+    monkeypatch.setattr(pylhe.LesHouchesEvents, "count_events", _fail)
+    assert len(events) == 3
+
+
+def test_event_sequence_full_pass_sets_len(lhe_path, monkeypatch):
+    events = pylhe.LHEEventSequence(lhe_path, with_attributes=False)
+    assert sum(1 for _ in events) == 3
+
+    monkeypatch.setattr(pylhe.LesHouchesEvents, "count_events", lambda _: -1)
+    assert len(events) == 3
+
+
+def test_event_sequence_len_raises_for_unparsable_file(tmp_path):
+    path = tmp_path / "broken.lhe"
+    path.write_text("<LesHouchesEvents><event>")
+
+    with (
+        pytest.warns(RuntimeWarning, match=r"Parse Error"),
+        pytest.raises(ValueError, match=r"Could not count the events"),
+    ):
+        len(pylhe.LHEEventSequence(path))
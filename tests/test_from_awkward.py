@@ -0,0 +1,125 @@
+import io
+
+import awkward as ak
+import numpy as np
+import pytest
+
+import pylhe
+
+LHE_CONTENT = """<LesHouchesEvents version="3.0">
+<header>
+<initrwgt>
+<weight id="1001">muR=1 muF=1</weight>
+<weight id="1002">muR=2 muF=1</weight>
+</initrwgt>
+</header>
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+<event>
+  2      1 +1.0000000e+00  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<rwgt>
+<wgt id='1001'> 1.0000e+00</wgt>
+<wgt id='1002'> 2.0000e+00</wgt>
+</rwgt>
+</event>
+<event>
+  3      2 +3.0000000e+00  1.25000000e+02 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       25  1    1    2    0    0 +0.00000000e+00 +0.00000000e+00 +2.32272819e+02 +6.80344965e+02 +1.25000000e+02 0.0000e+00 9.0000e+00
+<rwgt>
+<wgt id='1001'> 3.0000e+00</wgt>
+<wgt id='1002'> 4.0000e+00</wgt>
+</rwgt>
+</event>
+<event>
+  2      1 +2.0000000e+00  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<rwgt>
+<wgt id='1001'> 5.0000e+00</wgt>
+<wgt id='1002'> 6.0000e+00</wgt>
+</rwgt>
+</event>
+</LesHouchesEvents>"""
+
+
+@pytest.fixture
+def lhe():
+    return pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, generator=False)
+
+
+@pytest.mark.parametrize("storage", ["list", "columnar"])
+def test_from_awkward_roundtrip(storage):
+    lhe = pylhe.LesHouchesEvents.fromstring(
+        LHE_CONTENT, generator=False, storage=storage
+    )
+    columns = pylhe.awkward.from_awkward(pylhe.to_awkward(lhe))
+
+    assert isinstance(columns, pylhe.LHEEventColumns)
+    assert list(columns) == list(lhe.events)
+
+
+def test_tofile_matches_events(lhe):
+    stream = io.StringIO()
+    pylhe.awkward.tofile(pylhe.to_awkward(lhe), stream, lhe.init, lhe.header)
+
+    assert stream.getvalue() == lhe.tolhe()
+
+
+def test_tofile_selection(lhe):
+    arr = pylhe.to_awkward(lhe)
+    arr = arr[arr.eventinfo.pid == 2]
+    arr = ak.with_field(arr, arr.particles[arr.particles.status == 1], "particles")
+    stream = io.StringIO()
+    pylhe.awkward.tofile(arr, stream, lhe.init, lhe.header)
+
+    (event,) = pylhe.LesHouchesEvents.fromstring(stream.getvalue()).events
+    assert event.eventinfo.nparticles == 1
+    assert event.eventinfo.pid == 2
+    assert [p.id for p in event.particles] == [25]
+    assert event.weights == {"1001": 3.0, "1002": 4.0}
+
+
+@pytest.mark.parametrize("lheformat", [pylhe.HDF5_FORMAT, pylhe.HDF5_GZ_FORMAT])
+def test_tofile_lheh5(tmp_path, lhe, lheformat):
+    path = tmp_path / "events.hdf5"
+    pylhe.awkward.tofile(pylhe.to_awkward(lhe), path, lhe.init, lheformat=lheformat)
+    reference = tmp_path / "reference.hdf5"
+    lhe.tofile(reference, lheformat=lheformat)
+
+    events = list(pylhe.LesHouchesEvents.fromfile(path).events)
+    assert events == list(pylhe.LesHouchesEvents.fromfile(reference).events)
+    assert [e.eventinfo.weight for e in events] == [1.0, 3.0, 2.0]
+
+
+def test_from_awkward_missing_weights(lhe):
+    lhe.events[1].weights = {"1001": 3.0}
+    lhe.events[2].weights = {}
+    columns = pylhe.awkward.from_awkward(pylhe.to_awkward(lhe))
+
+    assert not columns.weights.regular
+    assert [e.weights for e in columns] == [
+        {"1001": 1.0, "1002": 2.0},
+        {"1001": 3.0},
+        {},
+    ]
+    stream = io.StringIO()
+    pylhe.awkward.tofile(pylhe.to_awkward(lhe), stream, lhe.init, lhe.header)
+    assert stream.getvalue() == lhe.tolhe()
+
+
+def test_from_awkward_empty():
+    columns = pylhe.awkward.from_awkward(pylhe.to_awkward([]))
+
+    assert len(columns) == 0
+    np.testing.assert_array_equal(columns.offsets, [0])
+
+
+def test_from_awkward_rejects_other_layouts():
+    with pytest.raises(ValueError, match="to_awkward"):
+        pylhe.awkward.from_awkward(ak.Array([{"x": 1}]))
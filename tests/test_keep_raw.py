@@ -0,0 +1,162 @@
+import dataclasses
+import io
+
+import pytest
+
+import pylhe
+
+PROLOGUE = """<LesHouchesEvents version="3.0">
+<header>
+<initrwgt>
+<weight id="1001">muR=1 muF=1</weight>
+</initrwgt>
+</header>
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+"""
+
+EVENT = """<event>
+ 1      1 +{weight:.7e} 9.11884000e+01 -1.0e+00 -1.0e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<mgrwt>
+<rscale>  0 0.91188000E+02</rscale>
+</mgrwt>
+<rwgt>
+<wgt id='1001'> {weight:.5e}</wgt>
+</rwgt>
+</event>"""
+
+EVENTS = [EVENT.format(weight=i + 1.0) for i in range(4)]
+LHE_CONTENT = PROLOGUE + "\n".join(EVENTS) + "\n</LesHouchesEvents>"
+
+
+@pytest.mark.parametrize("parse_workers", [0, 2])
+def test_keep_raw(parse_workers):
+    lhef = pylhe.LesHouchesEvents.frombuffer(
+        io.BytesIO(LHE_CONTENT.encode()), keep_raw=True, parse_workers=parse_workers
+    )
+    events = list(lhef.events)
+
+    assert [event.raw for event in events] == [event.encode() for event in EVENTS]
+    assert events == list(pylhe.LesHouchesEvents.fromstring(LHE_CONTENT).events)
+    assert lhef.header.initrwgt.index_to_id() == {0: "1001"}
+
+
+def test_passthrough_unmodified_events():
+    lhef = pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, keep_raw=True)
+    events = list(lhef.events)
+    events[1].particles[0].px = 1.0
+    events[2].weights["1002"] = 2.0
+    stream = io.StringIO()
+    with pylhe.LHEWriter(stream, lhef.init, lhef.header) as writer:
+        writer.write_events(events)
+    text = stream.getvalue()
+
+    assert events[0].raw is not None
+    assert events[1].raw is None
+    assert events[2].raw is None
+    assert EVENTS[0] in text
+    assert EVENTS[3] in text
+    assert text.count("<mgrwt>") == 2
+    assert events[1].tolhe() in text
+    assert events[2].tolhe() in text
+
+
+def test_passthrough_disabled():
+    (event, *_) = pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, keep_raw=True).events
+    lheformat = dataclasses.replace(pylhe.DEFAULT_FORMAT, passthrough=False)
+
+    assert event.tolhe() == EVENTS[0]
+    assert "<mgrwt>" not in event.tolhe(lheformat)
+    assert event.tolhe(lheformat) == dataclasses.replace(event, _raw=None).tolhe()
+
+
+def test_keep_raw_file(tmp_path):
+    path = tmp_path / "events.lhe.gz"
+    pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, keep_raw=True).tofile(path)
+
+    lhef = pylhe.LesHouchesEvents.fromfile(path, keep_raw=True, generator=False)
+    assert [event.raw for event in lhef.events] == [e.encode() for e in EVENTS]
+    sequence = pylhe.LesHouchesEvents.fromfile(path, keep_raw=True, reiterable=True)
+    assert [event.raw for event in sequence.events] == [e.encode() for e in EVENTS]
+
+
+def test_keep_raw_validation():
+    with pytest.raises(ValueError, match="storage='list'"):
+        pylhe.LesHouchesEvents.fromstring(
+            LHE_CONTENT, keep_raw=True, generator=False, storage="columnar"
+        )
+    with pytest.raises(ValueError, match="binary stream"):
+        pylhe.LesHouchesEvents.frombuffer(io.StringIO(LHE_CONTENT), keep_raw=True)
+
+
+@pytest.mark.parametrize(
+    "lheformat",
+    [
+        pylhe.WEIGHTS_FORMAT,
+        pylhe.NO_WEIGHTS_FORMAT,
+        pylhe.LHEXMLFormat(version=pylhe.LHEVersion.V1),
+        pylhe.LHEXMLFormat(
+            eventinfo="{nparticles} {pid} {weight} {scale} {aqed} {aqcd}"
+        ),
+    ],
+)
+def test_passthrough_other_format(tmp_path, lheformat):
+    lhef = pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, keep_raw=True)
+    (event, *_) = lhef.events
+    expected = dataclasses.replace(event, _raw=None).tolhe(lheformat)
+
+    assert event.tolhe(lheformat) == expected
+    assert "<mgrwt>" not in expected
+    path = tmp_path / "events.lhe"
+    pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, keep_raw=True).tofile(
+        path, lheformat=lheformat
+    )
+    text = path.read_text()
+    assert expected in text
+    assert "<mgrwt>" not in text
+    assert ("<rwgt>" in text) is (
+        lheformat.version is pylhe.LHEVersion.V3
+        and lheformat.weights is pylhe.LHEWeightFormat.RWGT
+    )
+
+
+def test_passthrough_weights_follow_output_declaration():
+    text = (
+        LHE_CONTENT.replace(
+            '<weight id="1001">muR=1 muF=1</weight>',
+            '<weight id="a">A</weight>\n<weight id="b">B</weight>',
+        )
+        .replace(
+            "<rwgt>\n<wgt id='1001'> 1.00000e+00</wgt>\n</rwgt>",
+            "<weights>\n1.0\n2.0\n</weights>",
+        )
+        .replace("<rwgt>\n<wgt id='1001'>", "<rwgt>\n<wgt id='a'>")
+    )
+    lhef = pylhe.LesHouchesEvents.fromstring(text, keep_raw=True)
+    (event, *_) = lhef.events
+    assert event.weights == {"a": 1.0, "b": 2.0}
+
+    # <weights> blocks are positional: declaring b before a must not swap the values
+    header = pylhe.LHEHeader(
+        initrwgt=pylhe.LHEInitRWGT(
+            entries=[
+                pylhe.LHEInitRWGTWeight("b", "B"),
+                pylhe.LHEInitRWGTWeight("a", "A"),
+            ]
+        )
+    )
+    for same_order in (False, True):
+        stream = io.StringIO()
+        with pylhe.LHEWriter(
+            stream,
+            lhef.init,
+            header if not same_order else lhef.header,
+            lheformat=pylhe.WEIGHTS_FORMAT,
+        ) as writer:
+            writer.write_event(event)
+        (written,) = pylhe.LesHouchesEvents.fromstring(stream.getvalue()).events
+        assert written.weights == {"a": 1.0, "b": 2.0}
+        assert (event.raw.decode() in stream.getvalue()) is same_order
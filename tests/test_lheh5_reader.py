@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import operator
+
+import awkward as ak
 import h5py
+import numpy as np
 import pytest
 import skhep_testdata
 
@@ -74,3 +78,289 @@ def test_read_init_matches_lheinit_specification():
     assert init.procInfo[0].xSection == pytest.approx(1661.5257101139289)
     assert init.procInfo[0].error == pytest.approx(6.367380198171124)
     assert init.procInfo[0].unitWeight == pytest.approx(2.330218119536726e-05)
+
+
+def _events(nevents):
+    return [
+        pylhe.LHEEvent(
+            eventinfo=pylhe.LHEEventInfo(i % 4, i % 3, i + 0.5, 91.2, 0.0078, 0.118),
+            particles=[
+                pylhe.LHEParticle(
+                    21, 1, 0, 0, 501 + j, 0, 1.0 * j, 2.0, 3.0 * i, 4.0, 0.0, 0.0, 9.0
+                )
+                for j in range(i % 4)
+            ],
+            scales={"fscale": 10.0 + i, "rscale": 20.0 + i},
+            attributes={"trials": str(float(i + 1))},
+        )
+        for i in range(nevents)
+    ]
+
+
+INIT = pylhe.LHEInit(
+    initInfo=pylhe.LHEInitInfo(2212, 2212, 6500.0, 6500.0, 0, 0, 0, 0, 3, 1),
+    procInfo=[pylhe.LHEProcInfo(1.0, 0.0, 1.0, 1)],
+    generators=[],
+)
+
+
+def _write(path, events):
+    with pylhe.LHEWriter(
+        path, INIT, lheformat=pylhe.LHEHDF5Format(event_chunk_rows=4)
+    ) as writer:
+        writer.write_events(events)
+    return path
+
+
+@pytest.mark.parametrize("block_rows", [None, 1, 3, 100])
+def test_read_iter_events_blocks(tmp_path, block_rows):
+    events = _events(20)
+    path = _write(tmp_path / "events.hdf5", events)
+
+    with h5py.File(path, "r") as h5:
+        assert list(read_iter_events(h5, block_rows=block_rows)) == events
+    assert list(pylhe.LesHouchesEvents.fromfile(path, rdcc_nbytes=0).events) == events
+    with h5py.File(path, "r") as h5, pytest.raises(ValueError, match="block_rows"):
+        next(read_iter_events(h5, block_rows=0))
+
+
+def test_read_iter_events_weights(tmp_path):
+    path = _write(tmp_path / "events.hdf5", _events(6))
+    with h5py.File(path, "r") as h5:
+        # Only the standard columns, no weights
+        assert tuple(h5["events"].attrs["properties"])[-1] == "NOMINAL"
+        assert [event.weights for event in read_iter_events(h5)] == [{}] * 6
+
+    weighted = tmp_path / "weighted.hdf5"
+    pylhe.add_weights(path, weighted, ["a", "b"], np.arange(12.0).reshape(6, 2))
+    with h5py.File(weighted, "r") as h5:
+        assert [event.weights for event in read_iter_events(h5)] == [
+            {"a": 2.0 * i, "b": 2.0 * i + 1} for i in range(6)
+        ]
+
+
+def test_to_awkward(tmp_path):
+    events = _events(20)
+    path = _write(tmp_path / "events.hdf5", events)
+    expected = pylhe.to_awkward(
+        [
+            pylhe.LHEEvent(eventinfo=event.eventinfo, particles=event.particles)
+            for event in events
+        ]
+    )
+
+    with h5py.File(path, "r") as h5:
+        arr = pylhe.lheh5.to_awkward(h5)
+        assert ak.to_list(arr) == ak.to_list(expected)
+        assert ak.all(arr.particles.vector.E == expected.particles.vector.E)
+        assert ak.to_list(
+            pylhe.lheh5.to_awkward(h5, entry_start=5, entry_stop=-3)
+        ) == ak.to_list(expected[5:-3])
+        assert len(pylhe.lheh5.to_awkward(h5, entry_start=30)) == 0
+
+        selected = pylhe.lheh5.to_awkward(h5, columns=["weight", "id"])
+        assert selected.eventinfo.fields == ["weight"]
+        assert selected.particles.fields == ["id"]
+        assert ak.to_list(selected.particles.id) == ak.to_list(expected.particles.id)
+        assert ak.to_list(
+            ak.num(pylhe.lheh5.to_awkward(h5, columns=["pid"]).particles)
+        ) == [event.eventinfo.nparticles for event in events]
+        with pytest.raises(ValueError, match="Unknown columns"):
+            pylhe.lheh5.to_awkward(h5, columns=["nope"])
+
+        # Any momentum component selects the whole momentum vector
+        for columns in (["px", "id"], ["e"], ["py", "pz", "weight"]):
+            partial = pylhe.lheh5.to_awkward(h5, columns=columns)
+            assert "vector" in partial.particles.fields
+            assert ak.to_list(partial.particles.vector.px) == ak.to_list(
+                expected.particles.vector.px
+            )
+            assert ak.to_list(partial.particles.vector.E) == ak.to_list(
+                expected.particles.vector.E
+            )
+    with pytest.raises(ValueError, match="momentum requires"):
+        pylhe.awkward._from_columns(
+            {}, {"px": np.zeros(1)}, np.array([0, 1], dtype=np.int64)
+        )
+
+
+def test_to_awkward_noncontiguous_particles(tmp_path):
+    events = _events(12)
+    path = _write(tmp_path / "events.hdf5", events)
+    order = [3, 1, 2, 0, 11, 5, 5, 7, 6, 9, 10, 8]
+    shuffled = tmp_path / "shuffled.hdf5"
+    with h5py.File(path, "r") as source, h5py.File(shuffled, "w") as target:
+        for name in source:
+            source.copy(name, target)
+        target["events"][...] = source["events"][()][order]
+
+    with h5py.File(shuffled, "r") as h5:
+        arr = pylhe.lheh5.to_awkward(h5)
+        assert list(read_iter_events(h5, block_rows=5)) == [events[i] for i in order]
+    assert ak.to_list(arr.particles.vector.pz) == [
+        [p.pz for p in events[i].particles] for i in order
+    ]
+    assert np.array_equal(
+        ak.num(arr.particles), [len(events[i].particles) for i in order]
+    )
+
+
+def test_read_events_and_take(tmp_path):
+    events = _events(20)
+    path = _write(tmp_path / "events.hdf5", events)
+
+    with h5py.File(path, "r") as h5:
+        assert pylhe.lheh5.read_events(h5, 5, 9) == events[5:9]
+        assert pylhe.lheh5.read_events(h5, -3) == events[-3:]
+        assert pylhe.lheh5.read_events(h5, 9, 5) == []
+        assert pylhe.lheh5.read_events(h5) == events
+
+        indices = [7, 3, 4, 5, -1, 3, 12]
+        assert pylhe.lheh5.take(h5, indices) == [events[i] for i in indices]
+        assert pylhe.lheh5.take(h5, np.array([], dtype=int)) == []
+        with pytest.raises(IndexError, match="out of range"):
+            pylhe.lheh5.take(h5, [20])
+
+
+def test_take_coalesces_reads(tmp_path, monkeypatch):
+    path = _write(tmp_path / "events.hdf5", _events(20))
+    reads = []
+    getitem = h5py.Dataset.__getitem__
+
+    def _getitem(self, key):
+        reads.append((self.name, key))
+        return getitem(self, key)
+
+    monkeypatch.setattr(h5py.Dataset, "__getitem__", _getitem)
+    with h5py.File(path, "r") as h5:
+        pylhe.lheh5.take(h5, [9, 2, 3, 4, 10, 2])
+
+    assert [key for name, key in reads if name == "/events"] == [
+        slice(2, 5),
+        slice(9, 11),
+    ]
+    assert len([key for name, key in reads if name == "/particles"]) == 2
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_parallel_map(tmp_path, workers):
+    events = _events(20)
+    path = _write(tmp_path / "events.hdf5", events)
+    weights = [event.eventinfo.weight for event in events]
+
+    assert pylhe.lheh5.parallel_map(path, len, workers=workers, chunk_events=6) == [
+        6,
+        6,
+        6,
+        2,
+    ]
+    assert (
+        pylhe.lheh5.parallel_map(
+            path, len, workers=workers, chunk_events=6, reduce="sum", ordered=False
+        )
+        == 20
+    )
+    weight = operator.attrgetter("eventinfo.weight")
+    assert (
+        ak.to_list(
+            pylhe.lheh5.parallel_map(
+                path,
+                weight,
+                workers=workers,
+                chunk_events=7,
+                columns=["weight"],
+                reduce="concatenate",
+            )
+        )
+        == weights
+    )
+    assert (
+        pylhe.lheh5.parallel_map(
+            path, len, workers=workers, chunk_events=7, columns=["pid"], reduce=max
+        )
+        == 7
+    )
+
+
+def test_parallel_map_empty_and_validation(tmp_path):
+    path = _write(tmp_path / "empty.hdf5", [])
+
+    assert pylhe.lheh5.parallel_map(path, len, workers=0, reduce="sum") == 0
+    with pytest.raises(ValueError, match="chunk_events"):
+        pylhe.lheh5.parallel_map(path, len, chunk_events=0)
+    with pytest.raises(ValueError, match="Unknown reduce"):
+        pylhe.lheh5.parallel_map(path, len, reduce="mean")
+
+
+def test_write_columns(tmp_path):
+    events = _events(20)
+    columns = pylhe.LHEEventColumns.fromevents(events)
+    weights = {"double": 2 * columns.eventinfo["weight"]}
+    path = tmp_path / "columns.hdf5"
+    with h5py.File(path, "w") as h5:
+        pylhe.lheh5.write_columns(
+            h5, INIT, columns.eventinfo, columns.particles, weights=weights
+        )
+    expected = [
+        pylhe.LHEEvent(
+            eventinfo=event.eventinfo,
+            particles=event.particles,
+            weights={"double": 2 * event.eventinfo.weight},
+            # Columns are written without trials and scales
+            scales={"fscale": 0.0, "rscale": 0.0},
+            attributes={"trials": "0.0"},
+        )
+        for event in events
+    ]
+
+    with h5py.File(path, "r") as h5:
+        assert list(read_iter_events(h5)) == expected
+        assert h5["events"].attrs["properties"][-1] == "double"
+
+
+def test_write_columns_awkward(tmp_path, monkeypatch):
+    path = _write(tmp_path / "events.hdf5", _events(30))
+    with h5py.File(path, "r") as h5:
+        arr = pylhe.lheh5.to_awkward(h5)
+    selected = arr[arr.eventinfo.nparticles > 0]
+    resizes = []
+    resize = h5py.Dataset.resize
+
+    def _resize(self, size, axis=None):
+        resizes.append(self.name)
+        return resize(self, size, axis)
+
+    monkeypatch.setattr(pylhe.lheh5, "_READ_BLOCK_ROWS", 8)
+    monkeypatch.setattr(h5py.Dataset, "resize", _resize)
+    out = tmp_path / "selected.hdf5"
+    with h5py.File(out, "w") as h5:
+        pylhe.lheh5.write_columns(
+            h5, INIT, selected, lheformat=pylhe.LHEHDF5Format(event_chunk_rows=4)
+        )
+
+    assert len(selected) == 22
+    assert resizes == ["/events", "/particles"] * 3
+    with h5py.File(out, "r") as h5:
+        assert ak.to_list(pylhe.lheh5.to_awkward(h5)) == ak.to_list(selected)
+
+
+def test_write_columns_validation(tmp_path):
+    columns = pylhe.LHEEventColumns.fromevents(_events(4))
+    with h5py.File(tmp_path / "out.hdf5", "w") as h5:
+        with pytest.raises(ValueError, match="particle_columns are required"):
+            pylhe.lheh5.write_columns(h5, INIT, columns.eventinfo)
+        with pytest.raises(ValueError, match="must not be given"):
+            pylhe.lheh5.write_columns(
+                h5, INIT, pylhe.to_awkward(columns), offsets=columns.offsets
+            )
+        eventinfo = {k: v for k, v in columns.eventinfo.items() if k != "nparticles"}
+        with pytest.raises(ValueError, match="nparticles event column"):
+            pylhe.lheh5.write_columns(h5, INIT, eventinfo, columns.particles)
+        with pytest.raises(ValueError, match="already columns"):
+            pylhe.lheh5.write_columns(
+                h5,
+                INIT,
+                columns.eventinfo,
+                columns.particles,
+                weights={"start": np.zeros(4)},
+            )
@@ -219,10 +219,14 @@ def test_lheh5_write_roundtrip(tmp_path):
 
     loaded = pylhe.LesHouchesEvents.fromfile(path, generator=False)
     loaded_lazy = pylhe.LesHouchesEvents.fromfile(path)
+    loaded_columnar = pylhe.LesHouchesEvents.fromfile(
+        path, generator=False, storage="columnar"
+    )
 
     assert loaded.init == lhe.init
     assert list(loaded.events) == list(lhe.events)
     assert list(loaded_lazy.events) == list(lhe.events)
+    assert list(loaded_columnar.events) == list(lhe.events)
 
 
 def test_lheh5_hpcgen_roundtrip(tmp_path):
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+import pylhe
+
+HEADER = """<LesHouchesEvents version="3.0">
+<header>
+<initrwgt>
+<weight id="1001">muR=1 muF=1</weight>
+<weight id="1002">muR=2 muF=1</weight>
+</initrwgt>
+</header>
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+"""
+
+EVENT = """<event npLO=" -1 ">
+  2      1 +{weight:.7e}  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+#aMCatNLO 2 5 3 3 1 0.45933500E+02 0.45933500E+02 9 0 0 0.99999999E+00
+<weights> {weight:.4e} {weight:.4e} </weights>
+<scales pt_clust_1="{weight:.4e}"></scales>
+</event>
+"""
+
+NEVENTS = 1000
+
+
+@pytest.fixture
+def lhe_path(tmp_path):
+    path = tmp_path / "events.lhe"
+    with path.open("w") as f:
+        f.write(HEADER)
+        for i in range(NEVENTS):
+            f.write(EVENT.format(weight=i + 1))
+        f.write("</LesHouchesEvents>")
+    return path
+
+
+@pytest.mark.parametrize("with_attributes", [True, False])
+@pytest.mark.parametrize("parse_workers", [1, 4])
+def test_parse_workers_yield_same_events(lhe_path, with_attributes, parse_workers):
+    expected = list(
+        pylhe.LesHouchesEvents.fromfile(
+            lhe_path, with_attributes=with_attributes
+        ).events
+    )
+    events = list(
+        pylhe.LesHouchesEvents.fromfile(
+            lhe_path, with_attributes=with_attributes, parse_workers=parse_workers
+        ).events
+    )
+
+    assert len(events) == NEVENTS
+    assert events == expected
+
+
+def test_parse_workers_early_close(lhe_path):
+    events = pylhe.LesHouchesEvents.fromfile(lhe_path, parse_workers=2).events
+
+    assert next(events).weights == {"1001": 1.0, "1002": 1.0}
+    events.close()
+    assert not [t for t in threading.enumerate() if t.name.startswith("pylhe-parse")]
+
+
+def test_parse_workers_propagate_errors(tmp_path):
+    path = tmp_path / "broken.lhe"
+    path.write_text(
+        HEADER
+        + EVENT.format(weight=1.0)
+        + EVENT.format(weight=2.0).replace("+4.56308892e+02", "not-a-number", 1)
+        + "</LesHouchesEvents>"
+    )
+
+    with pytest.raises(ValueError, match=r"not-a-number"):
+        list(pylhe.LesHouchesEvents.fromfile(path, parse_workers=2).events)
+
+
+def test_parse_workers_must_be_non_negative(lhe_path):
+    with pytest.raises(ValueError, match=r"parse_workers must be non-negative"):
+        pylhe.LesHouchesEvents.fromfile(lhe_path, parse_workers=-1)
+
+
+def test_concurrent_graphs():
+    event = next(
+        pylhe.LesHouchesEvents.fromstring(
+            HEADER + EVENT.format(weight=1.0) + "</LesHouchesEvents>"
+        ).events
+    )
+    sources = []
+
+    def _build():
+        sources.append(pylhe.LHEEvent(event.eventinfo, event.particles).graph.source)
+
+    threads = [threading.Thread(target=_build) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(sources) == 8
+    assert len(set(sources)) == 1
+    assert 'texlbl="$g$"' in sources[0]
@@ -0,0 +1,108 @@
+import gzip
+import threading
+
+import pytest
+
+import pylhe
+
+HEADER = """<LesHouchesEvents version="3.0">
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+"""
+
+EVENT = """<event>
+  2      1 +{weight:.7e}  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+</event>
+"""
+
+BROKEN_EVENT = """<event>
+  2      1 +1.0000000e+00  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 not-a-number +0.00000000e+00 0.0000e+00 9.0000e+00
+</event>
+"""
+
+NEVENTS = 1000
+
+
+def _prefetch_threads():
+    return [t for t in threading.enumerate() if t.name == "pylhe-prefetch"]
+
+
+@pytest.fixture(params=["events.lhe", "events.lhe.gz"])
+def lhe_path(request, tmp_path):
+    path = tmp_path / request.param
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "wt") as f:
+        f.write(HEADER)
+        for i in range(NEVENTS):
+            f.write(EVENT.format(weight=i + 1))
+        f.write("</LesHouchesEvents>")
+    return path
+
+
+def test_prefetch_yields_same_events(lhe_path):
+    expected = list(pylhe.LesHouchesEvents.fromfile(lhe_path).events)
+    lhe = pylhe.LesHouchesEvents.fromfile(lhe_path, prefetch=2)
+
+    assert lhe.init.initInfo.beamA == 2212
+    assert list(lhe.events) == expected
+    assert len(expected) == NEVENTS
+    assert not _prefetch_threads()
+
+
+def test_prefetch_materialized(lhe_path):
+    lhe = pylhe.LesHouchesEvents.fromfile(lhe_path, generator=False, prefetch=1)
+
+    assert len(lhe.events) == NEVENTS
+    assert [e.eventinfo.weight for e in lhe.events] == pytest.approx(
+        range(1, NEVENTS + 1)
+    )
+
+
+def test_prefetch_early_close_stops_thread(lhe_path):
+    events = pylhe.LesHouchesEvents.fromfile(lhe_path, prefetch=1).events
+
+    assert next(events).eventinfo.weight == pytest.approx(1.0)
+    assert _prefetch_threads()
+    events.close()
+    assert not _prefetch_threads()
+
+
+def test_prefetch_propagates_errors(tmp_path):
+    path = tmp_path / "broken.lhe"
+    path.write_text(
+        HEADER + EVENT.format(weight=1.0) + BROKEN_EVENT + "</LesHouchesEvents>"
+    )
+
+    events = pylhe.LesHouchesEvents.fromfile(path, prefetch=2).events
+    assert next(events).eventinfo.weight == pytest.approx(1.0)
+    with pytest.raises(ValueError, match=r"not-a-number"):
+        next(events)
+    assert not _prefetch_threads()
+
+
+class _Interrupt(BaseException):
+    pass
+
+
+def test_prefetch_propagates_base_exceptions(lhe_path):
+    def _interrupted():
+        yield from pylhe.LesHouchesEvents.fromfile(lhe_path).events
+        raise _Interrupt
+
+    events = pylhe._prefetch(_interrupted(), depth=1, batch_size=2)
+    # The consumer gets the events before the interruption instead of waiting forever
+    with pytest.raises(_Interrupt):
+        for _ in events:
+            pass
+    assert not _prefetch_threads()
+
+
+def test_prefetch_must_be_non_negative(lhe_path):
+    with pytest.raises(ValueError, match=r"prefetch must be non-negative"):
+        pylhe.LesHouchesEvents.fromfile(lhe_path, prefetch=-1)
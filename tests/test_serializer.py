@@ -0,0 +1,119 @@
+import dataclasses
+
+import pytest
+
+import pylhe
+
+
+def _reference_tolhe(event, lheformat):
+    """The LHE XML of an event, serialized with the named-field templates of the format."""
+    sweights = ""
+    sscales = ""
+    if lheformat.version is pylhe.LHEVersion.V3:
+        if lheformat.weights is pylhe.LHEWeightFormat.RWGT and event.weights:
+            sweights = "<rwgt>\n"
+            for k, v in event.weights.items():
+                sweights += f" <wgt id='{k}'>{v:11.4e}</wgt>\n"
+            sweights += "</rwgt>\n"
+        elif lheformat.weights is pylhe.LHEWeightFormat.WEIGHTS and event.weights:
+            sweights = "<weights>\n"
+            for v in event.weights.values():
+                sweights += f"{v:11.4e}\n"
+            sweights += "</weights>\n"
+        if event.scales:
+            sscales = (
+                "<scales "
+                + " ".join(f"{k}='{v}'" for k, v in event.scales.items())
+                + "/>\n"
+            )
+    soptional = "\n".join(event.optional) + "\n" if event.optional else ""
+    return (
+        pylhe._open_xml_tag("event", event.attributes)
+        + "\n"
+        + lheformat.eventinfo.format(**dataclasses.asdict(event.eventinfo))
+        + "\n"
+        + "\n".join(
+            lheformat.particle.format(**dataclasses.asdict(p)) for p in event.particles
+        )
+        + "\n"
+        + soptional
+        + sweights
+        + sscales
+        + "</event>"
+    )
+
+
+def _particle(pid, px):
+    return pylhe.LHEParticle(
+        pid, 1, 1, 2, 501, 0, px, -px / 3, 1e3 * px, 1.5e3, 0.0, 0.0, -1.0
+    )
+
+
+EVENTS = [
+    pylhe.LHEEvent(
+        eventinfo=pylhe.LHEEventInfo(2, 1, 1.25, 91.1876, 7.8e-3, 0.118),
+        particles=[_particle(21, 12.5), _particle(-2, -1e-7)],
+        weights={"1001": 1.25, "1002": -3.5e-12, "10%": 0.0},
+        scales={"muf": 90.1, "mur": 90.2},
+        attributes={"npLO": " -1 ", "quote": "a'b\"c"},
+        optional=["#aMCatNLO 1 2 3", "#pdf 21 21"],
+    ),
+    pylhe.LHEEvent(
+        eventinfo=pylhe.LHEEventInfo(1, -7, -2.5e300, 0.0, 0.0, float("nan")),
+        particles=[_particle(11, float("inf"))],
+    ),
+    pylhe.LHEEvent(
+        eventinfo=pylhe.LHEEventInfo(0, 0, 0.0, 0.0, 0.0, 0.0),
+        particles=[],
+        weights={"a": 1.0},
+    ),
+]
+
+FORMATS = [
+    pylhe.DEFAULT_FORMAT,
+    pylhe.WEIGHTS_FORMAT,
+    pylhe.NO_WEIGHTS_FORMAT,
+    pylhe.LHEXMLFormat(version=pylhe.LHEVersion.V1),
+    # Format specs without printf equivalent fall back to str.format
+    pylhe.LHEXMLFormat(
+        particle="{id:>5d}|{px:<15.8e}|{spin!r}|{status:+d} {pz:_>12.3f} 100%"
+    ),
+    pylhe.LHEXMLFormat(eventinfo="{weight:+012.3e} {pid:-4d} {nparticles} 5% {aqcd:g}"),
+]
+
+
+@pytest.mark.parametrize("lheformat", FORMATS)
+@pytest.mark.parametrize("event", EVENTS)
+def test_event_tolhe_matches_named_templates(event, lheformat):
+    assert event.tolhe(lheformat=lheformat) == _reference_tolhe(event, lheformat)
+
+
+@pytest.mark.parametrize("lheformat", FORMATS)
+def test_particle_and_eventinfo_tolhe_match_named_templates(lheformat):
+    event = EVENTS[0]
+    assert event.eventinfo.tolhe(lheformat=lheformat) == lheformat.eventinfo.format(
+        **dataclasses.asdict(event.eventinfo)
+    )
+    for particle in event.particles:
+        assert particle.tolhe(lheformat=lheformat) == lheformat.particle.format(
+            **dataclasses.asdict(particle)
+        )
+
+
+@pytest.mark.parametrize("lheformat", FORMATS)
+def test_write_matches_events(lheformat):
+    lhe = pylhe.LesHouchesEvents(
+        init=pylhe.LHEInit(
+            initInfo=pylhe.LHEInitInfo(2212, 2212, 6500.0, 6500.0, 0, 0, 0, 0, 3, 0),
+            procInfo=[],
+            generators=[],
+        ),
+        events=EVENTS * 200,
+    )
+
+    written = lhe.tolhe(lheformat=lheformat)
+
+    assert written.endswith(
+        "".join(_reference_tolhe(e, lheformat) + "\n" for e in EVENTS * 200)
+        + "</LesHouchesEvents>"
+    )
@@ -0,0 +1,109 @@
+import gzip
+
+import pytest
+
+import pylhe
+
+PROLOGUE = """<LesHouchesEvents version="3.0">
+<header>
+<MGVersion>
+3.5.0
+</MGVersion>
+<initrwgt>
+<weightgroup name="scale_variation" combine="envelope">
+<weight id="1001">muR=1 muF=1</weight>
+<weight id="1002">muR=2 muF=1</weight>
+</weightgroup>
+<weightgroup name="PDF">
+<weight id="2001">PDF=1</weight>
+<weight id="2002">PDF=2</weight>
+</weightgroup>
+<weight id="3001">extra</weight>
+</initrwgt>
+</header>
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+"""
+
+EVENT = """<event>
+ 1      1 +1.0000000e+00 9.11884000e+01 -1.0e+00 -1.0e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<mgrwt>
+<rscale>  0 0.91188000E+02</rscale>
+</mgrwt>
+<rwgt>
+<wgt id='1001'> 1.00000e+00</wgt>
+<wgt id='1002'> 2.00000e+00</wgt>
+<wgt id='2001'> 3.00000e+00</wgt>
+<wgt id='2002'> 4.00000e+00</wgt>
+<wgt id='3001'> 5.00000e+00</wgt>
+</rwgt>
+</event>
+"""
+
+WEIGHTS_EVENT = """<event>
+ 1      1 +1.0000000e+00 9.11884000e+01 -1.0e+00 -1.0e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<weights>
+1.0
+2.0
+3.0
+4.0
+5.0
+</weights>
+</event>
+"""
+
+
+@pytest.fixture
+def lhe_path(tmp_path):
+    path = tmp_path / "events.lhe"
+    path.write_text(PROLOGUE + EVENT * 3 + WEIGHTS_EVENT + "</LesHouchesEvents>")
+    return path
+
+
+@pytest.mark.parametrize("suffix", [".lhe", ".lhe.gz"])
+def test_slim(tmp_path, lhe_path, suffix):
+    out_path = tmp_path / f"slim{suffix}"
+    pylhe.slim(
+        lhe_path, out_path, keep_weights=["3001"], keep_groups=["scale_variation"]
+    )
+
+    lhef = pylhe.LesHouchesEvents.fromfile(out_path)
+    assert [w.id for w in lhef.header.initrwgt.iter_weights()] == [
+        "1001",
+        "1002",
+        "3001",
+    ]
+    assert lhef.header.initrwgt.entries[0].combine == "envelope"
+    assert lhef.header.extra_elements[0].tag == "MGVersion"
+    expected = {"1001": 1.0, "1002": 2.0, "3001": 5.0}
+    assert [event.weights for event in lhef.events] == [expected] * 4
+
+    with (gzip.open if suffix.endswith(".gz") else open)(out_path, "rt") as f:
+        text = f.read()
+    assert text.count("<mgrwt>") == 3
+    assert "<weights>\n1.0\n2.0\n5.0\n</weights>" in text
+
+
+def test_slim_drop_all(tmp_path, lhe_path):
+    out_path = tmp_path / "slim.lhe"
+    pylhe.slim(lhe_path, out_path)
+
+    lhef = pylhe.LesHouchesEvents.fromfile(out_path)
+    assert list(lhef.header.initrwgt.iter_weights()) == []
+    assert [event.weights for event in lhef.events] == [{}] * 4
+    text = out_path.read_text()
+    assert "<rwgt>" not in text
+    assert "<weights>" not in text
+
+
+def test_slim_validation(tmp_path, lhe_path):
+    with pytest.raises(ValueError, match="Unknown weight IDs"):
+        pylhe.slim(lhe_path, tmp_path / "out.lhe", keep_weights=["9999"])
+    with pytest.raises(ValueError, match="Unknown weight groups"):
+        pylhe.slim(lhe_path, tmp_path / "out.lhe", keep_groups=["nope"])
+    with pytest.raises(ValueError, match="LHE XML"):
+        pylhe.slim(lhe_path, tmp_path / "out.hdf5")
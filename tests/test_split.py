@@ -0,0 +1,161 @@
+import gzip
+import os
+
+import pytest
+
+import pylhe
+
+PROLOGUE = """<LesHouchesEvents version="3.0">
+<!-- generated for testing -->
+<header>
+<MGVersion>
+3.5.0
+</MGVersion>
+<initrwgt>
+<weight id="1001">muR=1 muF=1</weight>
+</initrwgt>
+</header>
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+"""
+
+EVENT = """<event>
+ 1      {pid} +{weight:.7e} 9.11884000e+01 -1.0e+00 -1.0e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<mgrwt>
+<rscale>  0 0.91188000E+02</rscale>
+</mgrwt>
+<rwgt>
+<wgt id='1001'> {weight:.5e}</wgt>
+</rwgt>
+</event>
+"""
+
+EVENTS = [EVENT.format(pid=i % 3 + 1, weight=i + 1.0) for i in range(10)]
+
+
+@pytest.fixture
+def lhe_path(tmp_path):
+    path = tmp_path / "events.lhe"
+    path.write_text(PROLOGUE + "".join(EVENTS) + "</LesHouchesEvents>")
+    return path
+
+
+def test_split_copies_raw_events(tmp_path, lhe_path):
+    paths = pylhe.split(
+        lhe_path, events_per_file=4, pattern=str(tmp_path / "out_{i}.lhe")
+    )
+
+    assert paths == [str(tmp_path / f"out_{i}.lhe") for i in range(3)]
+    for path, events in zip(paths, [EVENTS[:4], EVENTS[4:8], EVENTS[8:]], strict=True):
+        with open(path) as f:
+            assert f.read() == PROLOGUE + "".join(events) + "</LesHouchesEvents>"
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_split_gzip(tmp_path, lhe_path, workers):
+    paths = pylhe.split(
+        lhe_path,
+        events_per_file=3,
+        pattern=str(tmp_path / "out_{i:02d}.lhe.gz"),
+        workers=workers,
+    )
+
+    assert len(paths) == 4
+    text = ""
+    for path in paths:
+        with gzip.open(path, "rt") as f:
+            content = f.read()
+        assert content.startswith(PROLOGUE)
+        text += content[len(PROLOGUE) : -len("</LesHouchesEvents>")]
+    assert text == "".join(EVENTS)
+
+
+@pytest.mark.parametrize(
+    ("max_bytes", "counts"), [(0, [3, 3, 3, 1]), (-1, [2, 2, 2, 2, 2])]
+)
+def test_split_max_bytes(tmp_path, lhe_path, max_bytes, counts):
+    # The limit includes the header, the init block and the closing tag
+    max_bytes += len(PROLOGUE) + len("</LesHouchesEvents>") + 3 * len(EVENTS[0])
+    paths = pylhe.split(
+        lhe_path, max_bytes=max_bytes, pattern=str(tmp_path / "out_{i}.lhe")
+    )
+
+    assert [pylhe.LesHouchesEvents.count_events(path) for path in paths] == counts
+    assert all(os.path.getsize(path) <= max_bytes for path in paths)
+
+
+def test_split_max_bytes_counts_utf8_bytes(tmp_path):
+    path = tmp_path / "events.lhe"
+    events = [
+        event.replace("<mgrwt>", "<!-- événement -->\n<mgrwt>") for event in EVENTS
+    ]
+    path.write_text(
+        PROLOGUE + "".join(events) + "</LesHouchesEvents>", encoding="utf-8"
+    )
+    max_bytes = len(PROLOGUE) + len("</LesHouchesEvents>") + 3 * len(events[0])
+
+    paths = pylhe.split(
+        path, max_bytes=max_bytes, pattern=str(tmp_path / "out_{i}.lhe")
+    )
+
+    assert [pylhe.LesHouchesEvents.count_events(path) for path in paths] == [2] * 5
+    assert all(os.path.getsize(path) <= max_bytes for path in paths)
+
+
+def test_split_lheh5(tmp_path, lhe_path):
+    paths = pylhe.split(
+        lhe_path, events_per_file=6, pattern=str(tmp_path / "out_{i}.hdf5")
+    )
+    assert [pylhe.LesHouchesEvents.count_events(path) for path in paths] == [6, 4]
+
+    # LHEH5 input is read and serialized
+    shards = pylhe.split(
+        paths[0], events_per_file=4, pattern=str(tmp_path / "shard_{i}.lhe")
+    )
+    events = [
+        event
+        for path in shards
+        for event in pylhe.LesHouchesEvents.fromfile(path).events
+    ]
+    assert [event.eventinfo.weight for event in events] == [
+        1.0,
+        2.0,
+        3.0,
+        4.0,
+        5.0,
+        6.0,
+    ]
+
+
+def test_split_empty(tmp_path):
+    path = tmp_path / "empty.lhe"
+    path.write_text(PROLOGUE + "</LesHouchesEvents>")
+
+    assert (
+        pylhe.split(path, events_per_file=2, pattern=str(tmp_path / "o{i}.lhe")) == []
+    )
+
+
+def test_split_validation(tmp_path, lhe_path):
+    with pytest.raises(ValueError, match="events_per_file or max_bytes"):
+        pylhe.split(lhe_path)
+    with pytest.raises(ValueError, match="events_per_file must be positive"):
+        pylhe.split(lhe_path, events_per_file=0)
+    with pytest.raises(ValueError, match="file index"):
+        pylhe.split(lhe_path, events_per_file=2, pattern=str(tmp_path / "out.lhe"))
+    with pytest.raises(ValueError, match="LHE XML output"):
+        pylhe.split(lhe_path, max_bytes=100, pattern=str(tmp_path / "out_{i}.hdf5"))
+
+
+def test_split_truncated(tmp_path):
+    path = tmp_path / "truncated.lhe"
+    path.write_text(PROLOGUE + "".join(EVENTS[:3]) + EVENTS[3][:50])
+
+    with pytest.warns(RuntimeWarning, match="Parse Error"):
+        paths = pylhe.split(
+            path, events_per_file=2, pattern=str(tmp_path / "out_{i}.lhe")
+        )
+    assert [pylhe.LesHouchesEvents.count_events(path) for path in paths] == [2, 1]
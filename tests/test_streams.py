@@ -0,0 +1,133 @@
+import gzip
+import io
+import os
+import threading
+
+import pytest
+
+import pylhe
+
+LHE_CONTENT = """<LesHouchesEvents version="3.0">
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+<event>
+  2      1 +1.0000000e+00  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+</event>
+<event>
+  2      1 +2.0000000e+00  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+</event>
+</LesHouchesEvents>"""
+
+
+def _zstd_compress(data):
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+
+COMPRESSORS = {
+    "plain": lambda data: data,
+    "gzip": gzip.compress,
+    "zstd": _zstd_compress,
+}
+
+
+def _weights(lhe):
+    return [e.eventinfo.weight for e in lhe.events]
+
+
+def _feed_pipe(data, write_fd):
+    def _write():
+        with os.fdopen(write_fd, "wb") as f:
+            # Write in small pieces so that reads return short chunks
+            for i in range(0, len(data), 3):
+                f.write(data[i : i + 3])
+                f.flush()
+
+    thread = threading.Thread(target=_write)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("compression", COMPRESSORS)
+def test_frombuffer_pipe(compression):
+    data = COMPRESSORS[compression](LHE_CONTENT.encode())
+    read_fd, write_fd = os.pipe()
+    thread = _feed_pipe(data, write_fd)
+
+    with os.fdopen(read_fd, "rb") as f:
+        assert not f.seekable()
+        lhe = pylhe.LesHouchesEvents.frombuffer(f, generator=False)
+    thread.join()
+
+    assert lhe.init.initInfo.beamA == 2212
+    assert _weights(lhe) == [1.0, 2.0]
+
+
+@pytest.mark.parametrize("compression", COMPRESSORS)
+def test_frombuffer_unbuffered_pipe(compression):
+    data = COMPRESSORS[compression](LHE_CONTENT.encode())
+    read_fd, write_fd = os.pipe()
+    thread = _feed_pipe(data, write_fd)
+
+    with os.fdopen(read_fd, "rb", buffering=0) as f:
+        lhe = pylhe.LesHouchesEvents.frombuffer(f, generator=False)
+    thread.join()
+
+    assert _weights(lhe) == [1.0, 2.0]
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="requires named pipes")
+@pytest.mark.parametrize("compression", COMPRESSORS)
+def test_fromfile_fifo(tmp_path, compression):
+    data = COMPRESSORS[compression](LHE_CONTENT.encode())
+    fifo = tmp_path / "events.lhe"
+    os.mkfifo(fifo)
+
+    def _write():
+        with fifo.open("wb") as f:
+            f.write(data)
+
+    thread = threading.Thread(target=_write)
+    thread.start()
+    lhe = pylhe.LesHouchesEvents.fromfile(fifo, generator=False)
+    thread.join()
+
+    assert _weights(lhe) == [1.0, 2.0]
+
+
+@pytest.mark.parametrize("compression", COMPRESSORS)
+def test_fromfile_compression_detected(tmp_path, compression):
+    path = tmp_path / "events"
+    path.write_bytes(COMPRESSORS[compression](LHE_CONTENT.encode()))
+
+    assert _weights(pylhe.LesHouchesEvents.fromfile(path)) == [1.0, 2.0]
+    assert pylhe.LesHouchesEvents.count_events(path) == 2
+
+
+def test_frombuffer_hdf5_from_pipe_raises(tmp_path):
+    path = tmp_path / "events.hdf5"
+    pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, generator=False).tofile(path)
+    read_fd, write_fd = os.pipe()
+    thread = _feed_pipe(path.read_bytes()[:64], write_fd)
+
+    with (
+        os.fdopen(read_fd, "rb") as f,
+        pytest.raises(ValueError, match=r"non-seekable"),
+    ):
+        pylhe.LesHouchesEvents.frombuffer(f)
+    thread.join()
+
+
+def test_frombuffer_hdf5_bytesio(tmp_path):
+    path = tmp_path / "events.hdf5"
+    pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, generator=False).tofile(path)
+
+    lhe = pylhe.LesHouchesEvents.frombuffer(io.BytesIO(path.read_bytes()))
+
+    assert _weights(lhe) == [1.0, 2.0]
@@ -0,0 +1,170 @@
+import gzip
+import io
+
+import numpy as np
+import pytest
+
+import pylhe
+from pylhe.columnar import EVENTINFO_FIELDS, PARTICLE_FIELDS
+
+INIT = pylhe.LHEInit(
+    initInfo=pylhe.LHEInitInfo(2212, 2212, 6500.0, 6500.0, 0, 0, 0, 0, 3, 1),
+    procInfo=[pylhe.LHEProcInfo(1.0, 0.0, 1.0, 1)],
+    generators=[],
+)
+
+FORMATS = [
+    pylhe.DEFAULT_FORMAT,
+    pylhe.WEIGHTS_FORMAT,
+    pylhe.NO_WEIGHTS_FORMAT,
+    pylhe.LHEXMLFormat(version=pylhe.LHEVersion.V1),
+    # Format specs without printf equivalent fall back to str.format
+    pylhe.LHEXMLFormat(
+        particle="{id:>5d}|{px:<15.8e}|{spin!r}|{status:+d} {pz:_>12.3f} 100%"
+    ),
+]
+
+
+def _events(nevents=50, seed=42):
+    rng = np.random.default_rng(seed)
+    events = []
+    for _ in range(nevents):
+        n = int(rng.integers(0, 5))
+        particles = [
+            pylhe.LHEParticle(
+                int(rng.choice([1, -2, 21, 11, 1000022])),
+                int(rng.choice([-1, 1, 2])),
+                int(rng.integers(0, 3)),
+                int(rng.integers(0, 3)),
+                int(rng.integers(500, 505)),
+                0,
+                *rng.normal(0, 1e3, 5).tolist(),
+                0.0,
+                float(rng.choice([-1.0, 1.0, 9.0])),
+            )
+            for _ in range(n)
+        ]
+        weight = float(rng.normal())
+        events.append(
+            pylhe.LHEEvent(
+                eventinfo=pylhe.LHEEventInfo(
+                    n, int(rng.integers(-3, 3)), weight, 91.1876, 7.8e-3, 0.118
+                ),
+                particles=particles,
+                weights={"1001": weight, "1002": weight / 2, "10%": -1e-300},
+            )
+        )
+    return events
+
+
+def _columns(events):
+    event_columns = {
+        name: [getattr(e.eventinfo, name) for e in events]
+        for name in EVENTINFO_FIELDS
+        if name != "nparticles"
+    }
+    particle_columns = {
+        name: [getattr(p, name) for e in events for p in e.particles]
+        for name in PARTICLE_FIELDS
+    }
+    offsets = np.cumsum([0] + [len(e.particles) for e in events])
+    keys = events[0].weights if events else {}
+    weights = {key: [e.weights[key] for e in events] for key in keys}
+    return event_columns, particle_columns, offsets, weights
+
+
+def _expected(events, lheformat):
+    stream = io.StringIO()
+    with pylhe.LHEWriter(stream, INIT, lheformat=lheformat) as writer:
+        writer.write_events(events)
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("lheformat", FORMATS)
+def test_write_columns_matches_events(lheformat):
+    events = _events()
+    stream = io.StringIO()
+    pylhe.write_columns(stream, INIT, None, *_columns(events), lheformat=lheformat)
+
+    assert stream.getvalue() == _expected(events, lheformat)
+
+
+def test_write_columns_batches(monkeypatch):
+    monkeypatch.setattr(pylhe.writer, "_COLUMN_BATCH_SIZE", 7)
+    events = _events(nevents=30)
+    stream = io.StringIO()
+    with pylhe.LHEWriter(stream, INIT) as writer:
+        writer.write_columns(*_columns(events[:12]))
+        writer.write_columns(*_columns(events[12:]))
+        assert writer.nevents == 30
+
+    assert stream.getvalue() == _expected(events, pylhe.DEFAULT_FORMAT)
+
+
+def test_write_columns_gzip_roundtrip(tmp_path):
+    events = _events()
+    path = tmp_path / "columns.lhe.gz"
+    event_columns, particle_columns, offsets, weights = _columns(events)
+    # Particles before the first event's offset are skipped
+    particle_columns = {name: [0, *column] for name, column in particle_columns.items()}
+    pylhe.write_columns(
+        path, INIT, None, event_columns, particle_columns, offsets + 1, weights
+    )
+
+    with gzip.open(path, "rt") as f:
+        assert f.read() == _expected(events, pylhe.DEFAULT_FORMAT)
+    lhe = pylhe.LesHouchesEvents.fromfile(path, generator=False)
+    assert [e.eventinfo.nparticles for e in lhe.events] == [
+        len(e.particles) for e in events
+    ]
+
+
+def test_write_columns_empty():
+    stream = io.StringIO()
+    pylhe.write_columns(stream, INIT, None, *_columns(_events(nevents=1)[:0]))
+
+    assert stream.getvalue() == _expected([], pylhe.DEFAULT_FORMAT)
+
+
+def test_write_columns_validation():
+    event_columns, particle_columns, offsets, _ = _columns(_events(nevents=3))
+    stream = io.StringIO()
+    with pytest.raises(ValueError, match="nparticles"):
+        pylhe.write_columns(
+            stream,
+            INIT,
+            None,
+            {**event_columns, "nparticles": [9, 9, 9]},
+            particle_columns,
+            offsets,
+        )
+    with pytest.raises(ValueError, match="one entry per event"):
+        pylhe.write_columns(
+            stream, INIT, None, event_columns, particle_columns, offsets, {"a": [1.0]}
+        )
+    with pytest.raises(ValueError, match="non-decreasing"):
+        pylhe.write_columns(
+            stream, INIT, None, event_columns, particle_columns, offsets[::-1]
+        )
+    with pytest.raises(ValueError, match="spin"):
+        pylhe.write_columns(
+            stream,
+            INIT,
+            None,
+            event_columns,
+            {k: v for k, v in particle_columns.items() if k != "spin"},
+            offsets,
+        )
+
+
+def test_write_columns_lheh5(tmp_path):
+    events = _events()
+    path = tmp_path / "columns.hdf5"
+    pylhe.write_columns(path, INIT, None, *_columns(events))
+    reference = tmp_path / "events.hdf5"
+    with pylhe.LHEWriter(reference, INIT) as writer:
+        writer.write_events(events)
+
+    assert list(pylhe.LesHouchesEvents.fromfile(path).events) == list(
+        pylhe.LesHouchesEvents.fromfile(reference).events
+    )
@@ -0,0 +1,490 @@
+import dataclasses
+import gzip
+import io
+import os
+import threading
+import xml.etree.ElementTree as ET
+import zlib
+
+import h5py
+import pytest
+
+import pylhe
+
+LHE_CONTENT = """<LesHouchesEvents version="3.0">
+<header>
+<initrwgt>
+<weight id="1001">muR=1 muF=1</weight>
+<weight id="1002">muR=2 muF=1</weight>
+</initrwgt>
+</header>
+<init>
+  2212  2212  6.500000e+03  6.500000e+03  0  0  0  0  3  1
+  1.000000e+00  0.000000e+00  1.000000e+00  1
+</init>
+<event>
+  2      1 +1.0000000e+00  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<rwgt>
+<wgt id='1001'> 1.0000e+00</wgt>
+<wgt id='1002'> 2.0000e+00</wgt>
+</rwgt>
+</event>
+<event>
+  2      1 +2.0000000e+00  9.11884000e+01 -1.00000000e+00 -1.00000000e+00
+       21 -1    0    0  501  502 +0.00000000e+00 +0.00000000e+00 +4.56308892e+02 +4.56308892e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+       21 -1    0    0  502  501 -0.00000000e+00 -0.00000000e+00 -2.24036073e+02 +2.24036073e+02 +0.00000000e+00 0.0000e+00 9.0000e+00
+<rwgt>
+<wgt id='1001'> 3.0000e+00</wgt>
+<wgt id='1002'> 4.0000e+00</wgt>
+</rwgt>
+</event>
+</LesHouchesEvents>"""
+
+
+@pytest.fixture
+def lhe():
+    return pylhe.LesHouchesEvents.fromstring(LHE_CONTENT, generator=False)
+
+
+def _write(writer, lhe):
+    with writer:
+        for event in lhe.events:
+            writer.write_event(event)
+    return writer
+
+
+def test_writer_matches_tolhe(lhe):
+    stream = io.StringIO()
+    writer = _write(
+        pylhe.LHEWriter.to_stream(stream, init=lhe.init, header=lhe.header), lhe
+    )
+
+    assert writer.closed
+    assert writer.nevents == 2
+    assert stream.getvalue() == lhe.tolhe()
+    assert not stream.closed
+
+
+@pytest.mark.parametrize("lheformat", [pylhe.DEFAULT_FORMAT, pylhe.WEIGHTS_GZ_FORMAT])
+def test_writer_binary_stream(lhe, lheformat):
+    stream = io.BytesIO()
+    _write(pylhe.LHEWriter.to_stream(stream, lhe.init, lhe.header, lheformat), lhe)
+
+    data = stream.getvalue()
+    if lheformat.compress:
+        data = gzip.decompress(data)
+    assert data.decode() == lhe.tolhe(lheformat=lheformat)
+    assert not stream.closed
+
+
+@pytest.mark.parametrize("suffix", [".lhe", ".lhe.gz"])
+def test_writer_path(tmp_path, lhe, suffix):
+    path = tmp_path / f"events{suffix}"
+    _write(pylhe.LHEWriter(path, lhe.init, lhe.header), lhe)
+
+    assert list(pylhe.LesHouchesEvents.fromfile(path).events) == lhe.events
+
+
+def test_writer_flush_policy(lhe):
+    class _Stream(io.StringIO):
+        def __init__(self):
+            super().__init__()
+            self.flushed = []
+
+        def flush(self):
+            self.flushed.append(self.getvalue().count("</event>"))
+            super().flush()
+
+    stream = _Stream()
+    writer = pylhe.LHEWriter.to_stream(stream, lhe.init, flush_every=2)
+    assert stream.flushed == [0]
+    for event in lhe.events * 2:
+        writer.write_event(event)
+    assert stream.flushed == [0, 2, 4]
+    writer.close()
+    assert stream.getvalue().endswith("</LesHouchesEvents>")
+
+    with pytest.raises(ValueError, match=r"closed LHEWriter"):
+        writer.write_event(lhe.events[0])
+
+
+def test_writer_pipe_consumer_reads_while_writing(lhe):
+    read_fd, write_fd = os.pipe()
+    received = []
+    init_seen = threading.Event()
+
+    def _consume():
+        with os.fdopen(read_fd, "r") as f:
+            for line in f:
+                received.append(line)
+                if line.startswith("</init>"):
+                    init_seen.set()
+
+    consumer = threading.Thread(target=_consume)
+    consumer.start()
+    with os.fdopen(write_fd, "wb") as pipe:
+        writer = pylhe.LHEWriter.to_stream(pipe, lhe.init, lhe.header)
+        # The init block reaches the consumer before any event is written
+        assert init_seen.wait(timeout=10)
+        _write(writer, lhe)
+    consumer.join()
+
+    assert "".join(received) == lhe.tolhe()
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="requires named pipes")
+def test_writer_fifo(tmp_path, lhe):
+    fifo = tmp_path / "events.lhe"
+    os.mkfifo(fifo)
+    result = {}
+
+    def _consume():
+        result["lhe"] = pylhe.LesHouchesEvents.fromfile(fifo, generator=False)
+
+    consumer = threading.Thread(target=_consume)
+    consumer.start()
+    _write(pylhe.LHEWriter.to_stream(fifo, lhe.init, lhe.header), lhe)
+    consumer.join()
+
+    assert result["lhe"].events == lhe.events
+
+
+def test_writer_rejects_compressed_text_stream(lhe):
+    with pytest.raises(ValueError, match=r"binary stream"):
+        pylhe.LHEWriter(io.StringIO(), lhe.init, lheformat=pylhe.GZ_FORMAT)
+
+
+@pytest.mark.parametrize("buffer_size", [1, 1 << 20])
+def test_writer_write_events(tmp_path, lhe, buffer_size):
+    path = tmp_path / "events.lhe"
+    with pylhe.LHEWriter(
+        path, init=lhe.init, header=lhe.header, buffer_size=buffer_size
+    ) as writer:
+        writer.write_event(lhe.events[0])
+        writer.write_events(iter(lhe.events))
+        writer.write_events([])
+
+    assert writer.nevents == 3
+    assert (
+        path.read_text()
+        == pylhe.LesHouchesEvents(
+            init=lhe.init, header=lhe.header, events=[lhe.events[0], *lhe.events]
+        ).tolhe()
+    )
+
+
+def test_writer_buffers_output(tmp_path, lhe):
+    path = tmp_path / "events.lhe"
+    with pylhe.LHEWriter(path, init=lhe.init) as writer:
+        writer.write_events(lhe.events)
+        assert path.read_text() == ""
+        writer.flush()
+        assert path.read_text().count("</event>") == 2
+
+
+@pytest.mark.parametrize(
+    ("suffix", "lheformat"),
+    [(".hdf5", None), (".h5", pylhe.HDF5_GZ_FORMAT)],
+)
+def test_writer_lheh5(tmp_path, lhe, suffix, lheformat):
+    path = tmp_path / f"events{suffix}"
+    expected = tmp_path / f"expected{suffix}"
+    lhe.tofile(expected, lheformat=lheformat)
+
+    with pylhe.LHEWriter(path, init=lhe.init, lheformat=lheformat) as writer:
+        writer.write_event(lhe.events[0])
+        writer.write_events(lhe.events[1:])
+
+    written = pylhe.LesHouchesEvents.fromfile(path, generator=False)
+    assert written.init == lhe.init
+    assert (
+        written.events
+        == pylhe.LesHouchesEvents.fromfile(expected, generator=False).events
+    )
+
+
+@pytest.mark.parametrize("suffix", [".lhe", ".lhe.gz", ".hdf5"])
+def test_writer_background(tmp_path, lhe, suffix):
+    events = [lhe.events[0], *lhe.events[1:] * 2000]
+    paths = {}
+    for background in (False, True):
+        paths[background] = tmp_path / f"events-{background}{suffix}"
+        with pylhe.LHEWriter(
+            paths[background], lhe.init, lhe.header, background=background
+        ) as writer:
+            writer.write_event(events[0])
+            writer.write_events(events[1:])
+            writer.flush()
+            assert writer.nevents == len(events)
+        assert writer.closed
+
+    if suffix == ".lhe":
+        assert paths[True].read_text() == paths[False].read_text()
+    assert list(pylhe.LesHouchesEvents.fromfile(paths[True]).events) == list(
+        pylhe.LesHouchesEvents.fromfile(paths[False]).events
+    )
+
+
+@pytest.mark.parametrize("suffix", [".lhe", ".lhe.gz", ".hdf5"])
+def test_tofile_background(tmp_path, lhe, suffix):
+    path = tmp_path / f"events{suffix}"
+    expected = tmp_path / f"expected{suffix}"
+    lhe.tofile(path, background=True)
+    lhe.tofile(expected)
+
+    assert list(pylhe.LesHouchesEvents.fromfile(path).events) == list(
+        pylhe.LesHouchesEvents.fromfile(expected).events
+    )
+
+
+def test_writer_background_flush_policy(lhe):
+    stream = io.StringIO()
+    with pylhe.LHEWriter.to_stream(stream, lhe.init) as writer:
+        writer.write_events(lhe.events)
+        expected = stream.getvalue()
+
+    stream = io.StringIO()
+    writer = pylhe.LHEWriter(
+        stream, lhe.init, flush_every=1, flush_after_init=True, background=True
+    )
+    writer.write_events(lhe.events)
+    writer.flush()
+    assert stream.getvalue() == expected
+    writer.close()
+    assert stream.getvalue().endswith("</LesHouchesEvents>")
+
+
+def test_writer_background_error_raised_on_close(lhe):
+    class _FailingStream(io.StringIO):
+        def write(self, s):
+            if "<event>" in s:
+                msg = "disk full"
+                raise OSError(msg)
+            return super().write(s)
+
+    stream = _FailingStream()
+    writer = pylhe.LHEWriter(stream, lhe.init, buffer_size=1, background=True)
+    # The producer is not interrupted, the error surfaces on close
+    writer.write_events(lhe.events)
+    writer.write_events(lhe.events)
+    with pytest.raises(OSError, match=r"disk full"):
+        writer.close()
+    assert writer.closed
+
+
+def _write_and_crash(writer, events):
+    with writer:
+        writer.write_events(events)
+        msg = "generator crashed"
+        raise RuntimeError(msg)
+
+
+@pytest.mark.parametrize("background", [False, True])
+@pytest.mark.parametrize("suffix", [".lhe", ".lhe.gz", ".hdf5"])
+def test_writer_exception_skips_epilogue(tmp_path, lhe, suffix, background):
+    path = tmp_path / f"events{suffix}"
+    writer = pylhe.LHEWriter(path, lhe.init, lhe.header, background=background)
+    with pytest.raises(RuntimeError, match=r"generator crashed"):
+        _write_and_crash(writer, lhe.events)
+    assert writer.closed
+
+    if suffix == ".hdf5":
+        with h5py.File(path, "r") as file:
+            assert "version" not in file
+        return
+    text = (
+        gzip.decompress(path.read_bytes()).decode()
+        if suffix == ".lhe.gz"
+        else path.read_text()
+    )
+    assert text.count("<event>") == len(lhe.events)
+    assert not text.rstrip().endswith("</LesHouchesEvents>")
+
+
+def test_writer_exception_not_masked_by_background_error(lhe):
+    class _FailingStream(io.StringIO):
+        def write(self, s):
+            if "<event>" in s:
+                msg = "disk full"
+                raise OSError(msg)
+            return super().write(s)
+
+    stream = _FailingStream()
+    writer = pylhe.LHEWriter(stream, lhe.init, buffer_size=1, background=True)
+    with pytest.raises(RuntimeError, match=r"generator crashed"):
+        _write_and_crash(writer, lhe.events * 2)
+    assert writer.closed
+    assert "</LesHouchesEvents>" not in stream.getvalue()
+
+
+@pytest.mark.parametrize("suffix", [".lhe", ".lhe.gz"])
+def test_writer_append(tmp_path, lhe, suffix):
+    path = tmp_path / f"events{suffix}"
+    lhe.tofile(path)
+    with pylhe.LHEWriter(path, lhe.init, lhe.header, mode="a") as writer:
+        writer.write_events(lhe.events)
+    with pylhe.LHEWriter(path, lhe.init, mode="a") as writer:
+        writer.write_event(lhe.events[0])
+
+    expected = pylhe.LesHouchesEvents(
+        init=lhe.init, header=lhe.header, events=[*lhe.events * 2, lhe.events[0]]
+    ).tolhe()
+    if suffix == ".lhe.gz":
+        assert gzip.decompress(path.read_bytes()).decode() == expected
+    else:
+        assert path.read_text() == expected
+    assert len(list(pylhe.LesHouchesEvents.fromfile(path).events)) == 5
+
+
+def test_writer_append_validates_init_and_weights(tmp_path, lhe):
+    path = tmp_path / "events.lhe"
+    lhe.tofile(path)
+    original = path.read_text()
+
+    init = dataclasses.replace(
+        lhe.init, initInfo=dataclasses.replace(lhe.init.initInfo, energyA=7000.0)
+    )
+    with pytest.raises(ValueError, match=r"init block does not match"):
+        pylhe.LHEWriter(path, init, mode="a")
+    header = pylhe.LHEHeader(initrwgt=pylhe.LHEInitRWGT())
+    with pytest.raises(ValueError, match=r"initrwgt block does not match"):
+        pylhe.LHEWriter(path, lhe.init, header, mode="a")
+    assert path.read_text() == original
+
+
+@pytest.mark.parametrize("lheformat", [pylhe.DEFAULT_FORMAT, pylhe.WEIGHTS_FORMAT])
+def test_writer_append_validates_event_weights(tmp_path, lhe, lheformat):
+    path = tmp_path / "events.lhe"
+    lhe.tofile(path, lheformat=lheformat)
+    undeclared = dataclasses.replace(lhe.events[0], weights={"2001": 1.0})
+    reordered = dataclasses.replace(lhe.events[0], weights={"1002": 2.0, "1001": 1.0})
+
+    with pylhe.LHEWriter(path, lhe.init, lheformat=lheformat, mode="a") as writer:
+        with pytest.raises(ValueError, match=r"not declared"):
+            writer.write_event(undeclared)
+        with pytest.raises(ValueError, match=r"not declared"):
+            writer.write_events([lhe.events[1], undeclared])
+        with pytest.raises(ValueError, match=r"not declared"):
+            writer.write_events(pylhe.LHEEventColumns.fromevents([undeclared]))
+        if lheformat.weights is pylhe.LHEWeightFormat.WEIGHTS:
+            with pytest.raises(ValueError, match=r"order"):
+                writer.write_event(reordered)
+        else:
+            writer.write_event(reordered)
+        writer.write_event(lhe.events[0])
+
+    # Blocks of events are checked before any of them is written
+    appended = [reordered, lhe.events[0]]
+    if lheformat.weights is pylhe.LHEWeightFormat.WEIGHTS:
+        appended = appended[1:]
+    events = list(pylhe.LesHouchesEvents.fromfile(path).events)
+    assert [event.weights for event in events[2:]] == [
+        event.weights for event in appended
+    ]
+
+
+def _gzip_members(data):
+    members = 0
+    while data:
+        decompressor = zlib.decompressobj(wbits=31)
+        decompressor.decompress(data)
+        assert decompressor.eof
+        data = decompressor.unused_data
+        members += 1
+    return members
+
+
+def test_tofile_gzip_single_member(tmp_path, lhe):
+    path = tmp_path / "events.lhe.gz"
+    lhe.tofile(path)
+
+    assert _gzip_members(path.read_bytes()) == 1
+    assert gzip.decompress(path.read_bytes()).decode() == lhe.tolhe()
+
+
+@pytest.mark.parametrize("split", [None, 100])
+def test_writer_append_gzip_footer_in_last_member(tmp_path, lhe, split):
+    text = lhe.tolhe().encode()
+    if split is None:
+        first = b""
+        path_bytes = gzip.compress(text)
+    else:
+        # The closing tag is part of the last of two members
+        first = gzip.compress(text[:split])
+        path_bytes = first + gzip.compress(text[split:])
+    path = tmp_path / "events.lhe.gz"
+    path.write_bytes(path_bytes)
+
+    with pylhe.LHEWriter(path, lhe.init, mode="a") as writer:
+        writer.write_events(lhe.events)
+    with pylhe.LHEWriter(path, lhe.init, mode="a") as writer:
+        writer.write_event(lhe.events[0])
+
+    data = path.read_bytes()
+    assert data.startswith(first)
+    assert (
+        gzip.decompress(data).decode()
+        == pylhe.LesHouchesEvents(
+            init=lhe.init, header=lhe.header, events=[*lhe.events * 2, lhe.events[0]]
+        ).tolhe()
+    )
+
+
+def test_writer_append_requires_gzip_footer(tmp_path, lhe):
+    path = tmp_path / "events.lhe.gz"
+    text = lhe.tolhe()
+    path.write_bytes(gzip.compress(text.removesuffix("</LesHouchesEvents>").encode()))
+
+    with pytest.raises(ValueError, match=r"not found at the end of the file"):
+        pylhe.LHEWriter(path, lhe.init, mode="a")
+
+
+def test_writer_append_requires_xml_path(tmp_path, lhe):
+    with pytest.raises(ValueError, match=r"Append mode"):
+        pylhe.LHEWriter(io.StringIO(), lhe.init, mode="a")
+    with pytest.raises(ValueError, match=r"Append mode"):
+        pylhe.LHEWriter(tmp_path / "events.hdf5", lhe.init, mode="a")
+    with pytest.raises(ValueError, match=r"mode must be"):
+        pylhe.LHEWriter(tmp_path / "events.lhe", lhe.init, mode="x")
+
+
+def test_writer_serialized_header(tmp_path, lhe):
+    header = lhe.header.tolhe()
+    stream = io.StringIO()
+    with pylhe.LHEWriter(stream, lhe.init, header) as writer:
+        writer.write_events(lhe.events)
+
+    assert stream.getvalue() == lhe.tolhe()
+
+    path = tmp_path / "events.lhe"
+    lhe.tofile(path)
+    with pylhe.LHEWriter(path, lhe.init, header, mode="a") as writer:
+        writer.write_events(lhe.events)
+    with pytest.raises(ValueError, match=r"initrwgt block does not match"):
+        pylhe.LHEWriter(path, lhe.init, "<header></header>", mode="a")
+
+
+def test_prologue_cache_invalidated_on_mutation(monkeypatch, lhe):
+    calls = []
+    tolhe = pylhe.LHEHeader.tolhe
+
+    def _tolhe(self, lheformat=pylhe.DEFAULT_FORMAT):
+        calls.append(lheformat)
+        return tolhe(self, lheformat)
+
+    monkeypatch.setattr(pylhe.LHEHeader, "tolhe", _tolhe)
+    lhe.header.extra_elements.append(ET.fromstring("<MGVersion>3.5</MGVersion>"))
+
+    first = lhe.tolhe()
+    assert lhe.tolhe() == first
+    assert len(calls) == 1
+    lhe.header.extra_elements[0].text = "3.6"
+    lhe.header.initrwgt.entries[0].name = "muR=0.5 muF=1"
+    second = lhe.tolhe()
+    assert len(calls) == 2
+    assert "<MGVersion>3.6</MGVersion>" in second
+    assert "muR=0.5 muF=1" in second
+    lhe.tolhe(lheformat=pylhe.WEIGHTS_FORMAT)
+    assert len(calls) == 3